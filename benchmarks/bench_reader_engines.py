@@ -0,0 +1,110 @@
+"""
+Compare the reader engines on synthetic files shaped like a customer configuration
+
+Usage:
+    python benchmarks/bench_reader_engines.py --rows 200000 --excel-rows 20000
+    python benchmarks/bench_reader_engines.py --customer WW --output reports/reader_engines.json
+
+Each available CSV/Excel engine and dtype backend is timed on a full read and on a
+strict chunked data type validation. Best of --repeat runs is reported.
+"""
+import argparse
+import itertools
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from config import ValidationPlan, get_validation_plan  # noqa: E402
+from date_parsing import DateFormatStore  # noqa: E402
+from file_readers import iter_chunks, read_file  # noqa: E402
+from reader_engines import CSV_ENGINES, DTYPE_BACKENDS, EXCEL_ENGINES, engine_available, resolve_engines  # noqa: E402
+from synthetic import make_frame  # noqa: E402
+from validation import validate_data_types_chunked  # noqa: E402
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """Best wall time of `repeat` runs in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(plan: ValidationPlan, rows: int, excel_rows: int, repeat: int) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = str(Path(tmp_dir) / "bench.csv")
+        xlsx_path = str(Path(tmp_dir) / "bench.xlsx")
+        make_frame(plan, rows).to_csv(csv_path, index=False)
+        make_frame(plan, excel_rows).to_excel(xlsx_path, index=False, sheet_name=plan.sheet_name)
+        # Learned date formats go to the temporary directory, not data/date_formats.json
+        format_store = DateFormatStore(Path(tmp_dir) / "date_formats.json")
+
+        cases = [(csv_path, rows, "csv", engine) for engine in CSV_ENGINES]
+        cases += [(xlsx_path, excel_rows, "excel", engine) for engine in EXCEL_ENGINES]
+        for (path, n_rows, file_format, engine), backend in itertools.product(cases, DTYPE_BACKENDS):
+            if not engine_available(engine) or not engine_available(backend):
+                continue
+            engines = resolve_engines(
+                csv=engine if file_format == "csv" else None,
+                excel=engine if file_format == "excel" else None,
+                dtype_backend=backend,
+            )
+            read_seconds = best_time(lambda: read_file(path, path, plan.sheet_name, engines), repeat)
+            validate_seconds = best_time(
+                lambda: validate_data_types_chunked(
+                    iter_chunks(path, path, plan.sheet_name, engines=engines),
+                    plan.customer,
+                    plan.product_line,
+                    strict=True,
+                    format_store=format_store,
+                ),
+                repeat,
+            )
+            results.append(
+                {
+                    "format": file_format,
+                    "engine": engine,
+                    "dtype_backend": backend,
+                    "rows": n_rows,
+                    "read_seconds": round(read_seconds, 4),
+                    "validate_seconds": round(validate_seconds, 4),
+                    "rows_per_second": int(n_rows / max(validate_seconds, 1e-9)),
+                }
+            )
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the file reader engines.")
+    parser.add_argument("--customer", default="ABC")
+    parser.add_argument("--product-line", default="MASTIC")
+    parser.add_argument("--rows", type=int, default=200_000, help="Rows of the CSV file")
+    parser.add_argument("--excel-rows", type=int, default=20_000, help="Rows of the Excel file (slow to generate)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    plan = get_validation_plan(args.customer, args.product_line)
+    results = run(plan, args.rows, args.excel_rows, args.repeat)
+
+    print(pd.DataFrame(results).to_string(index=False))
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps({"plan": plan.label, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
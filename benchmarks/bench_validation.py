@@ -0,0 +1,280 @@
+"""
+Time the validators on synthetic files of every customer configuration and track regressions
+
+Usage:
+    python benchmarks/bench_validation.py
+    python benchmarks/bench_validation.py --customer SRS --product-line VARIFORM --sizes 10000,100000
+    python benchmarks/bench_validation.py --sizes 10000 --formats csv,xlsx --no-record
+
+For each plan and size a synthetic file with injected type errors is written and read
+back, then validate_columns, validate_data_types (sample and strict),
+get_data_type_summary, a strict profile_columns pass (types and summary together, as
+the app runs them), validate_row_rules, find_duplicates and validate_references (against
+master lists built from the file's own codes) are timed (best of --repeat runs). The
+strict results must find exactly the injected errors.
+
+Each run is appended to reports/benchmarks/validation_history.jsonl. A timing counts as
+a regression when it exceeds the median of the last --window recorded runs of the same
+case by more than --threshold (and by at least --min-delta seconds). Regressions make
+the script exit with 1.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from config import REFERENCE_TABLES, VALIDATION_PLANS, ValidationPlan  # noqa: E402
+from date_parsing import DateFormatStore  # noqa: E402
+from duplicates import find_duplicates  # noqa: E402
+from file_readers import read_file  # noqa: E402
+from reference_data import ReferenceStore, validate_references  # noqa: E402
+from row_rules import validate_row_rules  # noqa: E402
+from synthetic import inject_type_errors, make_frame, write_file  # noqa: E402
+from validation import get_data_type_summary, profile_columns, validate_columns, validate_data_types  # noqa: E402
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_HISTORY = ROOT_DIR / "reports" / "benchmarks" / "validation_history.jsonl"
+DEFAULT_SIZES = "10000,100000,1000000"
+# Timings compared against the history
+TIMED_METRICS = (
+    "read_seconds",
+    "validate_columns_seconds",
+    "validate_data_types_seconds",
+    "validate_data_types_strict_seconds",
+    "summary_seconds",
+    "profile_strict_seconds",
+    "rules_seconds",
+    "duplicates_seconds",
+    "references_seconds",
+)
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """Best wall time of `repeat` runs in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def write_reference_tables(frame: pd.DataFrame, plan: ValidationPlan, directory: Path) -> ReferenceStore:
+    """Write master lists holding the distinct codes of the frame's reference columns and load them"""
+    directory.mkdir(parents=True, exist_ok=True)
+    store = ReferenceStore(directory)
+    for col, name in plan.references.items():
+        if col in frame.columns:
+            codes = pd.Series(frame[col].dropna().unique(), dtype=str)
+            pd.DataFrame({REFERENCE_TABLES[name]["column"]: codes}).to_csv(
+                directory / REFERENCE_TABLES[name]["file"], index=False
+            )
+            # Loaded once up front, so the timings only cover the lookups
+            store.table(name)
+    return store
+
+
+def bench_case(plan: ValidationPlan, rows: int, extension: str, error_rate: float, repeat: int,
+               directory: Path) -> Dict:
+    """Generate, write and read back one synthetic file, then time the validators on it"""
+    df, injected = inject_type_errors(make_frame(plan, rows), plan, error_rate)
+    path = write_file(df, plan, directory, extension)
+    del df
+
+    read_seconds = best_time(lambda: read_file(str(path), path.name, plan.sheet_name), repeat)
+    frame = read_file(str(path), path.name, plan.sheet_name)
+    columns = frame.columns.tolist()
+    store = write_reference_tables(frame, plan, directory / "reference")
+    # Learned date formats go to the temporary directory, not data/date_formats.json
+    format_store = DateFormatStore(directory / "date_formats.json")
+
+    timings = {
+        "read_seconds": read_seconds,
+        "validate_columns_seconds": best_time(
+            lambda: validate_columns(columns, plan.customer, plan.product_line), repeat
+        ),
+        "validate_data_types_seconds": best_time(
+            lambda: validate_data_types(frame, plan.customer, plan.product_line), repeat
+        ),
+        "validate_data_types_strict_seconds": best_time(
+            lambda: validate_data_types(frame, plan.customer, plan.product_line, strict=True), repeat
+        ),
+        "summary_seconds": best_time(lambda: get_data_type_summary(frame), repeat),
+        "profile_strict_seconds": best_time(
+            lambda: profile_columns(
+                frame, plan.column_types, strict=True, customer=plan.customer, format_store=format_store
+            ),
+            repeat,
+        ),
+        "rules_seconds": best_time(
+            lambda: validate_row_rules([frame], plan.customer, plan.product_line), repeat
+        ),
+        "duplicates_seconds": best_time(
+            lambda: find_duplicates([frame], plan.customer, plan.product_line), repeat
+        ),
+        "references_seconds": best_time(
+            lambda: validate_references([frame], plan.customer, plan.product_line, store), repeat
+        ),
+    }
+
+    strict_results = validate_data_types(frame, plan.customer, plan.product_line, strict=True)
+    profiled_results = validate_data_types(
+        frame, plan.customer, plan.product_line, strict=True,
+        profile=profile_columns(
+            frame, plan.column_types, strict=True, customer=plan.customer, format_store=format_store
+        ),
+    )
+    found = {issue["column"]: issue["invalid_count"] for issue in strict_results["type_issues"]}
+    return {
+        "plan": plan.label,
+        "format": extension.lstrip("."),
+        "rows": rows,
+        "columns": len(columns),
+        "injected_errors": sum(injected.values()),
+        "errors_detected": found == injected and profiled_results == strict_results,
+        **{metric: round(seconds, 5) for metric, seconds in timings.items()},
+        "strict_rows_per_second": int(rows / max(timings["validate_data_types_strict_seconds"], 1e-9)),
+    }
+
+
+def run(plans: List[ValidationPlan], sizes: List[int], formats: List[str], max_excel_rows: int,
+        error_rate: float, repeat: int) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for plan in plans:
+            for rows in sizes:
+                for file_format in formats:
+                    if file_format == "xlsx" and rows > max_excel_rows:
+                        continue
+                    result = bench_case(plan, rows, f".{file_format}", error_rate, repeat, Path(tmp_dir))
+                    print(
+                        f"{result['plan']:<18} {file_format:<4} {rows:>9,} rows  "
+                        f"strict {result['validate_data_types_strict_seconds']:.3f}s",
+                        file=sys.stderr,
+                    )
+                    results.append(result)
+    return results
+
+
+def case_key(result: Dict) -> tuple:
+    return result["plan"], result["format"], result["rows"]
+
+
+def load_history(path: Path) -> List[Dict]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def find_regressions(results: List[Dict], history: List[Dict], window: int, threshold: float,
+                     min_delta: float) -> List[Dict]:
+    """
+    Compare each timing with the median of the same case over the last `window` recorded runs
+    """
+    past = {}
+    for run_record in history:
+        for result in run_record["results"]:
+            past.setdefault(case_key(result), []).append(result)
+
+    regressions = []
+    for result in results:
+        previous = past.get(case_key(result), [])[-window:]
+        for metric in TIMED_METRICS:
+            values = [p[metric] for p in previous if p.get(metric) is not None]
+            if not values:
+                continue
+            baseline = statistics.median(values)
+            current = result[metric]
+            if current > baseline * (1 + threshold) and current - baseline >= min_delta:
+                regressions.append(
+                    {
+                        "plan": result["plan"],
+                        "format": result["format"],
+                        "rows": result["rows"],
+                        "metric": metric,
+                        "baseline_seconds": baseline,
+                        "current_seconds": current,
+                        "change_percentage": round((current / baseline - 1) * 100, 1),
+                    }
+                )
+    return regressions
+
+
+def run_metadata() -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": f"{platform.system()} {platform.machine()}",
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the validators on synthetic files.")
+    parser.add_argument("--customer", help="Only benchmark this customer (all configurations by default)")
+    parser.add_argument("--product-line", help="Only benchmark this product line")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated row counts")
+    parser.add_argument("--formats", default="csv", help="Comma-separated formats (csv, xlsx)")
+    parser.add_argument("--max-excel-rows", type=int, default=100_000, help="Skip larger XLSX files (slow to write)")
+    parser.add_argument("--error-rate", type=float, default=0.001, help="Share of invalid cells per typed column")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--history", default=str(DEFAULT_HISTORY), help="JSON lines file of past runs")
+    parser.add_argument("--window", type=int, default=5, help="Past runs the baseline is the median of")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown over the baseline")
+    parser.add_argument("--min-delta", type=float, default=0.01, help="Ignore slowdowns below this many seconds")
+    parser.add_argument("--no-record", action="store_true", help="Compare with the history without appending")
+    args = parser.parse_args(argv)
+
+    plans = [
+        plan for plan in VALIDATION_PLANS.values()
+        if (args.customer is None or plan.customer == args.customer)
+        and (args.product_line is None or plan.product_line == args.product_line)
+    ]
+    if not plans:
+        print("No configuration matches the customer / product line.", file=sys.stderr)
+        return 2
+    sizes = [int(size) for size in args.sizes.split(",")]
+    formats = args.formats.split(",")
+
+    results = run(plans, sizes, formats, args.max_excel_rows, args.error_rate, args.repeat)
+    print(pd.DataFrame(results).to_string(index=False))
+
+    history_path = Path(args.history)
+    regressions = find_regressions(results, load_history(history_path), args.window, args.threshold, args.min_delta)
+    if not args.no_record:
+        history_path.parent.mkdir(parents=True, exist_ok=True)
+        with history_path.open("a") as history:
+            history.write(json.dumps({**run_metadata(), "results": results}) + "\n")
+
+    undetected = [result for result in results if not result["errors_detected"]]
+    for result in undetected:
+        print(f"Injected errors were not all detected: {result['plan']} {result['format']} {result['rows']}",
+              file=sys.stderr)
+    if regressions:
+        print("\nRegressions:", file=sys.stderr)
+        print(pd.DataFrame(regressions).to_string(index=False), file=sys.stderr)
+    return 1 if regressions or undetected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
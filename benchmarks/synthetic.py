@@ -0,0 +1,97 @@
+"""
+Synthetic NET_ASP files shaped like a customer configuration
+
+Every configured column gets plausibly typed values, and a controlled share of the
+cells of the typed (non-"string") columns can be replaced with values that break the
+expected type, so benchmarks can also check that the injected errors are found.
+"""
+import sys
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from config import DEFAULT_FILE_PREFIX, ValidationPlan  # noqa: E402
+
+# Value written into a cell to break each expected type
+INVALID_VALUES = {
+    "integer": "12.5x",
+    "float": "n/a-price",
+    "date": "not a date",
+    "boolean": "maybe",
+}
+
+
+def make_frame(plan: ValidationPlan, rows: int, seed: int = 0) -> pd.DataFrame:
+    """Build a frame with one plausibly typed column per configured column"""
+    rng = np.random.default_rng(seed)
+    # Text columns index into a shared pool of 500 strings, which keeps 1M-row frames small
+    text_values = np.array([f"value_{i}" for i in range(500)], dtype=object)
+    data = {}
+    for column, expected in plan.column_types.items():
+        if expected == "float":
+            data[column] = rng.random(rows).round(2) * 1000
+        elif expected == "integer":
+            data[column] = rng.integers(0, 10_000, rows)
+        elif expected == "date":
+            data[column] = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, rows), unit="D")
+        elif expected == "boolean":
+            data[column] = rng.integers(0, 2, rows).astype(bool)
+        else:
+            data[column] = text_values[rng.integers(0, 500, rows)]
+    return pd.DataFrame(data)
+
+
+def inject_type_errors(df: pd.DataFrame, plan: ValidationPlan, error_rate: float,
+                       seed: int = 0) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """
+    Replace a share of the cells of every typed column with a value that breaks its type
+
+    Args:
+        df: Frame from make_frame (not modified)
+        plan: Plan the frame was built for
+        error_rate: Share of rows to corrupt per column (0 to 1); at least one row when positive
+        seed: Seed picking the corrupted rows
+
+    Returns:
+        Tuple of (corrupted frame, number of invalid cells per column)
+    """
+    if error_rate <= 0 or df.empty:
+        return df, {}
+
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    injected = {}
+    count = max(1, int(len(df) * error_rate))
+    for column, expected in plan.column_types.items():
+        if expected not in INVALID_VALUES or column not in df.columns:
+            continue
+        rows = rng.choice(len(df), size=count, replace=False)
+        values = df[column].astype(object)
+        values.iloc[rows] = INVALID_VALUES[expected]
+        df[column] = values
+        injected[column] = count
+    return df, injected
+
+
+def file_name(plan: ValidationPlan, rows: int, extension: str) -> str:
+    """Name a synthetic file so it passes the plan's file name check, e.g. 'Net_ASP_MASTIC_synthetic_10000.csv'"""
+    prefix = (plan.file_prefix or DEFAULT_FILE_PREFIX).rstrip("_")
+    return f"{prefix}_synthetic_{rows}{extension}"
+
+
+def write_file(df: pd.DataFrame, plan: ValidationPlan, directory: Path, extension: str) -> Path:
+    """Write a synthetic frame as CSV or XLSX (on the plan's worksheet) and return its path"""
+    path = Path(directory) / file_name(plan, len(df), extension)
+    if extension == ".csv":
+        df.to_csv(path, index=False)
+    elif extension == ".xlsx":
+        df.to_excel(path, index=False, sheet_name=plan.sheet_name)
+    else:
+        raise ValueError(f"Unsupported extension '{extension}'")
+    return path
@@ -5,11 +5,10 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
-from pythonjsonlogger.jsonlogger import JsonFormatter
 from rich.console import Console
-from rich.logging import RichHandler
 
 from src.constants import Envs
+from src.utils.logging_config import RichCustomFormatter, get_logging_config  # noqa: F401
 
 load_dotenv(override=True)
 console = Console()
@@ -85,11 +84,19 @@ class ProjectEnvs(BaseSettings):
     GCP_SERVICE_ACCOUNT_JSON: str = os.environ.get("GCP_SERVICE_ACCOUNT_JSON", "")
     DD_LOGS_INJECTION: bool = os.environ.get("DD_LOGS_INJECTION", "False") == "True"
 
+    DB_POOL_SIZE: int = os.environ.get("DB_POOL_SIZE", 5)
+    DB_MAX_OVERFLOW: int = os.environ.get("DB_MAX_OVERFLOW", 10)
+    DB_POOL_TIMEOUT: float = os.environ.get("DB_POOL_TIMEOUT", 30)
+    DB_POOL_RECYCLE: int = os.environ.get("DB_POOL_RECYCLE", 1800)
+    # Prepared statements cached per asyncpg connection (set to 0 behind pgbouncer in transaction mode)
+    DB_STATEMENT_CACHE_SIZE: int = os.environ.get("DB_STATEMENT_CACHE_SIZE", 100)
+
 
 PROJECT_PATHS = ProjectPaths()
 PROJECT_ENVS = ProjectEnvs()
 API_KEYS = ApiKeys()
 DATABASE_URI = f"postgresql://{API_KEYS.POSTGRES_DATABASE_USERNAME}:{API_KEYS.POSTGRES_DATABASE_PASSWORD}@{API_KEYS.POSTGRES_DATABASE_URL}/{API_KEYS.POSTGRES_DATABASE_NAME}{'?sslmode=require' if PROJECT_ENVS.ENV_STATE not in [Envs.LOCAL.value, Envs.DEV.value] else ''}"
+ASYNC_DATABASE_URI = f"postgresql+asyncpg://{API_KEYS.POSTGRES_DATABASE_USERNAME}:{API_KEYS.POSTGRES_DATABASE_PASSWORD}@{API_KEYS.POSTGRES_DATABASE_URL}/{API_KEYS.POSTGRES_DATABASE_NAME}{'?ssl=require' if PROJECT_ENVS.ENV_STATE not in [Envs.LOCAL.value, Envs.DEV.value] else ''}"
 
 
 def get_handler():
@@ -138,54 +145,8 @@ def get_local_env_logger():
     return {} if PROJECT_ENVS.ENV_STATE != Envs.LOCAL else local_env_loggers
 
 
-class RichCustomFormatter(logging.Formatter):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.rich_handler = RichHandler(rich_tracebacks=True, tracebacks_suppress=[], tracebacks_show_locals=True)
-
-    def format(self, record):
-        return super().format(record)
-
-
-LOGGING_CONFIG = {
-    "version": 1,
-    "disable_existing_loggers": True,
-    "formatters": {
-        "console": {
-            "()": RichCustomFormatter,
-            "format": "%(message)s",
-            "datefmt": "<%d %b %Y | %H:%M:%S>",
-        },
-        "json_datadog": {
-            "()": JsonFormatter,
-            "format": "%(asctime)s %(levelname)s [%(name)s] [%(filename)s:%(lineno)d] "
-            "[dd.service=%(dd.service)s dd.env=%(dd.env)s dd.version=%(dd.version)s "
-            "dd.trace_id=%(dd.trace_id)s dd.span_id=%(dd.span_id)s] - %(message)s",
-            "datefmt": "<%d %b %Y | %H:%M:%S>",
-        },
-    },
-    "handlers": {
-        "console": {
-            "class": "rich.logging.RichHandler",
-            "level": PROJECT_ENVS.LOG_LVL,
-            "formatter": "console",
-            "rich_tracebacks": True,
-            "tracebacks_show_locals": True,
-        },
-        "datadog": {
-            "class": "logging.StreamHandler",
-            "formatter": "json_datadog",
-        },
-    },
-    "loggers": {
-        "": {
-            "handlers": get_handler(),
-            "level": PROJECT_ENVS.LOG_LVL,
-            "propagate": True,
-        }
-        | get_local_env_logger(),
-    },
-}
+LOGGING_CONFIG = get_logging_config(PROJECT_ENVS.ENV_STATE, PROJECT_ENVS.LOG_LVL)
+LOGGING_CONFIG["loggers"][""] |= get_local_env_logger()
 
 logging.captureWarnings(True)
 logging.config.dictConfig(LOGGING_CONFIG)
@@ -0,0 +1,316 @@
+"""
+Batch validation of many files with process-pool parallelism
+Files are routed to their customer/product line from the file name prefix rules
+"""
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import VALIDATION_PLANS, ValidationPlan, get_validation_plan, has_product_lines
+from date_parsing import DateFormatStore
+from duplicates import DuplicateChecker
+from file_readers import WorkbookInspector, get_file_extension
+from invoice_index import InvoiceKeyIndex, check_resubmitted
+from reference_data import ReferenceChecker
+from row_rules import validate_with_row_rules
+from validation import validate_file_name, validate_columns, validate_data_types_chunked, validate_data_types_incremental
+
+SUPPORTED_EXTENSIONS = (".csv", ".xlsx", ".xls")
+
+def route_file(path: str, customer: str = None, filename: str = None,
+               workbook: WorkbookInspector = None) -> Optional[ValidationPlan]:
+    """
+    Find the validation plan for a file from its name prefix
+
+    The longest matching prefix wins (Net_ASP_MASTIC beats Net_ASP). Several
+    customers share the same prefix, so ties are broken by the header: the
+    plan whose essential columns are best covered by the file is picked.
+
+    Args:
+        path: Path of the file
+        customer: Restrict routing to this customer (None to auto-detect)
+        filename: Name to route on (defaults to the base name of path)
+        workbook: Already opened inspector of the file (opened on demand otherwise)
+
+    Returns:
+        The matching plan, or None if no prefix rule matches
+    """
+    filename = filename or os.path.basename(path)
+    candidates = [
+        plan for plan in VALIDATION_PLANS.values()
+        if (customer is None or plan.customer == customer)
+        and plan.file_prefix and filename.startswith(plan.file_prefix)
+    ]
+    if not candidates:
+        return None
+
+    longest = max(len(plan.file_prefix) for plan in candidates)
+    candidates = [plan for plan in candidates if len(plan.file_prefix) == longest]
+    if len(candidates) == 1:
+        return candidates[0]
+
+    if workbook is None:
+        with WorkbookInspector(path, filename) as workbook:
+            return route_file(path, customer, filename, workbook)
+
+    best_plan, best_score = None, -1.0
+    for plan in candidates:
+        sheet_name = workbook.select_sheet(plan.sheet_candidates, plan.essential)
+        header = set(workbook.header(sheet_name)) if sheet_name is not None else set()
+        score = len(plan.essential_set & header) / max(len(plan.essential_set), 1)
+        if score > best_score:
+            best_plan, best_score = plan, score
+    return best_plan
+
+def validate_path(path: str, customer: str = None, product_line: str = None, validate_types: bool = True,
+                  strict: bool = False, filename: str = None, incremental: bool = False,
+                  record_keys: bool = False) -> Dict:
+    """
+    Validate one file end to end (file name, columns and optionally data types, row rules, duplicates,
+    lines already submitted in earlier files and codes missing from the master lists)
+
+    Runs in worker processes, so it never raises: failures are reported in the
+    returned entry instead.
+
+    Args:
+        path: Path of the file
+        customer: Customer to validate against (None to auto-detect from the file name)
+        product_line: Product line (None to auto-detect, ignored for NVR/WW)
+        validate_types: Whether to run data type validation, the row rules and the duplicate,
+            resubmission and reference checks (in the same pass)
+        strict: Check every value instead of a sample
+        filename: Name to validate (defaults to the base name of path)
+        incremental: Only check rows changed since the file was last submitted (implies strict)
+        record_keys: Add the invoice keys of the file to the invoice key index when it passes
+
+    Returns:
+        Dictionary with the file name, routed customer/product line, the sheet read,
+        status ('passed', 'failed' or 'error'), error message and validation results
+    """
+    filename = filename or os.path.basename(path)
+    entry = error_entry(filename, customer, product_line)
+
+    try:
+        with WorkbookInspector(path, filename) as workbook:
+            if customer and (product_line or not has_product_lines(customer)):
+                plan = get_validation_plan(customer, product_line)
+            else:
+                plan = route_file(path, customer, filename, workbook)
+                if plan is None:
+                    entry["error"] = "File name does not match any configured prefix"
+                    return entry
+            entry["customer"], entry["product_line"] = plan.customer, plan.product_line
+
+            sheet_name = workbook.select_sheet(plan.sheet_candidates, plan.essential)
+            if sheet_name is None:
+                raise ValueError(f"Worksheet named '{plan.sheet_name}' not found")
+            if workbook.is_workbook:
+                entry["sheet_name"] = sheet_name
+
+            is_valid_name, name_error = validate_file_name(filename, plan.customer, plan.product_line)
+            file_columns = workbook.header(sheet_name)
+            results = validate_columns(file_columns, plan.customer, plan.product_line)
+
+            type_results = {"type_issues": [], "type_matches": [], "total_checked": 0}
+            rule_results = duplicate_results = resubmission_results = reference_results = None
+            if validate_types:
+                duplicates = DuplicateChecker(plan.customer, plan.product_line)
+                references = ReferenceChecker(plan.customer, plan.product_line)
+                chunks = references.watch(duplicates.watch(workbook.iter_chunks(sheet_name)))
+                # Submitted files teach the date formats of their customer to later files
+                format_store = DateFormatStore()
+                if incremental:
+                    type_results, rule_results = validate_with_row_rules(
+                        validate_data_types_incremental, chunks, plan.customer, plan.product_line, file_name=filename,
+                        format_store=format_store
+                    )
+                else:
+                    type_results, rule_results = validate_with_row_rules(
+                        validate_data_types_chunked, chunks, plan.customer, plan.product_line, strict=strict,
+                        format_store=format_store
+                    )
+                duplicate_results = duplicates.results()
+                resubmission_results = check_resubmitted(duplicates, plan, filename)
+                reference_results = references.results()
+
+        entry["results"], entry["type_results"], entry["rule_results"] = results, type_results, rule_results
+        entry["duplicate_results"], entry["resubmission_results"] = duplicate_results, resubmission_results
+        entry["reference_results"] = reference_results
+        entry["error"] = name_error or None
+        passed = is_valid_name and passes_checks(
+            results, type_results, rule_results, duplicate_results, resubmission_results, reference_results
+        )
+        entry["status"] = "passed" if passed else "failed"
+        has_keys = bool(duplicate_results and duplicate_results["key"] and not duplicate_results["missing_columns"])
+        if passed and record_keys and has_keys:
+            try:
+                InvoiceKeyIndex().add(plan, filename, duplicates.key_hashes()[0])
+            except OSError as e:
+                entry["error"] = f"Invoice keys not recorded: {e}"
+    except Exception as e:
+        entry["error"] = f"Error reading file: {e}"
+
+    return entry
+
+def error_entry(filename: str, customer: str = None, product_line: str = None, error: str = None) -> Dict:
+    """Get the entry of a file that could not be validated (the shape of validate_path entries)"""
+    return {
+        "file_name": filename,
+        "customer": customer,
+        "product_line": product_line,
+        "sheet_name": None,
+        "status": "error",
+        "error": error,
+        "results": None,
+        "type_results": None,
+        "rule_results": None,
+        "duplicate_results": None,
+        "resubmission_results": None,
+        "reference_results": None
+    }
+
+def passes_checks(results: Dict, type_results: Dict, rule_results: Dict = None, duplicate_results: Dict = None,
+                  resubmission_results: Dict = None, reference_results: Dict = None) -> bool:
+    """Check that a file has every essential column and no issue in the results given (the file name aside)"""
+    return (
+        not results["missing_essential"] and not type_results["type_issues"]
+        and not (rule_results or {}).get("rule_violations")
+        and not (duplicate_results or {}).get("duplicate_rows")
+        and not (resubmission_results or {}).get("resubmitted_rows")
+        and not (reference_results or {}).get("unknown_rows")
+    )
+
+def validate_batch(paths: Iterable[str], customer: str = None, product_line: str = None,
+                   validate_types: bool = True, strict: bool = False, max_workers: int = None,
+                   incremental: bool = False, record_keys: bool = False) -> List[Dict]:
+    """
+    Validate many files in parallel across a process pool
+
+    Args:
+        paths: Paths of the files to validate
+        customer: Customer to validate against (None to auto-detect per file)
+        product_line: Product line (None to auto-detect per file)
+        validate_types: Whether to run data type validation
+        strict: Check every value instead of a sample
+        max_workers: Number of worker processes (defaults to the CPU count)
+        incremental: Only check rows changed since each file was last submitted
+        record_keys: Add the invoice keys of the files that pass to the invoice key index
+
+    Returns:
+        One validate_path entry per file, in input order
+    """
+    paths = list(paths)
+    if len(paths) <= 1 or max_workers == 1:
+        return [
+            validate_path(path, customer, product_line, validate_types, strict, incremental=incremental,
+                          record_keys=record_keys)
+            for path in paths
+        ]
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(paths))
+    # spawn: forking a multi-threaded server (Streamlit, uvicorn) can deadlock the children
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = [
+            executor.submit(
+                validate_path, path, customer, product_line, validate_types, strict, incremental=incremental,
+                record_keys=record_keys
+            )
+            for path in paths
+        ]
+        return [future.result() for future in futures]
+
+def read_key_hashes(path: str, customer: str = None, product_line: str = None,
+                    filename: str = None) -> Tuple[Optional[Tuple[str, Optional[str]]], str, np.ndarray]:
+    """
+    Hash the invoice keys of one file (see duplicates.hash_keys)
+
+    Returns:
+        Tuple of ((customer, product line) or None when the file cannot be routed, file name, key hashes)
+    """
+    filename = filename or os.path.basename(path)
+    with WorkbookInspector(path, filename) as workbook:
+        if customer and (product_line or not has_product_lines(customer)):
+            plan = get_validation_plan(customer, product_line)
+        else:
+            plan = route_file(path, customer, filename, workbook)
+            if plan is None:
+                return None, filename, np.empty(0, dtype=np.uint64)
+        sheet_name = workbook.select_sheet(plan.sheet_candidates, plan.essential)
+        if sheet_name is None:
+            raise ValueError(f"Worksheet named '{plan.sheet_name}' not found")
+        checker = DuplicateChecker(plan.customer, plan.product_line)
+        for chunk in workbook.iter_chunks(sheet_name):
+            checker.fold(chunk)
+    return (plan.customer, plan.product_line), filename, checker.key_hashes()[0]
+
+def rebuild_key_index(paths: Iterable[str], customer: str = None, product_line: str = None,
+                      max_workers: int = None, index: InvoiceKeyIndex = None) -> Dict[str, int]:
+    """
+    Rebuild the invoice key index from the history of accepted files
+
+    Files are read in parallel, then each customer / product line found is replaced with the
+    keys of its files, in input order (the first file a key appears in is the one reported).
+
+    Args:
+        paths: Accepted files, oldest first
+        customer: Customer of the files (None to auto-detect per file)
+        product_line: Product line (None to auto-detect per file)
+        max_workers: Number of worker processes (defaults to the CPU count)
+        index: Index to rebuild (defaults to data/processed/invoice_keys)
+
+    Returns:
+        Number of files indexed per plan label (files that cannot be routed are skipped)
+    """
+    paths = list(paths)
+    if len(paths) <= 1 or max_workers == 1:
+        keys = [read_key_hashes(path, customer, product_line) for path in paths]
+    else:
+        max_workers = min(max_workers or os.cpu_count() or 1, len(paths))
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+            futures = [executor.submit(read_key_hashes, path, customer, product_line) for path in paths]
+            keys = [future.result() for future in futures]
+
+    files_by_plan = {}
+    for plan_key, filename, hashes in keys:
+        if plan_key is not None:
+            files_by_plan.setdefault(plan_key, []).append((filename, hashes))
+
+    index = index or InvoiceKeyIndex()
+    indexed = {}
+    for (plan_customer, plan_product_line), files in files_by_plan.items():
+        plan = get_validation_plan(plan_customer, plan_product_line)
+        indexed[plan.label] = index.rebuild(plan, files)
+    return indexed
+
+def extract_zip(zip_path: str, dest_dir: str) -> List[str]:
+    """
+    Extract the supported files of a zip archive into a directory
+
+    Original file names are kept and macOS metadata entries are skipped.
+
+    Returns:
+        Paths of the extracted files
+    """
+    paths = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for index, member in enumerate(archive.infolist()):
+            name = os.path.basename(member.filename)
+            if member.is_dir() or not name or member.filename.startswith("__MACOSX/") or name.startswith("._"):
+                continue
+            if get_file_extension(name) not in SUPPORTED_EXTENSIONS:
+                continue
+            # One folder per member keeps the original file name even when names repeat across folders
+            member_dir = os.path.join(dest_dir, str(index))
+            os.makedirs(member_dir, exist_ok=True)
+            path = os.path.join(member_dir, name)
+            with archive.open(member) as source, open(path, "wb") as target:
+                while chunk := source.read(1024 * 1024):
+                    target.write(chunk)
+            paths.append(path)
+    return paths
@@ -0,0 +1,116 @@
+"""
+Normalized and fuzzy column name matching
+Suggests which file columns were probably meant for missing essential columns
+"""
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Tuple
+
+from config import ValidationPlan, get_validation_plan
+
+# Minimum trigram similarity (Dice coefficient) for a column to be suggested
+MIN_SIMILARITY = 0.5
+# Maximum number of suggestions per missing column
+MAX_SUGGESTIONS = 3
+
+# Everything but letters, digits and the symbols that carry meaning in our headers ('#', '%', '$')
+_SEPARATORS = re.compile(r"[^\w#%$]|_")
+
+def normalize_column_name(name: Any) -> str:
+    """
+    Fold a column name to a comparison key
+
+    Applies NFKC (so NBSPs and full-width characters become plain ones), case folding,
+    and drops whitespace and punctuation: 'Customer Invoice #', 'customer invoice#'
+    and 'Customer\\xa0Invoice #' all map to 'customerinvoice#'.
+    """
+    folded = unicodedata.normalize("NFKC", str(name)).casefold()
+    return _SEPARATORS.sub("", folded)
+
+def _trigrams(key: str) -> FrozenSet[str]:
+    """Character trigrams of a normalized key, padded so short names still get some"""
+    padded = f"  {key} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+class ColumnMatcher:
+    """
+    Precomputed matching index over the expected columns of one validation plan
+
+    Holds a normalized-name lookup for exact-after-folding matches and an inverted
+    trigram index for similarity scoring, so matching a file only touches the
+    trigrams of its unmatched columns.
+    """
+
+    def __init__(self, plan: ValidationPlan):
+        self.plan = plan
+        self.columns = plan.essential + tuple(col for col in plan.other if col not in plan.essential_set)
+        self.normalized = {}
+        self.trigram_sizes = []
+        self.trigram_index = {}
+
+        for position, column in enumerate(self.columns):
+            key = normalize_column_name(column)
+            self.normalized.setdefault(key, []).append(position)
+            grams = _trigrams(key)
+            self.trigram_sizes.append(len(grams))
+            for gram in grams:
+                self.trigram_index.setdefault(gram, []).append(position)
+
+    def score(self, file_column: Any) -> Dict[int, Tuple[float, str]]:
+        """
+        Score a file column against every expected column it resembles
+
+        Returns:
+            Mapping of expected column position to (score, match kind), where the kind
+            is 'normalized' for an exact match after folding and 'similar' otherwise
+        """
+        key = normalize_column_name(file_column)
+        scores = {position: (1.0, "normalized") for position in self.normalized.get(key, ())}
+
+        grams = _trigrams(key)
+        overlaps = Counter()
+        for gram in grams:
+            overlaps.update(self.trigram_index.get(gram, ()))
+        for position, overlap in overlaps.items():
+            if position in scores:
+                continue
+            similarity = 2 * overlap / (len(grams) + self.trigram_sizes[position])
+            if similarity >= MIN_SIMILARITY:
+                scores[position] = (round(similarity, 3), "similar")
+        return scores
+
+    def suggest(self, missing_columns: Iterable[str], file_columns: Iterable[Any]) -> Dict[str, List[Dict]]:
+        """
+        Rank candidate file columns for each missing expected column
+
+        Args:
+            missing_columns: Expected columns not found in the file
+            file_columns: File columns that did not match any expected column exactly
+
+        Returns:
+            Mapping of missing column to its suggestions (best first), each a dict with
+            the file 'column', its 'score' and the 'match' kind. Missing columns
+            without any candidate are left out.
+        """
+        positions = {column: position for position, column in enumerate(self.columns)}
+        wanted = {positions[column] for column in missing_columns if column in positions}
+        if not wanted:
+            return {}
+
+        candidates = {}
+        for file_column in file_columns:
+            for position, (score, kind) in self.score(file_column).items():
+                if position in wanted:
+                    candidates.setdefault(position, []).append({"column": file_column, "score": score, "match": kind})
+
+        return {
+            self.columns[position]: sorted(found, key=lambda s: -s["score"])[:MAX_SUGGESTIONS]
+            for position, found in candidates.items()
+        }
+
+@lru_cache(maxsize=None)
+def get_column_matcher(customer: str, product_line: str = None) -> ColumnMatcher:
+    """Get the matching index of a plan, built on first use and reused afterwards"""
+    return ColumnMatcher(get_validation_plan(customer, product_line))
@@ -5,23 +5,84 @@ Reorganized version with data type validation
 import streamlit as st
 import pandas as pd
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Import our modules
-from config import COLUMN_CONFIGS
-from validation import validate_file_name, validate_columns, validate_data_types
+from config import COLUMN_CONFIGS, get_validation_plan, get_product_lines, has_product_lines
+from date_parsing import DateFormatStore
+from file_readers import WorkbookInspector
+from batch import extract_zip, passes_checks, validate_batch
+from compaction import compact_frame
+from duplicates import DuplicateChecker
+from invoice_index import InvoiceKeyIndex, check_resubmitted
+from reference_data import ReferenceChecker, reference_versions, validate_references
+from report import create_batch_report
+from row_rules import validate_row_rules, validate_with_row_rules
+from upload_cache import UploadCache, content_hash
+from validation import (
+    validate_file_name, validate_columns, validate_data_types, validate_data_types_chunked,
+    validate_data_types_incremental, get_data_type_summary, profile_columns
+)
 from ui_components import (
     display_validation_summary, 
     display_data_type_validation,
+    display_rule_validation,
+    display_duplicate_validation,
+    display_resubmission_validation,
+    display_reference_validation,
     display_file_analysis,
     display_expected_configuration,
     display_data_type_summary,
+    display_diagnostics,
     create_export_report
 )
+from utils.instrumentation import PipelineProfiler
+from utils.logging_config import configure_logging
 
 # Load environment variables
 load_dotenv()
 
+@st.cache_resource
+def setup_logging():
+    """
+    Apply the project logging configuration once per process
+    
+    The app never imports the src package, whose __init__ configures logging for the API and CLI,
+    so without this the INFO pipeline stage records would be dropped. Loggers created before
+    (the modules imported above, Streamlit's own) are kept enabled.
+    """
+    configure_logging(disable_existing_loggers=False)
+
+@st.cache_resource
+def get_upload_cache() -> UploadCache:
+    """Process-wide cache of parsed uploads and validation results, shared across reruns"""
+    return UploadCache(max_bytes=int(os.getenv("UPLOAD_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+
+def get_upload_hash(uploaded_file) -> str:
+    """Content hash of the uploaded file, computed once per upload"""
+    upload_id = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+    cached = st.session_state.get("upload_hash")
+    if cached is None or cached[0] != upload_id:
+        cached = (upload_id, content_hash(uploaded_file.getvalue()))
+        st.session_state.upload_hash = cached
+    return cached[1]
+
+def get_upload_workbook(uploaded_file, file_hash: str) -> WorkbookInspector:
+    """
+    Workbook of the uploaded file, opened once and reused across the reruns of this session
+    
+    The inspector holds an open handle, so it is kept per session rather than in the shared
+    upload cache, and the previous upload's inspector is closed when another file is uploaded.
+    """
+    cached = st.session_state.get("upload_workbook")
+    if cached is None or cached[0] != file_hash:
+        if cached is not None:
+            cached[1].close()
+        cached = (file_hash, WorkbookInspector(uploaded_file, uploaded_file.name))
+        st.session_state.upload_workbook = cached
+    return cached[1]
+
 def check_authentication():
     """Authentication system using environment variables"""
     if "authenticated" not in st.session_state:
@@ -64,12 +125,103 @@ def check_authentication():
         
         st.stop()
 
+def display_batch_validation(validate_data_types_enabled: bool, strict_mode: bool, incremental: bool = False,
+                             record_keys: bool = False):
+    """Validate many uploaded files (or zips of files) in parallel and show one consolidated report"""
+    customer_option = st.selectbox(
+        "Select Customer",
+        options=["Auto-detect"] + list(COLUMN_CONFIGS.keys()),
+        index=0,
+        help="Product lines are always detected from the file name prefix"
+    )
+    customer = None if customer_option == "Auto-detect" else customer_option
+    
+    uploaded_files = st.file_uploader(
+        "Choose files to validate",
+        type=['csv', 'xlsx', 'xls', 'zip'],
+        accept_multiple_files=True,
+        help="Upload CSV or Excel files, or zip archives of them"
+    )
+    if not uploaded_files:
+        return
+    
+    cache = get_upload_cache()
+    batch_key = (
+        "batch", tuple(content_hash(f.getvalue()) for f in uploaded_files),
+        customer, validate_data_types_enabled, strict_mode, incremental, record_keys
+    )
+    
+    def run_batch():
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = []
+            for index, uploaded_file in enumerate(uploaded_files):
+                file_dir = os.path.join(tmp_dir, f"upload_{index}")
+                os.makedirs(file_dir)
+                path = os.path.join(file_dir, uploaded_file.name)
+                with open(path, "wb") as f:
+                    f.write(uploaded_file.getvalue())
+                if uploaded_file.name.lower().endswith(".zip"):
+                    paths.extend(extract_zip(path, file_dir))
+                else:
+                    paths.append(path)
+            return validate_batch(
+                paths, customer, validate_types=validate_data_types_enabled, strict=strict_mode,
+                incremental=incremental, record_keys=record_keys
+            )
+    
+    with st.spinner("Validating files..."):
+        entries = cache.get_or_compute(batch_key, run_batch)
+    
+    st.subheader("📦 Batch Validation Summary")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Files", len(entries))
+    with col2:
+        st.metric("Passed", sum(entry["status"] == "passed" for entry in entries))
+    with col3:
+        st.metric("Failed", sum(entry["status"] == "failed" for entry in entries))
+    with col4:
+        st.metric("Errors", sum(entry["status"] == "error" for entry in entries))
+    
+    report_df = create_batch_report(entries)
+    st.dataframe(report_df, use_container_width=True)
+    st.download_button(
+        label="📥 Download Batch Report as CSV",
+        data=report_df.to_csv(index=False),
+        file_name="validation_report_batch.csv",
+        mime="text/csv"
+    )
+    
+    # Per-file details (not in expanders - the detail components use expanders themselves)
+    for entry in entries:
+        st.divider()
+        icon = {"passed": "✅", "failed": "❌"}.get(entry["status"], "⚠️")
+        st.markdown(f"### {icon} `{entry['file_name']}`")
+        if entry["error"]:
+            st.error(entry["error"])
+        if entry["results"] is not None:
+            product_line_label = entry["product_line"] or "No Product Line"
+            display_validation_summary(entry["results"], entry["customer"], product_line_label)
+            if validate_data_types_enabled:
+                display_data_type_validation(entry["type_results"], entry["customer"], product_line_label)
+                if entry.get("rule_results") is not None:
+                    display_rule_validation(entry["rule_results"], entry["customer"], product_line_label)
+                if entry.get("duplicate_results") is not None:
+                    display_duplicate_validation(entry["duplicate_results"], entry["customer"], product_line_label)
+                if entry.get("resubmission_results") is not None:
+                    display_resubmission_validation(
+                        entry["resubmission_results"], entry["customer"], product_line_label
+                    )
+                if entry.get("reference_results") is not None:
+                    display_reference_validation(entry["reference_results"], entry["customer"], product_line_label)
+
 def main():
     st.set_page_config(
         page_title="Column Validator",
         page_icon="📊",
         layout="wide"
     )
+    setup_logging()
     
     # Check authentication first
     check_authentication()
@@ -82,13 +234,42 @@ def main():
             st.rerun()
         
         st.markdown("### ⚙️ Validation Options")
+        validation_mode = st.radio(
+            "Validation Mode", options=["Single File", "Batch"], horizontal=True,
+            help="Batch mode validates many files (or a zip) at once and routes each file by its name"
+        )
         validate_data_types_enabled = st.checkbox("Enable Data Type Validation", value=True)
+        strict_mode = st.checkbox(
+            "Strict Mode (check every row)", value=False,
+            help="Check every value instead of a sample and report violation counts per column"
+        )
+        incremental = st.checkbox(
+            "Incremental Revalidation", value=False,
+            help="Re-check only rows that changed since the same file was last submitted (implies strict mode)"
+        )
         show_file_analysis = st.checkbox("Show Detailed File Analysis", value=False)
         show_data_summary = st.checkbox("Show Data Type Summary", value=False)
+        show_diagnostics = st.checkbox(
+            "Show Diagnostics", value=False,
+            help="Time each validation stage and trace its memory use (tracing slows validation down)"
+        )
+        compact_data = st.checkbox(
+            "Compact Data in Memory", value=True,
+            help="Store repeated text as categories and downcast numbers when no value changes"
+        )
+        record_keys = st.checkbox(
+            "Record Accepted Invoice Keys", value=True,
+            help="Add the invoice keys of files that pass to the index later files are checked against for "
+                 "resubmitted lines (needs data type validation)"
+        )
     
     st.title("📊 File Column Validator")
     st.markdown("Upload files to validate column matching and data types against predetermined configurations")
     
+    if validation_mode == "Batch":
+        display_batch_validation(validate_data_types_enabled, strict_mode, incremental, record_keys)
+        return
+    
     # Customer and Product Line Selection
     col1, col2 = st.columns(2)
     
@@ -101,23 +282,19 @@ def main():
     
     with col2:
         # For NVR and WW, no product line selection needed
-        if customer in ["NVR", "WW"]:
+        if not has_product_lines(customer):
             st.info(f"ℹ️ {customer} customer does not require product line selection")
             product_line = None
-            # Show expected file pattern
-            st.markdown(f"**Expected file pattern:** `Net_ASP*`")
         else:
-            product_lines = list(COLUMN_CONFIGS[customer].keys())
             product_line = st.selectbox(
                 "Select Product Line",
-                options=product_lines,
+                options=get_product_lines(customer),
                 index=0
             )
-            # Show expected file pattern
-            if product_line == "MASTIC":
-                st.markdown(f"**Expected file pattern:** `Net_ASP_MASTIC*`")
-            elif product_line == "VARIFORM":
-                st.markdown(f"**Expected file pattern:** `Net_ASP_VF*`")
+        # Show expected file pattern
+        plan = get_validation_plan(customer, product_line)
+        if plan.file_prefix:
+            st.markdown(f"**Expected file pattern:** `{plan.file_prefix}*`")
     
     # Show current configuration
     display_expected_configuration(customer, product_line)
@@ -142,101 +319,214 @@ def main():
         else:
             st.success(f"✅ File name pattern is correct: `{uploaded_file.name}`")
         
+        # Each stage is timed and logged, and shown in the diagnostics panel when enabled
+        profiler = PipelineProfiler(
+            "single_file", trace_memory=show_diagnostics, customer=customer, product_line=product_line
+        )
         try:
-            # Read file based on type
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                # Use 'DATA' sheet for NVR and WW, 'Working Copy' for others
-                if customer in ["NVR", "WW"]:
-                    df = pd.read_excel(uploaded_file, sheet_name='DATA')
-                else:
-                    df = pd.read_excel(uploaded_file, sheet_name='Working Copy')
+            product_line_label = product_line or "No Product Line"
             
-            # # Show detailed file analysis if enabled
-            # if show_file_analysis:
-            #     with st.expander("🔍 Detailed File Analysis"):
-            #         display_file_analysis(df)
+            # Parsed data and results are cached by file content, so widget
+            # interactions do not re-parse or re-validate the same upload
+            cache = get_upload_cache()
             
-            # # Show data type summary if enabled
-            # if show_data_summary:
-            #     with st.expander("📊 Data Type Summary"):
-            #         display_data_type_summary(df)
+            with profiler.stage("file_read") as stage:
+                file_hash = get_upload_hash(uploaded_file)
+                # The workbook is opened once per session and its handle reused across reruns
+                workbook = get_upload_workbook(uploaded_file, file_hash)
+                # Use 'DATA' sheet for NVR and WW, 'Working Copy' for others, falling back
+                # to a sheet with a similar name or with the expected header
+                sheet_name = workbook.select_sheet(plan.sheet_candidates, plan.essential)
+            if sheet_name is None:
+                st.warning(f"⚠️ No worksheet named '{plan.sheet_name}' or with the expected columns was found")
+                sheets = {sheet.name: sheet for sheet in workbook.sheets}
+                sheet_name = st.selectbox(
+                    "Select Sheet",
+                    options=list(sheets),
+                    format_func=lambda name: sheets[name].label
+                )
+                if sheet_name is None:
+                    return
+            elif workbook.is_workbook and sheet_name != plan.sheet_name:
+                st.info(f"ℹ️ Worksheet '{plan.sheet_name}' not found, using '{sheet_name}'")
             
-            # Show file preview
-            with st.expander("📄 File Preview"):
-                st.write(f"**File:** {uploaded_file.name}")
-                st.write(f"**Rows:** {len(df)}, **Columns:** {len(df.columns)}")
-                st.dataframe(df.head())
+            # Column checks only need the header row and data types are validated
+            # in streamed chunks - the full sheet is loaded only for the data type summary
+            with profiler.stage("header_check") as stage:
+                file_columns = cache.get_or_compute(
+                    ("header", file_hash, sheet_name),
+                    lambda: workbook.header(sheet_name)
+                )
+                preview_df = cache.get_or_compute(
+                    ("preview", file_hash, sheet_name),
+                    lambda: workbook.preview(sheet_name)
+                )
+                results = cache.get_or_compute(
+                    ("columns", file_hash, sheet_name, customer, product_line),
+                    lambda: validate_columns(file_columns, customer, product_line)
+                )
+                stage.columns = len(file_columns)
             
-            # Get column names
-            file_columns = df.columns.tolist()
-            
-            # Validate columns
-            if customer in ["NVR", "WW"]:
-                results = validate_columns(file_columns, customer, None)
-                display_validation_summary(results, customer, "No Product Line")
-                # Show detailed file analysis if enabled
-                if show_file_analysis:
-                    with st.expander("🔍 Detailed File Analysis"):
-                        display_file_analysis(df)
-                
-                # Data type validation if enabled
-                if validate_data_types_enabled:
-                    type_results = validate_data_types(df, customer)
-                    display_data_type_validation(type_results, customer, "No Product Line")
-                    # Show data type summary if enabled
-                    if show_data_summary:
-                        with st.expander("📊 Data Type Summary"):
-                            display_data_type_summary(df)
-                else:
-                    type_results = {"type_issues": [], "type_matches": [], "total_checked": 0}
+            with profiler.stage("rendering", step="column_results"):
+                # Show file preview
+                with st.expander("📄 File Preview"):
+                    st.write(f"**File:** {uploaded_file.name}")
+                    st.write(f"**Columns:** {len(file_columns)}")
+                    st.dataframe(preview_df)
                 
-                # Export results option
-                if st.button("📥 Export Validation Report"):
-                    report_df = create_export_report(results, type_results, customer, "N/A", uploaded_file.name)
-                    csv = report_df.to_csv(index=False)
-                    
-                    st.download_button(
-                        label="Download Report as CSV",
-                        data=csv,
-                        file_name=f"validation_report_{customer}_NoProductLine.csv",
-                        mime="text/csv"
-                    )
+                display_validation_summary(results, customer, product_line_label)
+            
+            # Compaction picks categorical columns from the plan, so the frame is cached per plan
+            frame_key = (file_hash, sheet_name) + ((customer, product_line) if compact_data else ())
+            
+            def load_frame():
+                return cache.get_or_compute(
+                    ("frame",) + frame_key,
+                    lambda: compact_frame(workbook.read(sheet_name), customer, product_line)
+                    if compact_data else (workbook.read(sheet_name), None)
+                )
+            
+            # Show detailed file analysis if enabled, on the full sheet when the summary loads it anyway
+            if show_file_analysis:
+                with st.expander("🔍 Detailed File Analysis"):
+                    if show_data_summary and validate_data_types_enabled:
+                        display_file_analysis(load_frame()[0])
+                    else:
+                        display_file_analysis(preview_df, preview=True)
+            
+            def validate_chunks(validator, **options):
+                # Row rules, duplicates, resubmitted lines and reference codes are checked on the same read
+                # of the file as the data types
+                duplicates = DuplicateChecker(customer, product_line)
+                references = ReferenceChecker(customer, product_line)
+                chunks = references.watch(duplicates.watch(workbook.iter_chunks(sheet_name)))
+                type_results, rule_results = validate_with_row_rules(
+                    validator, chunks, customer, product_line, format_store=DateFormatStore(), **options
+                )
+                return (
+                    type_results, rule_results, duplicates.results(),
+                    check_resubmitted(duplicates, plan, uploaded_file.name), references.results(),
+                    duplicates.key_hashes()[0]
+                )
+            
+            def check_keys(df):
+                duplicates = DuplicateChecker(customer, product_line)
+                duplicates.fold(df)
+                return (
+                    duplicates.results(), check_resubmitted(duplicates, plan, uploaded_file.name),
+                    duplicates.key_hashes()[0]
+                )
+            
+            # Data type validation if enabled
+            if validate_data_types_enabled:
+                profile = None
+                # Cached results are keyed by the master list versions, so an updated list is checked again
+                references_key = reference_versions(customer, product_line)
+                with profiler.stage("type_check", strict=strict_mode or incremental) as stage:
+                    if incremental:
+                        # Cached like the other results, so reruns do not overwrite the stored row verdicts
+                        (
+                            type_results, rule_results, duplicate_results, resubmission_results, reference_results,
+                            key_hashes
+                        ) = cache.get_or_compute(
+                            ("types", file_hash, sheet_name, customer, product_line, "incremental", uploaded_file.name,
+                             references_key),
+                            lambda: validate_chunks(validate_data_types_incremental, file_name=uploaded_file.name)
+                        )
+                    elif show_data_summary:
+                        # The summary loads the whole sheet anyway, so one profiling pass
+                        # checks the types and feeds the summary table
+                        df, compaction = load_frame()
+                        profile = cache.get_or_compute(
+                            ("profile",) + frame_key + (customer, product_line, strict_mode),
+                            lambda: profile_columns(
+                                df, plan.column_types, strict=strict_mode, customer=customer,
+                                format_store=DateFormatStore()
+                            )
+                        )
+                        type_results = validate_data_types(
+                            df, customer, product_line, strict=strict_mode, profile=profile
+                        )
+                        rule_results = cache.get_or_compute(
+                            ("rules",) + frame_key + (customer, product_line),
+                            lambda: validate_row_rules([df], customer, product_line)
+                        )
+                        duplicate_results, resubmission_results, key_hashes = cache.get_or_compute(
+                            ("duplicates",) + frame_key + (customer, product_line, uploaded_file.name),
+                            lambda: check_keys(df)
+                        )
+                        reference_results = cache.get_or_compute(
+                            ("references",) + frame_key + (customer, product_line, references_key),
+                            lambda: validate_references([df], customer, product_line)
+                        )
+                    else:
+                        (
+                            type_results, rule_results, duplicate_results, resubmission_results, reference_results,
+                            key_hashes
+                        ) = cache.get_or_compute(
+                            ("types", file_hash, sheet_name, customer, product_line, strict_mode, uploaded_file.name,
+                             references_key),
+                            lambda: validate_chunks(validate_data_types_chunked, strict=strict_mode)
+                        )
+                    stage.rows = type_results["total_rows"]
+                    stage.columns = type_results["total_checked"]
+                with profiler.stage("rendering", step="type_results"):
+                    display_data_type_validation(type_results, customer, product_line_label)
+                    display_rule_validation(rule_results, customer, product_line_label)
+                    display_duplicate_validation(duplicate_results, customer, product_line_label)
+                    display_resubmission_validation(resubmission_results, customer, product_line_label)
+                    display_reference_validation(reference_results, customer, product_line_label)
+                has_keys = duplicate_results["key"] and not duplicate_results["missing_columns"]
+                accepted = passes_checks(
+                    results, type_results, rule_results, duplicate_results, resubmission_results, reference_results
+                )
+                if record_keys and accepted and has_keys:
+                    # Recorded once per upload, like the batch and API record the files that pass
+                    try:
+                        cache.get_or_compute(
+                            ("recorded", file_hash, sheet_name, customer, product_line, uploaded_file.name),
+                            lambda: InvoiceKeyIndex().add(plan, uploaded_file.name, key_hashes)
+                        )
+                        st.caption(f"🗂️ Invoice keys of `{uploaded_file.name}` recorded for resubmission checks")
+                    except OSError as e:
+                        st.warning(f"⚠️ Invoice keys not recorded: {e}")
+                # Show data type summary if enabled
+                if show_data_summary:
+                    with st.expander("📊 Data Type Summary"):
+                        with profiler.stage("summary") as stage:
+                            df, compaction = load_frame()
+                            if profile is None:
+                                profile = cache.get_or_compute(
+                                    ("profile",) + frame_key, lambda: profile_columns(df)
+                                )
+                            summary = get_data_type_summary(df, profile)
+                            stage.rows, stage.columns = df.shape
+                        with profiler.stage("rendering", step="summary"):
+                            display_data_type_summary(df, summary, compaction)
             else:
-                # Regular customers with product lines
-                results = validate_columns(file_columns, customer, product_line)
-                display_validation_summary(results, customer, product_line)
-                # Show detailed file analysis if enabled
-                if show_file_analysis:
-                    with st.expander("🔍 Detailed File Analysis"):
-                        display_file_analysis(df)
-                
-                # Data type validation if enabled
-                if validate_data_types_enabled:
-                    type_results = validate_data_types(df, customer, product_line)
-                    display_data_type_validation(type_results, customer, product_line)
-                    # Show data type summary if enabled
-                    if show_data_summary:
-                        with st.expander("📊 Data Type Summary"):
-                            display_data_type_summary(df)
-                else:
-                    type_results = {"type_issues": [], "type_matches": [], "total_checked": 0}
+                type_results = {"type_issues": [], "type_matches": [], "total_checked": 0}
+                rule_results = duplicate_results = resubmission_results = reference_results = None
+            
+            # Export results option
+            if st.button("📥 Export Validation Report"):
+                report_df = create_export_report(
+                    results, type_results, customer, product_line or "N/A", uploaded_file.name,
+                    rule_results, duplicate_results, resubmission_results, reference_results
+                )
+                csv = report_df.to_csv(index=False)
                 
-                # Export results option
-                if st.button("📥 Export Validation Report"):
-                    report_df = create_export_report(results, type_results, customer, product_line, uploaded_file.name)
-                    csv = report_df.to_csv(index=False)
-                    
-                    st.download_button(
-                        label="Download Report as CSV",
-                        data=csv,
-                        file_name=f"validation_report_{customer}_{product_line}.csv",
-                        mime="text/csv"
-                    )
+                st.download_button(
+                    label="Download Report as CSV",
+                    data=csv,
+                    file_name=f"validation_report_{customer}_{product_line or 'NoProductLine'}.csv",
+                    mime="text/csv"
+                )
                 
         except Exception as e:
             st.error(f"Error reading file: {str(e)}")
+        
+        if show_diagnostics:
+            display_diagnostics(profiler)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,90 @@
+"""
+Memory compaction for loaded DataFrames
+Low-cardinality string columns become categoricals and numerics are downcast when lossless
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+from config import get_validation_plan
+
+# A "string" column is categorized when its distinct values are at most this share of its non-null values
+MAX_CATEGORY_RATIO = 0.5
+
+def compact_frame(df: pd.DataFrame, customer: str, product_line: str = None) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Shrink a DataFrame in memory without changing its values
+
+    Columns configured as "string" with few distinct values (Region, State, Type, ...)
+    become categoricals, integer columns are downcast to the smallest integer type
+    and float64 columns become float32 when every value survives the round trip.
+    Validation and the data type summary give the same results on the compact frame.
+
+    Args:
+        df: DataFrame to compact (not modified)
+        customer: Selected customer
+        product_line: Selected product line (None for NVR/WW)
+
+    Returns:
+        Tuple of (compact DataFrame, report with memory before/after and the converted columns)
+    """
+    column_types = get_validation_plan(customer, product_line).column_types
+    bytes_before = int(df.memory_usage(deep=True).sum())
+    compact = {}
+    conversions = []
+
+    for col in df.columns:
+        series = df[col]
+        if column_types.get(col) == "string":
+            converted = _categorize(series)
+        else:
+            converted = _downcast(series)
+
+        if converted is not series:
+            conversions.append({"column": col, "from": str(series.dtype), "to": str(converted.dtype)})
+        compact[col] = converted
+
+    compact_df = pd.DataFrame(compact, index=df.index)
+    bytes_after = int(compact_df.memory_usage(deep=True).sum())
+
+    return compact_df, {
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "saved_percentage": round((1 - bytes_after / max(bytes_before, 1)) * 100, 1),
+        "conversions": conversions
+    }
+
+def format_bytes(size: int) -> str:
+    """Format a byte count for display, e.g. '1.2 GB'"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def _categorize(series: pd.Series) -> pd.Series:
+    """Convert a text column to a categorical if it has few distinct values"""
+    if series.dtype.kind not in ("O", "U") or isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    non_null = series.count()
+    if non_null == 0 or series.nunique() > non_null * MAX_CATEGORY_RATIO:
+        return series
+    return series.astype("category")
+
+def _downcast(series: pd.Series) -> pd.Series:
+    """Downcast a NumPy numeric column when no value changes"""
+    dtype = series.dtype
+    if not isinstance(dtype, np.dtype):
+        # Nullable and Arrow dtypes are already compact enough
+        return series
+    if dtype.kind in ("i", "u"):
+        converted = pd.to_numeric(series, downcast="integer" if dtype.kind == "i" else "unsigned")
+        return converted if converted.dtype != dtype else series
+    if dtype == np.float64:
+        values = series.to_numpy()
+        narrowed = values.astype(np.float32)
+        if np.array_equal(narrowed.astype(np.float64), values, equal_nan=True):
+            return pd.Series(narrowed, index=series.index, name=series.name)
+    return series
+
+def summarize_conversions(report: Dict) -> List[str]:
+    """Describe each converted column, e.g. 'Region: object → category'"""
+    return [f"{c['column']}: {c['from']} → {c['to']}" for c in report["conversions"]]
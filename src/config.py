@@ -1,7 +1,9 @@
 """
 Column configurations and data type definitions for all customers
 """
-from typing import Dict, List, Any
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Optional, Tuple, Any
 
 # Data type mappings
 DATA_TYPES = {
@@ -13,6 +15,11 @@ DATA_TYPES = {
 }
 
 # Column configurations with data types
+# Each configuration can also list row rules every row must satisfy: a typed column compared
+# ("<", "<=", ">", ">=", "==", "!=") with another typed column ("other") or a constant ("value").
+# Rows where either side is empty or not of its type are left to the data type validation.
+# "duplicate_key" lists the columns identifying one rebate line; rows repeating a key are reported as duplicates.
+# "references" maps code columns to the REFERENCE_TABLES master list their values must appear in.
 COLUMN_CONFIGS = {
     "ABC": {
         "MASTIC": {
@@ -62,7 +69,39 @@ COLUMN_CONFIGS = {
                 "Total Amount Requested": "float",
                 "Invoice Comments": "string",
                 "Month Submitted": "string"
-            }
+            },
+            "duplicate_key": ["Customer Invoice #", "Item", "Tran Date"],
+            "references": {
+                "Branch": "abc_branches",
+                "Ship-to Number": "abc_ship_tos",
+                "Item": "abc_items"
+            },
+            "rules": [
+                {
+                    "name": "Start Date on or before End Date",
+                    "column": "Start Date",
+                    "operator": "<=",
+                    "other": "End Date"
+                },
+                {
+                    "name": "Deviation dates in order",
+                    "column": "Deviation Begin Date",
+                    "operator": "<=",
+                    "other": "Deviation End Date"
+                },
+                {
+                    "name": "Net Price at most Invoice Price",
+                    "column": "Net Price",
+                    "operator": "<=",
+                    "other": "Invoice Price"
+                },
+                {
+                    "name": "Qty Sold is positive",
+                    "column": "Qty Sold",
+                    "operator": ">",
+                    "value": 0
+                }
+            ]
         },
         "VARIFORM": {
             "essential": {
@@ -108,7 +147,26 @@ COLUMN_CONFIGS = {
                 "Credit Year": "integer",
                 "Reference Delivery Instructions #1": "string",
                 "Month Submitted": "string"
-            }
+            },
+            "duplicate_key": ["Customer Invoice #", "Item", "Tran Date"],
+            "references": {
+                "Branch": "abc_branches",
+                "Item": "abc_items"
+            },
+            "rules": [
+                {
+                    "name": "Start Date on or before End Date",
+                    "column": "Start Date",
+                    "operator": "<=",
+                    "other": "End Date"
+                },
+                {
+                    "name": "Qty Sold is positive",
+                    "column": "Qty Sold",
+                    "operator": ">",
+                    "value": 0
+                }
+            ]
         }
     },
     "SRS": {
@@ -148,7 +206,27 @@ COLUMN_CONFIGS = {
                 "Converted QTY": "float",
                 "Revised Rebate Due": "float",
                 "Revised Total Rebate": "float"
-            }
+            },
+            "duplicate_key": ["Invoice", "Item Code", "Invoice Date"],
+            "references": {
+                "Branch ID": "srs_branches",
+                "Ship To #": "srs_ship_tos",
+                "Item Code": "srs_items"
+            },
+            "rules": [
+                {
+                    "name": "Net Price at most Invoice Price",
+                    "column": "Net Price",
+                    "operator": "<=",
+                    "other": "Invoice Price"
+                },
+                {
+                    "name": "Ship Qty is positive",
+                    "column": "Ship Qty",
+                    "operator": ">",
+                    "value": 0
+                }
+            ]
         },
         "VARIFORM": {
             "essential": {
@@ -183,7 +261,21 @@ COLUMN_CONFIGS = {
                 "Vlookup": "string",
                 "Difference": "float",
                 "Revised Total Rebate Due": "float"
-            }
+            },
+            "duplicate_key": ["Invoice", "Item Code", "Invoice Date"],
+            "references": {
+                "Branch ID": "srs_branches",
+                "Ship To #": "srs_ship_tos",
+                "Item Code": "srs_items"
+            },
+            "rules": [
+                {
+                    "name": "Ship Qty is positive",
+                    "column": "Ship Qty",
+                    "operator": ">",
+                    "value": 0
+                }
+            ]
         }
     },
     "QXO": {
@@ -216,7 +308,20 @@ COLUMN_CONFIGS = {
                 "Carton Quantity": "float",
                 "Rebate Amount": "float",
                 "Total Rebate": "float"
-            }
+            },
+            "duplicate_key": ["Invoice Number", "Customer Item Number", "Invoice Date"],
+            "references": {
+                "Branch": "qxo_branches",
+                "Customer Item Number": "qxo_items"
+            },
+            "rules": [
+                {
+                    "name": "Quantity Purchased is positive",
+                    "column": "Quantity Purchased",
+                    "operator": ">",
+                    "value": 0
+                }
+            ]
         },
         "VARIFORM": {
             "essential": {
@@ -249,7 +354,26 @@ COLUMN_CONFIGS = {
                 "Carton Quantity": "float",
                 "Difference": "float",
                 "Total Rebate": "float"
-            }
+            },
+            "duplicate_key": ["Invoice Number", "Customer Item Number", "Invoice Date"],
+            "references": {
+                "Branch": "qxo_branches",
+                "Customer Item Number": "qxo_items"
+            },
+            "rules": [
+                {
+                    "name": "Net Price at most Invoice Price",
+                    "column": "Net Price",
+                    "operator": "<=",
+                    "other": "Invoice Price"
+                },
+                {
+                    "name": "Quantity Purchased is positive",
+                    "column": "Quantity Purchased",
+                    "operator": ">",
+                    "value": 0
+                }
+            ]
         }
     },
     "NVR": {
@@ -295,7 +419,25 @@ COLUMN_CONFIGS = {
             "Total Branch Cost": "float",
             "NVR Cost per Piece": "float",
             "Total NVR Cost": "float"
-        }
+        },
+        "duplicate_key": ["Distributor Invoice Number", "Distributor Item Number", "Distributor Invoice Date"],
+        "references": {
+            "Ply Gem Ship-To Number": "ply_gem_ship_tos"
+        },
+        "rules": [
+            {
+                "name": "Invoice dated on or before rebate processing",
+                "column": "Distributor Invoice Date",
+                "operator": "<=",
+                "other": "Date Rebate Processed"
+            },
+            {
+                "name": "Reported Qty is positive",
+                "column": "Reported Qty",
+                "operator": ">",
+                "value": 0
+            }
+        ]
     },
     "WW": {
         "essential": {
@@ -339,30 +481,231 @@ COLUMN_CONFIGS = {
             "Total Distributor Cost for Window World Sales": "float",
             "Window World Cost per Unit": "float",
             "Total Window World Cost": "float"
-        }
+        },
+        "duplicate_key": ["Distributor Invoice Number", "Distributor Item Number", "Distributor Invoice Date"],
+        "references": {
+            "Ply Gem Ship To Number": "ply_gem_ship_tos"
+        },
+        "rules": [
+            {
+                "name": "Invoice dated on or before rebate processing",
+                "column": "Distributor Invoice Date",
+                "operator": "<=",
+                "other": "Date Rebate Processed"
+            },
+            {
+                "name": "Reported Qty is positive",
+                "column": "Reported Qty",
+                "operator": ">",
+                "value": 0
+            }
+        ]
     }
 }
 
+# Customers whose configuration has no product line level
+CUSTOMERS_WITHOUT_PRODUCT_LINE = ("NVR", "WW")
+
+# Worksheet holding the data for each customer (Excel uploads only)
+SHEET_NAMES = {
+    "NVR": "DATA",
+    "WW": "DATA"
+}
+DEFAULT_SHEET_NAME = "Working Copy"
+
+# Other worksheet names accepted per customer when the expected one is missing, tried in order.
+# Names are compared ignoring case, spacing and punctuation ('Working copy' finds 'Working Copy'),
+# and workbooks matching none of them fall back to header fingerprinting.
+SHEET_NAME_ALTERNATIVES: Dict[str, Tuple[str, ...]] = {}
+DEFAULT_SHEET_NAME_ALTERNATIVES = ("Sheet1",)
+
+# Required file name prefix (case sensitive) per product line; customers without product lines use the default
+FILE_PREFIXES = {
+    "MASTIC": "Net_ASP_MASTIC",
+    "VARIFORM": "Net_ASP_VF"
+}
+DEFAULT_FILE_PREFIX = "Net_ASP"
+
+# Master lists the "references" columns are checked against: the file under REFERENCE_DATA_DIR
+# (a local directory or s3://bucket/prefix, .csv or .parquet) and the column holding the codes
+REFERENCE_TABLES = {
+    "abc_branches": {"file": "abc_branches.csv", "column": "Branch"},
+    "abc_ship_tos": {"file": "abc_ship_tos.csv", "column": "Ship-to Number"},
+    "abc_items": {"file": "abc_items.csv", "column": "Item"},
+    "srs_branches": {"file": "srs_branches.csv", "column": "Branch ID"},
+    "srs_ship_tos": {"file": "srs_ship_tos.csv", "column": "Ship To #"},
+    "srs_items": {"file": "srs_items.csv", "column": "Item Code"},
+    "qxo_branches": {"file": "qxo_branches.csv", "column": "Branch"},
+    "qxo_items": {"file": "qxo_items.csv", "column": "Item Number"},
+    "ply_gem_ship_tos": {"file": "ply_gem_ship_tos.csv", "column": "Ship-To Number"}
+}
+
+# Comparison operators allowed in row rules and the column types they can compare
+RULE_OPERATORS = ("<", "<=", ">", ">=", "==", "!=")
+RULE_COLUMN_TYPES = ("date", "float", "integer")
+
+@dataclass(frozen=True)
+class RowRule:
+    """
+    One cross-column business rule, e.g. 'Start Date' <= 'End Date' or 'Qty Sold' > 0
+    
+    `other` names the column compared with; rules against a constant set `value` instead.
+    """
+    name: str
+    column: str
+    operator: str
+    other: Optional[str] = None
+    value: Any = None
+    
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Columns the rule reads"""
+        return (self.column,) if self.other is None else (self.column, self.other)
+    
+    @property
+    def expression(self) -> str:
+        """Readable form of the rule, e.g. 'Start Date' <= 'End Date'"""
+        right = repr(self.other) if self.other is not None else repr(self.value)
+        return f"{self.column!r} {self.operator} {right}"
+
+@dataclass(frozen=True, eq=False)
+class ValidationPlan:
+    """
+    Precompiled, immutable view of one customer / product line configuration
+    
+    Built once at import so validators and UI components do not rebuild
+    column lists, sets and type lookups on every Streamlit rerun.
+    """
+    customer: str
+    product_line: Optional[str]
+    essential: Tuple[str, ...]
+    other: Tuple[str, ...]
+    essential_set: FrozenSet[str]
+    other_set: FrozenSet[str]
+    all_columns: FrozenSet[str]
+    column_types: Mapping[str, str]
+    file_prefix: Optional[str]
+    file_prefix_scope: str
+    sheet_name: str
+    sheet_candidates: Tuple[str, ...]
+    rules: Tuple[RowRule, ...] = ()
+    duplicate_key: Tuple[str, ...] = ()
+    references: Mapping[str, str] = field(default_factory=lambda: MappingProxyType({}))
+    
+    @property
+    def label(self) -> str:
+        """Display name, e.g. 'ABC - MASTIC' or 'NVR'"""
+        return f"{self.customer} - {self.product_line}" if self.product_line else self.customer
+
+def _compile_plan(customer: str, product_line: Optional[str], config: Dict[str, Any]) -> ValidationPlan:
+    """Compile one COLUMN_CONFIGS entry into a ValidationPlan"""
+    essential = tuple(config["essential"])
+    other = tuple(config["other"])
+    column_types = {**config["essential"], **config["other"]}
+    
+    if product_line is None:
+        file_prefix, file_prefix_scope = DEFAULT_FILE_PREFIX, f"{customer} customer"
+    else:
+        file_prefix, file_prefix_scope = FILE_PREFIXES.get(product_line), f"{product_line} product line"
+    
+    return ValidationPlan(
+        customer=customer,
+        product_line=product_line,
+        essential=essential,
+        other=other,
+        essential_set=frozenset(essential),
+        other_set=frozenset(other),
+        all_columns=frozenset(essential) | frozenset(other),
+        column_types=MappingProxyType(column_types),
+        file_prefix=file_prefix,
+        file_prefix_scope=file_prefix_scope,
+        sheet_name=SHEET_NAMES.get(customer, DEFAULT_SHEET_NAME),
+        sheet_candidates=(SHEET_NAMES.get(customer, DEFAULT_SHEET_NAME),)
+        + SHEET_NAME_ALTERNATIVES.get(customer, DEFAULT_SHEET_NAME_ALTERNATIVES),
+        rules=tuple(_compile_rule(rule, column_types, customer, product_line) for rule in config.get("rules", ())),
+        duplicate_key=_compile_duplicate_key(config.get("duplicate_key", ()), column_types, customer, product_line),
+        references=_compile_references(config.get("references", {}), column_types, customer, product_line)
+    )
+
+def _compile_rule(rule: Dict[str, Any], column_types: Dict[str, str], customer: str,
+                  product_line: Optional[str]) -> RowRule:
+    """Check one configured row rule against the configuration's columns (fails at import when misconfigured)"""
+    compiled = RowRule(
+        name=rule["name"],
+        column=rule["column"],
+        operator=rule["operator"],
+        other=rule.get("other"),
+        value=rule.get("value")
+    )
+    label = f"{customer} - {product_line}" if product_line else customer
+    if compiled.operator not in RULE_OPERATORS:
+        raise ValueError(f"Rule {compiled.name!r} of {label} has an unknown operator {compiled.operator!r}")
+    if (compiled.other is None) == (compiled.value is None):
+        raise ValueError(f"Rule {compiled.name!r} of {label} needs exactly one of 'other' and 'value'")
+    for col in compiled.columns:
+        if column_types.get(col) not in RULE_COLUMN_TYPES:
+            raise ValueError(f"Rule {compiled.name!r} of {label} compares {col!r}, which is not a configured "
+                             f"{', '.join(RULE_COLUMN_TYPES)} column")
+    is_date = [column_types[col] == "date" for col in compiled.columns]
+    if len(set(is_date)) > 1:
+        raise ValueError(f"Rule {compiled.name!r} of {label} compares a date with a number")
+    return compiled
+
+def _compile_duplicate_key(key: List[str], column_types: Dict[str, str], customer: str,
+                           product_line: Optional[str]) -> Tuple[str, ...]:
+    """Check a configured duplicate key against the configuration's columns (fails at import when misconfigured)"""
+    label = f"{customer} - {product_line}" if product_line else customer
+    unknown = [col for col in key if col not in column_types]
+    if unknown:
+        raise ValueError(f"Duplicate key of {label} names unconfigured columns {unknown}")
+    return tuple(key)
+
+def _compile_references(references: Dict[str, str], column_types: Dict[str, str], customer: str,
+                        product_line: Optional[str]) -> Mapping[str, str]:
+    """Check configured reference columns against the configuration's columns and REFERENCE_TABLES"""
+    label = f"{customer} - {product_line}" if product_line else customer
+    for col, table in references.items():
+        if col not in column_types:
+            raise ValueError(f"Reference check of {label} names an unconfigured column {col!r}")
+        if table not in REFERENCE_TABLES:
+            raise ValueError(f"Reference check of {label} for {col!r} names an unknown master list {table!r}")
+    return MappingProxyType(dict(references))
+
+def _compile_plans() -> Dict[Tuple[str, Optional[str]], ValidationPlan]:
+    """Compile every customer / product line in COLUMN_CONFIGS"""
+    plans = {}
+    for customer, customer_config in COLUMN_CONFIGS.items():
+        if customer in CUSTOMERS_WITHOUT_PRODUCT_LINE:
+            plans[(customer, None)] = _compile_plan(customer, None, customer_config)
+        else:
+            for product_line, config in customer_config.items():
+                plans[(customer, product_line)] = _compile_plan(customer, product_line, config)
+    return plans
+
+VALIDATION_PLANS = MappingProxyType(_compile_plans())
+
+def has_product_lines(customer: str) -> bool:
+    """Check if a customer's configuration is split by product line"""
+    return customer not in CUSTOMERS_WITHOUT_PRODUCT_LINE
+
+def get_product_lines(customer: str) -> List[str]:
+    """Get the configured product lines of a customer (empty for NVR/WW)"""
+    return [product_line for (name, product_line) in VALIDATION_PLANS if name == customer and product_line]
+
+def get_validation_plan(customer: str, product_line: str = None) -> ValidationPlan:
+    """Get the precompiled validation plan (product_line is ignored for NVR/WW)"""
+    if not has_product_lines(customer):
+        product_line = None
+    return VALIDATION_PLANS[(customer, product_line)]
+
 def get_column_names(customer: str, product_line: str = None) -> Dict[str, List[str]]:
     """Get column names (without data types) for backward compatibility"""
-    if customer in ["NVR", "WW"]:
-        config = COLUMN_CONFIGS[customer]
-        return {
-            "essential": list(config["essential"].keys()),
-            "other": list(config["other"].keys())
-        }
-    else:
-        config = COLUMN_CONFIGS[customer][product_line]
-        return {
-            "essential": list(config["essential"].keys()),
-            "other": list(config["other"].keys())
-        }
+    plan = get_validation_plan(customer, product_line)
+    return {
+        "essential": list(plan.essential),
+        "other": list(plan.other)
+    }
 
 def get_expected_data_types(customer: str, product_line: str = None) -> Dict[str, str]:
     """Get expected data types for all columns"""
-    if customer in ["NVR", "WW"]:
-        config = COLUMN_CONFIGS[customer]
-        return {**config["essential"], **config["other"]}
-    else:
-        config = COLUMN_CONFIGS[customer][product_line]
-        return {**config["essential"], **config["other"]}
+    return dict(get_validation_plan(customer, product_line).column_types)
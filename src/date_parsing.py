@@ -0,0 +1,253 @@
+"""
+Date format inference and vectorized date parsing
+Learns one format per column from a sample, parses the full column with it and
+converts Excel serial dates
+"""
+import datetime
+import json
+import os
+import warnings
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Candidates tried by infer_date_format, most common first (month-first wins ambiguous samples)
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%m/%d/%Y",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %I:%M:%S %p",
+    "%m/%d/%y",
+    "%d/%m/%Y",
+    "%d/%m/%y",
+    "%Y/%m/%d",
+    "%m-%d-%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%Y%m%d",
+    "%d-%b-%Y",
+    "%d-%b-%y",
+    "%d %b %Y",
+    "%b %d, %Y",
+    "%B %d, %Y",
+)
+_TEXT_KINDS = ("O", "S", "U")
+# Text values sampled from the top of a column to pick its format
+FORMAT_SAMPLE_SIZE = 200
+# Share of the sample a format has to parse to be used for the whole column
+MIN_FORMAT_SHARE = 0.8
+# Values at the top of a column checked for repeats before parsing distinct values only
+DISTINCT_CHECK_SIZE = 10_000
+
+# Excel stores dates as days since 1899-12-30 (the offset absorbs its 1900 leap year bug)
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+# Numbers outside 1900-03-01..2099-12-31 are not taken for Excel dates (e.g. quantities or IDs)
+EXCEL_SERIAL_MIN = 61
+EXCEL_SERIAL_MAX = 73050
+
+# Override with the DATE_FORMAT_FILE environment variable (e.g. a shared volume for the API workers)
+DEFAULT_DATE_FORMAT_FILE = Path(__file__).resolve().parent.parent / "data" / "date_formats.json"
+
+def infer_date_format(series: pd.Series, preferred: str = None,
+                      candidates: Sequence[str] = DATE_FORMATS) -> Optional[str]:
+    """
+    Pick the format that parses the text values at the top of a column
+
+    Args:
+        series: Column (or chunk of a column) to sample
+        preferred: Format learned earlier (previous chunk or file), kept while it still fits
+        candidates: Formats to try, in order of preference
+
+    Returns:
+        The format parsing the most sampled values (at least MIN_FORMAT_SHARE of them),
+        `preferred` if the column has no text values to judge by, or None if no format fits
+    """
+    sample = _text_sample(series, FORMAT_SAMPLE_SIZE)
+    if len(sample) == 0:
+        return preferred
+
+    if preferred is not None and _parsed_share(sample, preferred) >= MIN_FORMAT_SHARE:
+        return preferred
+
+    best_format, best_share = None, 0.0
+    for date_format in candidates:
+        if date_format == preferred:
+            continue
+        share = _parsed_share(sample, date_format)
+        if share > best_share:
+            best_format, best_share = date_format, share
+            if share == 1.0:
+                break
+    return best_format if best_share >= MIN_FORMAT_SHARE else None
+
+def parse_dates(series: pd.Series, date_format: str = None) -> pd.Series:
+    """
+    Parse a column into datetimes, NaT where a value is not a date
+
+    Text is parsed in one vectorized pass with `date_format` (or the format pandas guesses
+    from the first value). Leftovers that are numbers are read as Excel serial dates, and
+    only what is still unparsed (e.g. a second date layout) is parsed value by value.
+    Numbers are read as Excel serial dates, never as nanoseconds since 1970.
+
+    Args:
+        series: Column to parse
+        date_format: strptime format of the column's text values (see infer_date_format)
+
+    Returns:
+        datetime64[ns] Series with the index of `series`
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Each category is parsed once
+        parsed = parse_dates(pd.Series(dtype.categories), date_format).to_numpy()
+        return pd.Series(_take(parsed, series.cat.codes.to_numpy()), index=series.index)
+    if dtype.kind == "M":
+        return _to_naive(series)
+    if dtype.kind in "iuf":
+        return excel_serial_to_datetime(series)
+    if dtype.kind not in _TEXT_KINDS:
+        return pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+
+    head = series.iloc[:DISTINCT_CHECK_SIZE]
+    if head.nunique() > len(head) * 0.5:
+        # Mostly distinct values (e.g. timestamps) are not worth deduplicating
+        return pd.Series(_parse_values(series, date_format), index=series.index)
+    # Files repeat the same dates on many rows, so each distinct value is parsed once
+    codes, uniques = pd.factorize(series)
+    parsed = _parse_values(pd.Series(uniques), date_format)
+    return pd.Series(_take(parsed, codes), index=series.index)
+
+def excel_serial_to_datetime(series: pd.Series) -> pd.Series:
+    """
+    Convert Excel serial dates (days since 1899-12-30, fractions are times of day) to datetimes
+
+    Values outside EXCEL_SERIAL_MIN..EXCEL_SERIAL_MAX become NaT. Times are rounded to the second.
+    """
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    in_range = (values >= EXCEL_SERIAL_MIN) & (values <= EXCEL_SERIAL_MAX)
+    seconds = np.round(np.where(in_range, values, 0) * 86_400).astype("int64")
+    parsed = EXCEL_EPOCH.to_datetime64() + seconds.astype("timedelta64[s]")
+    parsed = np.where(in_range, parsed.astype("datetime64[ns]"), np.datetime64("NaT", "ns"))
+    return pd.Series(parsed, index=series.index, dtype="datetime64[ns]")
+
+class DateFormatStore:
+    """
+    Learned date formats on disk, one JSON file mapping customer -> column -> format
+
+    Later files of a customer start from the stored format of each column instead of
+    trying every candidate.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = Path(path or os.getenv("DATE_FORMAT_FILE") or DEFAULT_DATE_FORMAT_FILE)
+
+    def formats(self, customer: str) -> Dict[str, str]:
+        """Get the stored formats of a customer's columns (empty if none or the file cannot be read)"""
+        return dict(self._read().get(customer, {}))
+
+    def update(self, customer: str, formats: Dict[str, str]):
+        """Store newly learned formats of a customer's columns (the file is only rewritten on changes)"""
+        stored = self._read()
+        customer_formats = stored.setdefault(customer, {})
+        learned = {col: fmt for col, fmt in formats.items() if fmt and customer_formats.get(col) != fmt}
+        if not learned:
+            return
+        customer_formats.update(learned)
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.parent / f"{self.path.name}.{os.getpid()}.tmp"
+            tmp_path.write_text(json.dumps(stored, indent=2, sort_keys=True))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # The formats are only a shortcut, so a read-only location must not fail validation
+            pass
+
+    def _read(self) -> Dict[str, Dict[str, str]]:
+        try:
+            stored = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        return stored if isinstance(stored, dict) else {}
+
+def _text_sample(series: pd.Series, n: int) -> pd.Series:
+    """Get up to n text values from the top of a column without scanning all of it"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if dtype.kind not in _TEXT_KINDS:
+        return series.iloc[:0]
+    head = series.iloc[:n * 10].dropna()
+    return head[head.map(lambda value: isinstance(value, str))].head(n)
+
+def _parse_values(values: pd.Series, date_format: str = None) -> np.ndarray:
+    """Parse the values of a text or mixed column"""
+    if pd.api.types.infer_dtype(values, skipna=True) in ("string", "empty"):
+        return _parse_text(values, date_format)
+
+    # Mixed columns (e.g. Excel date cells next to text and numbers) are split by value type
+    value_kinds = values.map(_value_kind).to_numpy()
+    parsed = np.full(len(values), np.datetime64("NaT", "ns"))
+    text = value_kinds == "text"
+    if text.any():
+        parsed[text] = _parse_text(values[text], date_format)
+    dates = value_kinds == "date"
+    if dates.any():
+        parsed[dates] = _to_naive(pd.to_datetime(values[dates], errors="coerce")).to_numpy()
+    numbers = value_kinds == "number"
+    if numbers.any():
+        parsed[numbers] = excel_serial_to_datetime(pd.to_numeric(values[numbers], errors="coerce")).to_numpy()
+    return parsed
+
+def _take(parsed: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Spread the parsed distinct values over the rows (code -1 marks nulls)"""
+    return np.append(parsed, np.datetime64("NaT", "ns"))[codes]
+
+def _parse_text(series: pd.Series, date_format: str = None) -> np.ndarray:
+    """Parse text values with one format, then as Excel serials, then value by value"""
+    with warnings.catch_warnings():
+        # pandas warns when it cannot infer a format and falls back to per-element parsing,
+        # and when values carry different UTC offsets (handled by _to_naive)
+        warnings.simplefilter("ignore", UserWarning)
+        warnings.simplefilter("ignore", FutureWarning)
+        parsed = _to_naive(pd.to_datetime(series, format=date_format, errors="coerce")).to_numpy()
+        unparsed = np.isnat(parsed) & series.notna().to_numpy()
+        if unparsed.any():
+            serials = excel_serial_to_datetime(pd.to_numeric(series[unparsed], errors="coerce"))
+            parsed[unparsed] = serials.to_numpy()
+            unparsed &= np.isnat(parsed)
+        if unparsed.any():
+            retry = pd.to_datetime(series[unparsed], errors="coerce", format="mixed")
+            parsed[unparsed] = _to_naive(retry).to_numpy()
+    return parsed
+
+def _value_kind(value) -> str:
+    """Classify one value of a mixed column for parse_dates"""
+    if isinstance(value, str):
+        return "text"
+    if isinstance(value, (datetime.date, np.datetime64)):
+        return "date"
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_)):
+        return "number"
+    return "other"
+
+def _to_naive(parsed: pd.Series) -> pd.Series:
+    """Get timezone-naive datetime64[ns] values (UTC for values that carried an offset)"""
+    if parsed.dtype == object:
+        # Values with different UTC offsets come back as objects
+        parsed = pd.to_datetime(parsed, utc=True, errors="coerce")
+    if isinstance(parsed.dtype, pd.DatetimeTZDtype):
+        parsed = parsed.dt.tz_convert(None)
+    return parsed.astype("datetime64[ns]")
+
+def _parsed_share(sample: pd.Series, date_format: str) -> float:
+    """Share of the sample values parsed by a format"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        parsed = pd.to_datetime(sample, format=date_format, errors="coerce")
+    return float(parsed.notna().mean())
@@ -1,15 +1,21 @@
 from __future__ import annotations
 
-from collections.abc import Iterator
-from contextlib import contextmanager
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
 
 import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, declarative_base
 
-from src import DATABASE_URI
+from src import ASYNC_DATABASE_URI, DATABASE_URI, PROJECT_ENVS
+from src.db.pool import MeteredAsyncAdaptedQueuePool, MeteredQueuePool
 
 Base = declarative_base()
 UTC_TIMESTAMP = sa.text("timezone('utc', now())")
+# Engine attributes holding the cached sessionmakers of an engine (see `get_sessionmaker_for_engine`)
+_SESSIONMAKER_ATTRIBUTE = "_cached_sessionmaker"
+_ASYNC_SESSIONMAKER_ATTRIBUTE = "_cached_async_sessionmaker"
 
 
 class FastAPISessionMaker:
@@ -65,8 +71,8 @@ class FastAPISessionMaker:
 
     def get_new_sessionmaker(self, engine: sa.engine.Engine | None) -> sa.orm.sessionmaker:
         """
-        Returns a new sessionmaker for the provided sqlalchemy engine. If no engine is provided, the
-        instance's (lazily-cached) engine is used.
+        Returns the sessionmaker of the provided sqlalchemy engine (cached per engine). If no engine is provided,
+        the instance's (lazily-cached) engine is used.
         """
         engine = engine or self.cached_engine
         return get_sessionmaker_for_engine(engine)
@@ -107,22 +113,128 @@ class FastAPISessionMaker:
         self._cached_sessionmaker = None
 
 
+class AsyncFastAPISessionMaker:
+    """
+    The asyncio counterpart of `FastAPISessionMaker`, for endpoints that should not block the event loop on
+    database I/O.
+
+    Usage looks like:
+
+        session_maker = AsyncFastAPISessionMaker(ASYNC_DATABASE_URI)
+
+        @app.get("/runs")
+        async def runs(session: AsyncSession = Depends(session_maker.get_db)):
+            ...
+    """
+
+    def __init__(self, database_uri: str = ASYNC_DATABASE_URI):
+        """
+        `database_uri` should use an async driver, e.g. "postgresql+asyncpg://db_user:password@db:5432/app"
+        """
+        self.database_uri = database_uri
+        self._cached_engine: AsyncEngine | None = None
+        self._cached_sessionmaker: async_sessionmaker | None = None
+
+    @property
+    def cached_engine(self) -> AsyncEngine:
+        """
+        Returns a lazily-cached async engine for the instance's database_uri.
+        """
+        if self._cached_engine is None:
+            self._cached_engine = get_async_engine(self.database_uri)
+        return self._cached_engine
+
+    @property
+    def cached_sessionmaker(self) -> async_sessionmaker:
+        """
+        Returns a lazily-cached async sessionmaker using the instance's (lazily-cached) engine.
+        """
+        if self._cached_sessionmaker is None:
+            self._cached_sessionmaker = get_async_sessionmaker_for_engine(self.cached_engine)
+        return self._cached_sessionmaker
+
+    async def get_db(self) -> AsyncIterator[AsyncSession]:
+        """
+        An async generator yielding a session that is committed (or rolled back) and closed when resumed.
+
+        Can be used directly as a FastAPI dependency.
+        """
+        async for session in _get_async_db(self.cached_sessionmaker):
+            yield session
+
+    @asynccontextmanager
+    async def context_session(self) -> AsyncIterator[AsyncSession]:
+        """
+        A context-manager wrapped version of the `get_db` method.
+        """
+        async for session in self.get_db():
+            yield session
+
+    async def dispose(self) -> None:
+        """
+        Closes the pooled connections and resets the engine cache (e.g. in the FastAPI lifespan shutdown).
+        """
+        if self._cached_engine is not None:
+            await self._cached_engine.dispose()
+            self._cached_engine = None
+            self._cached_sessionmaker = None
+
+
 def get_engine(uri: str = DATABASE_URI) -> sa.engine.Engine:
     """
     Returns a sqlalchemy engine with pool_pre_ping enabled.
 
+    The pool is sized from the DB_POOL_* settings and records checkout wait times (see `src.db.pool`).
+
     This function may be updated over time to reflect recommended engine configuration for use with FastAPI.
     """
-    return sa.create_engine(uri, pool_pre_ping=True)
+    return sa.create_engine(uri, pool_pre_ping=True, **_get_pool_options(uri, MeteredQueuePool))
+
+
+def get_async_engine(uri: str = ASYNC_DATABASE_URI) -> AsyncEngine:
+    """
+    Returns an asyncio sqlalchemy engine (asyncpg for PostgreSQL) with pool_pre_ping enabled.
+
+    Pool sizing and the prepared statement cache come from the DB_POOL_* and DB_STATEMENT_CACHE_SIZE settings.
+    """
+    options = _get_pool_options(uri, MeteredAsyncAdaptedQueuePool)
+    url = sa.engine.make_url(uri)
+    if url.get_driver_name() == "asyncpg":
+        # asyncpg's statement cache and sqlalchemy's prepared statement cache share one setting (use 0 behind pgbouncer)
+        url = url.update_query_dict({"prepared_statement_cache_size": str(PROJECT_ENVS.DB_STATEMENT_CACHE_SIZE)})
+        options["connect_args"] = {"statement_cache_size": PROJECT_ENVS.DB_STATEMENT_CACHE_SIZE}
+    return create_async_engine(url, pool_pre_ping=True, **options)
 
 
 def get_sessionmaker_for_engine(engine: sa.engine.Engine) -> sa.orm.sessionmaker:
     """
     Returns a sqlalchemy sessionmaker for the provided engine with recommended configuration settings.
 
+    Sessionmakers are cached per engine, so repeated calls (e.g. from `context_session`) reuse the same one.
+    The cache is an attribute of the engine rather than a global mapping, so it never keeps an engine alive:
+    the engine and its sessionmaker are garbage collected together.
+
     This function may be updated over time to reflect recommended sessionmaker configuration for use with FastAPI.
     """
-    return sa.orm.sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    sessionmaker = getattr(engine, _SESSIONMAKER_ATTRIBUTE, None)
+    if sessionmaker is None:
+        sessionmaker = sa.orm.sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        setattr(engine, _SESSIONMAKER_ATTRIBUTE, sessionmaker)
+    return sessionmaker
+
+
+def get_async_sessionmaker_for_engine(engine: AsyncEngine) -> async_sessionmaker:
+    """
+    Returns a cached async sessionmaker for the provided engine.
+
+    Cached like `get_sessionmaker_for_engine`, on the wrapped sync engine (AsyncEngine has no instance attributes).
+    expire_on_commit is disabled because attributes cannot be lazily refreshed outside of an awaitable.
+    """
+    sessionmaker = getattr(engine.sync_engine, _ASYNC_SESSIONMAKER_ATTRIBUTE, None)
+    if sessionmaker is None:
+        sessionmaker = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        setattr(engine.sync_engine, _ASYNC_SESSIONMAKER_ATTRIBUTE, sessionmaker)
+    return sessionmaker
 
 
 @contextmanager
@@ -131,19 +243,52 @@ def context_session(engine: sa.engine.Engine) -> Iterator[Session]:
     This contextmanager yields a managed session for the provided engine.
 
     Usage is similar to `FastAPISessionMaker.context_session`, except that you have to provide the engine to use.
-
-    A new sessionmaker is created for each call, so the FastAPISessionMaker.context_session
-    method may be preferable in performance-sensitive contexts.
+    Calls with the same engine share its cached sessionmaker.
     """
     sessionmaker = get_sessionmaker_for_engine(engine)
     yield from _get_db(sessionmaker)
 
 
+@asynccontextmanager
+async def async_context_session(engine: AsyncEngine) -> AsyncIterator[AsyncSession]:
+    """
+    The asyncio counterpart of `context_session` (also sharing the engine's cached sessionmaker).
+    """
+    sessionmaker = get_async_sessionmaker_for_engine(engine)
+    async for session in _get_async_db(sessionmaker):
+        yield session
+
+
 def get_session(uri: str = DATABASE_URI) -> Session:
     """
     Returns a sqlalchemy session
+
+    Sessions of the same URI share one engine (and its connection pool), created on first use.
     """
-    return get_sessionmaker_for_engine(get_engine(uri))()
+    return _get_uri_sessionmaker(uri)()
+
+
+@lru_cache(maxsize=None)
+def _get_uri_sessionmaker(uri: str) -> sa.orm.sessionmaker:
+    """
+    Returns the sessionmaker of a URI, creating its engine only once (engines are cached per URI, not per call).
+    """
+    return get_sessionmaker_for_engine(get_engine(uri))
+
+
+def _get_pool_options(uri: str, poolclass: type) -> dict:
+    """
+    Returns the pool configuration for an engine, leaving SQLite on its default single-connection pools.
+    """
+    if sa.engine.make_url(uri).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": PROJECT_ENVS.DB_POOL_SIZE,
+        "max_overflow": PROJECT_ENVS.DB_MAX_OVERFLOW,
+        "pool_timeout": PROJECT_ENVS.DB_POOL_TIMEOUT,
+        "pool_recycle": PROJECT_ENVS.DB_POOL_RECYCLE,
+    }
 
 
 def _get_db(sessionmaker: sa.orm.sessionmaker) -> Iterator[Session]:
@@ -159,3 +304,18 @@ def _get_db(sessionmaker: sa.orm.sessionmaker) -> Iterator[Session]:
         raise exc
     finally:
         session.close()
+
+
+async def _get_async_db(sessionmaker: async_sessionmaker) -> AsyncIterator[AsyncSession]:
+    """
+    The asyncio counterpart of `_get_db`: yields a session, then commits (or rolls back) and closes it.
+    """
+    session = sessionmaker()
+    try:
+        yield session
+        await session.commit()
+    except Exception as exc:
+        await session.rollback()
+        raise exc
+    finally:
+        await session.close()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import uuid
+
+import sqlalchemy as sa
+
+from src.db.db import UTC_TIMESTAMP, Base
+
+
+def _new_id() -> str:
+    return str(uuid.uuid4())
+
+
+class ValidationRun(Base):
+    """
+    One validated file: where it was routed, its verdict and summary counts.
+    """
+
+    __tablename__ = "validation_runs"
+
+    id = sa.Column(sa.String(36), primary_key=True, default=_new_id)
+    created_at = sa.Column(sa.DateTime, nullable=False, server_default=UTC_TIMESTAMP)
+    source = sa.Column(sa.String(16), nullable=False)
+    file_name = sa.Column(sa.String(255), nullable=False)
+    customer = sa.Column(sa.String(32))
+    product_line = sa.Column(sa.String(32))
+    sheet_name = sa.Column(sa.String(255))
+    status = sa.Column(sa.String(16), nullable=False)
+    error = sa.Column(sa.Text)
+    strict = sa.Column(sa.Boolean, nullable=False, default=False)
+    total_rows = sa.Column(sa.Integer)
+    total_file_columns = sa.Column(sa.Integer)
+    missing_essential_count = sa.Column(sa.Integer, nullable=False, default=0)
+    type_issue_count = sa.Column(sa.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        sa.Index("ix_validation_runs_customer_product_line_created_at", "customer", "product_line", "created_at"),
+    )
+
+
+class ValidationFinding(Base):
+    """
+    One problem found in a run: a missing essential column or a data type mismatch.
+
+    customer, product_line and created_at are copied from the run, so trend queries over
+    millions of findings are served by their own index without joining validation_runs.
+    """
+
+    __tablename__ = "validation_findings"
+
+    id = sa.Column(sa.BigInteger().with_variant(sa.Integer, "sqlite"), primary_key=True, autoincrement=True)
+    run_id = sa.Column(sa.String(36), sa.ForeignKey("validation_runs.id", ondelete="CASCADE"), nullable=False)
+    created_at = sa.Column(sa.DateTime, nullable=False, server_default=UTC_TIMESTAMP)
+    customer = sa.Column(sa.String(32))
+    product_line = sa.Column(sa.String(32))
+    kind = sa.Column(sa.String(32), nullable=False)
+    column_name = sa.Column(sa.String(255), nullable=False)
+    expected = sa.Column(sa.String(32))
+    actual = sa.Column(sa.String(64))
+    invalid_count = sa.Column(sa.Integer)
+    invalid_percentage = sa.Column(sa.Float)
+    detail = sa.Column(sa.JSON)
+
+    __table_args__ = (
+        sa.Index("ix_validation_findings_customer_product_line_created_at", "customer", "product_line", "created_at"),
+        sa.Index("ix_validation_findings_run_id", "run_id"),
+    )
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    """
+    Running counters of how long callers waited for a pooled connection.
+
+    Thread-safe, so the same instance can be shared by every thread using a synchronous engine.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_total_seconds": round(self.total_wait, 6),
+                "wait_avg_seconds": round(self.total_wait / attempts, 6) if attempts else 0.0,
+                "wait_max_seconds": round(self.max_wait, 6),
+            }
+
+
+class _MeteredPoolMixin:
+    """
+    Times every checkout from the pool, including the time spent waiting for a free connection.
+    """
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa.exc.TimeoutError:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+
+class MeteredQueuePool(_MeteredPoolMixin, QueuePool):
+    """
+    QueuePool that records checkout wait times (for synchronous engines).
+    """
+
+
+class MeteredAsyncAdaptedQueuePool(_MeteredPoolMixin, AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records checkout wait times (for asyncio engines).
+    """
+
+
+def get_pool_metrics(engine: sa.engine.Engine | sa.ext.asyncio.AsyncEngine) -> dict:
+    """
+    Returns the current pool usage of an engine, for sizing pool_size and max_overflow.
+
+    `checked_out` connections are in use, `overflow` is how far the pool has grown beyond
+    `size` (negative while below it), and the wait figures come from metered pools only.
+    """
+    pool = engine.pool
+    metrics = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        metrics |= {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        }
+    if isinstance(pool, _MeteredPoolMixin):
+        metrics |= pool.metrics.snapshot()
+    return metrics
@@ -0,0 +1,240 @@
+"""
+Duplicate rebate line detection within one submission
+Rows are hashed on the plan's duplicate key and counted by hash, chunk by chunk
+"""
+import datetime
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import get_validation_plan
+from date_parsing import infer_date_format, parse_dates
+from validation import FIRST_DATA_ROW, MAX_INVALID_ROWS
+
+# Duplicate groups reported with their key values and row numbers (all groups are counted)
+MAX_DUPLICATE_GROUPS = 20
+# Spreads the hash of each key column before it is mixed into the row hash
+_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+def hash_keys(df: pd.DataFrame, columns: Iterable[str], date_formats: Dict[str, Optional[str]] = None) -> np.ndarray:
+    """
+    Hash the key columns of every row in one vectorized pass
+
+    Each column is factorized and only its distinct values are normalized and hashed, so the
+    cost stays linear in the rows. Values are compared as text, with whole floats written
+    as integers, so an invoice number hashes the same whether a chunk read it as 12345,
+    12345.0 or '12345'. Dates compare as nanoseconds whatever unit the reader gave them, and
+    the columns in `date_formats` are parsed first, so '01/05/2024', '2024-01-05' and an Excel
+    date cell hash the same.
+
+    Args:
+        df: Chunk holding the key columns
+        columns: Key columns
+        date_formats: Key columns holding dates, with the strptime format of their text (None to infer)
+
+    Returns:
+        uint64 array with one hash per row, 0 where a key column is empty (or not a date in a date column)
+    """
+    date_formats = date_formats or {}
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    complete = np.ones(len(df), dtype=bool)
+    for col in columns:
+        values = parse_dates(df[col], date_formats[col]) if col in date_formats else df[col]
+        codes, uniques = pd.factorize(values)
+        unique_hashes = pd.util.hash_array(key_texts(uniques))
+        complete &= codes >= 0
+        # Code -1 (empty) takes the appended 0, those rows are cleared below anyway
+        hashes = hashes * _HASH_MULTIPLIER ^ np.append(unique_hashes, np.uint64(0))[codes]
+    # 0 is reserved for incomplete keys, which are never duplicates
+    hashes[hashes == 0] = 1
+    hashes[~complete] = 0
+    return hashes
+
+class DuplicateChecker:
+    """
+    Folds the duplicate key hashes of a file chunk by chunk
+
+    Each chunk's hashes are looked up in sorted runs of the hashes seen so far, so the key
+    values of a duplicate group are captured the first time it repeats, without keeping the
+    chunks. Rows missing part of the key are not counted, empty values are reported by the
+    data type validation.
+
+    Usage, reading the file once with the other checks:
+
+        duplicates = DuplicateChecker(customer, product_line)
+        type_results = validate_data_types_chunked(duplicates.watch(chunks), customer, product_line)
+        duplicate_results = duplicates.results()
+    """
+
+    def __init__(self, customer: str, product_line: str = None):
+        plan = get_validation_plan(customer, product_line)
+        self.key = plan.duplicate_key
+        # Formats learned from earlier chunks, so every chunk parses its dates the same way
+        self.date_formats = {col: None for col in self.key if plan.column_types[col] == "date"}
+        self.total_rows = 0
+        self.columns_seen = None
+        self.hashes = []
+        self.rows = []
+        self.samples = {}
+        self.seen_runs = []
+
+    def fold(self, chunk: pd.DataFrame):
+        """Hash the key of every row in one chunk and capture the key values of new duplicate groups"""
+        self.total_rows += len(chunk)
+        if self.columns_seen is None:
+            self.columns_seen = set(chunk.columns)
+        if not self.key or any(col not in chunk.columns for col in self.key):
+            return
+
+        for col in self.date_formats:
+            self.date_formats[col] = infer_date_format(chunk[col], preferred=self.date_formats[col])
+        hashes = hash_keys(chunk, self.key, self.date_formats)
+        complete = hashes != 0
+        hashes = hashes[complete]
+        rows = chunk.index.to_numpy()[complete].astype("int64") + FIRST_DATA_ROW
+        self.hashes.append(hashes)
+        self.rows.append(rows)
+
+        if len(self.samples) < MAX_DUPLICATE_GROUPS:
+            # Sorted distinct hashes make the lookups cache friendly and count repeats within the chunk
+            unique, inverse, counts = np.unique(hashes, return_inverse=True, return_counts=True)
+            repeated = (self._seen(unique) | (counts > 1))[inverse]
+            if repeated.any():
+                self._sample(chunk, np.flatnonzero(complete)[repeated], hashes[repeated])
+            self._remember(unique)
+        else:
+            # Lookups only serve the samples, so the runs can go once they are all taken
+            self.seen_runs = []
+
+    def watch(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Fold each chunk while passing it on (e.g. to validate_data_types_chunked)"""
+        for chunk in chunks:
+            self.fold(chunk)
+            yield chunk
+
+    def results(self) -> Dict:
+        """
+        Get the duplicate results of the folded chunks
+
+        Returns:
+            Dictionary with the key columns (and those missing from the file), the number of
+            duplicate groups and of rows repeating an earlier row, and the first
+            MAX_DUPLICATE_GROUPS groups with their key values and row numbers
+        """
+        columns_seen = self.columns_seen or set()
+        missing = [col for col in self.key if col not in columns_seen]
+        results = {
+            "key": list(self.key),
+            "missing_columns": missing,
+            "checked_rows": 0,
+            "duplicate_groups": 0,
+            "duplicate_rows": 0,
+            "groups": [],
+            "total_rows": self.total_rows
+        }
+        if not self.key or missing or not self.hashes:
+            return results
+
+        hashes, rows = self.key_hashes()
+        # Hash-based group-by: codes number the keys in order of their first row
+        codes, uniques = pd.factorize(hashes)
+        counts = np.bincount(codes, minlength=len(uniques))
+        repeated = counts > 1
+        results["checked_rows"] = len(hashes)
+        results["duplicate_groups"] = int(repeated.sum())
+        results["duplicate_rows"] = int((counts[repeated] - 1).sum())
+
+        for key_hash, values in self.samples.items():
+            group_rows = rows[hashes == key_hash]
+            results["groups"].append({
+                "key": values,
+                "count": len(group_rows),
+                "rows": group_rows[:MAX_INVALID_ROWS].tolist()
+            })
+        results["groups"].sort(key=lambda group: group["rows"][0])
+        return results
+
+    def key_hashes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the key hashes of the folded rows with a complete key
+
+        Returns:
+            Tuple of (uint64 key hashes, their row numbers), empty when the file lacks a key column
+        """
+        if not self.hashes:
+            return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+        return np.concatenate(self.hashes), np.concatenate(self.rows)
+
+    def _seen(self, hashes: np.ndarray) -> np.ndarray:
+        """Mask of the hashes already seen in earlier chunks"""
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self.seen_runs:
+            positions = np.searchsorted(run, hashes).clip(max=len(run) - 1)
+            found |= run[positions] == hashes
+        return found
+
+    def _remember(self, run: np.ndarray):
+        """Add a chunk's sorted distinct hashes to the runs, merging runs of similar size (a few runs stay searched)"""
+        while self.seen_runs and len(self.seen_runs[-1]) <= 2 * len(run):
+            run = np.union1d(self.seen_runs.pop(), run)
+        self.seen_runs.append(run)
+
+    def _sample(self, chunk: pd.DataFrame, positions: np.ndarray, hashes: np.ndarray):
+        """Keep the key values of duplicate groups not sampled yet (first row of each group in the chunk)"""
+        group_hashes, first = np.unique(hashes, return_index=True)
+        order = np.argsort(first)
+        for position, key_hash in zip(positions[first[order]], group_hashes[order].tolist()):
+            if len(self.samples) >= MAX_DUPLICATE_GROUPS:
+                break
+            if key_hash not in self.samples:
+                self.samples[key_hash] = {col: chunk[col].iat[position] for col in self.key}
+
+def find_duplicates(chunks: Iterable[pd.DataFrame], customer: str, product_line: str = None) -> Dict:
+    """
+    Find rows of a file repeating the duplicate key of its customer / product line
+
+    Args:
+        chunks: DataFrame chunks of the same file (e.g. from file_readers.iter_chunks), or [df]
+        customer: Selected customer
+        product_line: Selected product line (None for NVR/WW)
+
+    Returns:
+        Duplicate results (see DuplicateChecker.results)
+    """
+    checker = DuplicateChecker(customer, product_line)
+    for chunk in chunks:
+        checker.fold(chunk)
+    return checker.results()
+
+def key_texts(uniques) -> np.ndarray:
+    """Normalize the distinct values of a key column for hashing (vectorized for typed columns)"""
+    index = pd.Index(np.asarray(uniques))
+    kind = index.dtype.kind
+    if kind == "M":
+        # CSV readers give datetime64[ms] or [s], Excel readers datetime64[ns]
+        return index.astype("datetime64[ns]").asi8.astype(str).astype(object)
+    if kind == "f":
+        values = index.to_numpy()
+        whole = np.isfinite(values) & (values == np.round(values))
+        texts = np.empty(len(values), dtype=object)
+        texts[whole] = values[whole].astype("int64").astype(str)
+        texts[~whole] = values[~whole].astype(str)
+        return texts
+    if kind in "iub":
+        return index.astype(str).to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(index, skipna=False) == "string":
+        return index.to_numpy(dtype=object)
+    return index.map(_key_text).to_numpy(dtype=object)
+
+def _key_text(value) -> str:
+    """Normalize one distinct value of a mixed key column for hashing"""
+    if isinstance(value, (datetime.date, np.datetime64)):
+        # Written like the datetime64 branch of key_texts (nanoseconds, UTC for values with an offset)
+        timestamp = pd.Timestamp(value)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert(None)
+        return str(timestamp.as_unit("ns").value)
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
@@ -0,0 +1,417 @@
+"""
+File readers for uploaded CSV and Excel files
+Header probes read only the first row so column checks never load the full sheet
+Parsing uses the fastest installed engines (see reader_engines)
+"""
+import io
+import os
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+
+from column_matching import normalize_column_name
+from reader_engines import (
+    ReaderEngines, apply_dtype_backend, arrow_to_frame, get_default_engines, iter_calamine_rows, iter_csv_tables,
+    open_calamine,
+    read_csv_table
+)
+
+FileSource = Union[str, os.PathLike, BinaryIO]
+
+# Rows per chunk for streaming reads - keeps memory bounded regardless of file size
+DEFAULT_CHUNK_SIZE = 50_000
+# Minimum share of the expected columns a sheet's header must hold to be picked by fingerprint
+MIN_FINGERPRINT_SCORE = 0.5
+
+def get_file_extension(filename: str) -> str:
+    """Get the lower-cased file extension (e.g. '.xlsx') of a file name"""
+    return os.path.splitext(filename)[1].lower()
+
+def read_preview(source: FileSource, filename: str, sheet_name: str, nrows: int = 5,
+                 engines: ReaderEngines = None) -> pd.DataFrame:
+    """Read the first `nrows` data rows of a CSV or Excel file"""
+    engines = engines or get_default_engines()
+    _rewind(source)
+    if get_file_extension(filename) == ".csv":
+        # The pyarrow engine cannot stop after n rows, the C parser can
+        return pd.read_csv(source, nrows=nrows, **engines.read_kwargs)
+    return pd.read_excel(source, sheet_name=sheet_name, nrows=nrows, engine=_excel_engine(engines),
+                         **engines.read_kwargs)
+
+def read_file(source: FileSource, filename: str, sheet_name: str, engines: ReaderEngines = None) -> pd.DataFrame:
+    """Read the full contents of a CSV file or an Excel worksheet"""
+    engines = engines or get_default_engines()
+    _rewind(source)
+    if get_file_extension(filename) == ".csv":
+        chunks = list(iter_chunks(source, filename, sheet_name, chunksize=None, engines=engines))
+        return chunks[0] if len(chunks) == 1 else pd.concat(chunks)
+    return pd.read_excel(source, sheet_name=sheet_name, engine=_excel_engine(engines), **engines.read_kwargs)
+
+def iter_chunks(source: FileSource, filename: str, sheet_name: str, chunksize: Optional[int] = DEFAULT_CHUNK_SIZE,
+                engines: ReaderEngines = None) -> Iterator[pd.DataFrame]:
+    """
+    Stream a CSV file or an Excel worksheet as DataFrames of at most `chunksize` rows
+
+    Chunks keep a running index so row labels match a full `read_file` load.
+    With the pyarrow engine a CSV file is parsed block by block and each chunk is converted
+    to pandas as soon as its rows are parsed, so memory stays bounded whatever the row count
+    (a single chunk is parsed in one multi-threaded pass). When a later block does not fit
+    the column types pyarrow inferred, the rest of the file is read with the C parser.
+
+    Args:
+        source: Path or file-like object (e.g. a Streamlit UploadedFile)
+        filename: Name of the file, used to pick the reader
+        sheet_name: Worksheet to read for Excel files
+        chunksize: Maximum number of rows per chunk (None for a single chunk)
+        engines: Engines to parse with (defaults to get_default_engines())
+
+    Yields:
+        DataFrame chunks in file order
+    """
+    engines = engines or get_default_engines()
+    _rewind(source)
+    extension = get_file_extension(filename)
+
+    if extension == ".csv":
+        yield from _iter_csv_chunks(source, chunksize, engines)
+    elif extension == ".xls" and engines.excel != "calamine":
+        # Legacy .xls is capped at 65,536 rows and xlrd parses the whole sheet anyway
+        df = pd.read_excel(source, sheet_name=sheet_name, **engines.read_kwargs)
+        step = chunksize or max(len(df), 1)
+        for start in range(0, len(df), step):
+            yield df.iloc[start:start + step]
+    elif engines.excel == "calamine":
+        workbook = open_calamine(source)
+        yield from _iter_row_chunks(_calamine_rows(workbook, sheet_name), chunksize, engines)
+    else:
+        yield from _iter_xlsx_chunks(source, sheet_name, chunksize, engines)
+
+def _iter_csv_chunks(source: FileSource, chunksize: Optional[int], engines: ReaderEngines) -> Iterator[pd.DataFrame]:
+    """Stream a CSV file with the configured engine, falling back to the C parser"""
+    offset = 0
+    if engines.csv == "pyarrow":
+        header = pd.read_csv(source, nrows=0).columns.tolist()
+        _rewind(source)
+        try:
+            if chunksize is None:
+                yield arrow_to_frame(read_csv_table(source, header), engines)
+                return
+            for table in iter_csv_tables(source, header, chunksize):
+                yield arrow_to_frame(table, engines, offset)
+                offset += table.num_rows
+            return
+        except ValueError:
+            # e.g. a column typed as int from its first block holds text further down:
+            # the rows not yielded yet are read with the C parser
+            _rewind(source)
+
+    if chunksize is None:
+        yield pd.read_csv(source, **engines.read_kwargs)
+        return
+    with pd.read_csv(source, chunksize=chunksize, **engines.read_kwargs) as reader:
+        for chunk in reader:
+            # Rows already yielded are parsed again and dropped: skiprows counts lines, not
+            # records, so quoted line breaks would shift the rows after the fallback
+            if offset:
+                chunk = chunk.iloc[max(offset - chunk.index[0], 0):] if len(chunk) else chunk
+                if chunk.empty:
+                    continue
+            yield chunk
+
+@dataclass(frozen=True)
+class SheetInfo:
+    """Name and dimensions of a worksheet (dimensions are None when the file does not record them)"""
+    name: str
+    rows: Optional[int]
+    columns: Optional[int]
+
+    @property
+    def label(self) -> str:
+        """Display name, e.g. 'Working Copy (1,204 rows x 44 columns)'"""
+        if self.rows is None or self.columns is None:
+            return self.name
+        return f"{self.name} ({self.rows:,} rows x {self.columns} columns)"
+
+class WorkbookInspector:
+    """
+    An upload opened once, with its worksheets listed and read on demand
+
+    Excel workbooks are opened a single time (calamine, or openpyxl in read-only mode)
+    and the handle is kept, so an inspector cached across Streamlit reruns lists sheets,
+    probes headers and streams the chosen sheet without re-parsing the workbook. CSV
+    files behave as a workbook without sheets. Use as a context manager (or call close())
+    when the inspector is not cached.
+    """
+
+    def __init__(self, source: FileSource, filename: str, engines: ReaderEngines = None):
+        self.filename = filename
+        self.extension = get_file_extension(filename)
+        self.engines = engines or get_default_engines()
+        # File-like sources (e.g. Streamlit uploads) are copied so the handle outlives them
+        if hasattr(source, "read"):
+            _rewind(source)
+            self._data = source.read()
+            self._path = None
+        else:
+            self._data = None
+            self._path = os.fspath(source)
+        self._headers = {}
+
+        if self.extension == ".csv":
+            self.reader, self._workbook = None, None
+        elif self.engines.excel == "calamine":
+            self.reader, self._workbook = "calamine", open_calamine(self._open())
+        elif self.extension == ".xls":
+            self.reader, self._workbook = "xlrd", _open_xls(self._open())
+        else:
+            from openpyxl import load_workbook
+
+            self.reader = "openpyxl"
+            self._workbook = load_workbook(self._open(), read_only=True, data_only=True)
+
+    def __enter__(self) -> "WorkbookInspector":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __sizeof__(self) -> int:
+        # Lets the upload cache account for the copied file bytes
+        return object.__sizeof__(self) + (len(self._data) if self._data is not None else 0)
+
+    @property
+    def is_workbook(self) -> bool:
+        """Whether the file is an Excel workbook (as opposed to a CSV file)"""
+        return self.reader is not None
+
+    @cached_property
+    def sheet_names(self) -> List[str]:
+        """Worksheet names in workbook order (empty for CSV files)"""
+        if self.reader == "calamine":
+            return list(self._workbook.sheet_names)
+        if self.reader == "openpyxl":
+            return list(self._workbook.sheetnames)
+        if self.reader == "xlrd":
+            return list(self._workbook.sheet_names())
+        return []
+
+    @cached_property
+    def sheets(self) -> List[SheetInfo]:
+        """Worksheets with their dimensions, as recorded in the file"""
+        sheets = []
+        for name in self.sheet_names:
+            if self.reader == "calamine":
+                sheet = self._workbook.get_sheet_by_name(name)
+                sheets.append(SheetInfo(name, sheet.total_height, sheet.total_width))
+            elif self.reader == "openpyxl":
+                sheets.append(SheetInfo(name, self._workbook[name].max_row, self._workbook[name].max_column))
+            else:
+                sheet = self._workbook.sheet_by_name(name)
+                sheets.append(SheetInfo(name, sheet.nrows, sheet.ncols))
+        return sheets
+
+    def select_sheet(self, candidates: Sequence[str], expected_columns: Iterable[str]) -> Optional[str]:
+        """
+        Pick the worksheet to validate
+
+        Candidate names are tried in order, first exactly and then ignoring case,
+        spacing and punctuation. Otherwise the sheet whose header holds the largest
+        share of the expected columns wins, if that share is at least MIN_FINGERPRINT_SCORE.
+
+        Args:
+            candidates: Accepted sheet names, preferred first
+            expected_columns: Columns the sheet should have (e.g. the plan's essential columns)
+
+        Returns:
+            The sheet name (the first candidate for CSV files), or None if no sheet qualifies
+        """
+        if not self.is_workbook:
+            return candidates[0]
+
+        for candidate in candidates:
+            if candidate in self.sheet_names:
+                return candidate
+        by_key = {}
+        for name in self.sheet_names:
+            by_key.setdefault(normalize_column_name(name), name)
+        for candidate in candidates:
+            if normalize_column_name(candidate) in by_key:
+                return by_key[normalize_column_name(candidate)]
+
+        expected = {normalize_column_name(col) for col in expected_columns}
+        best_name, best_score = None, 0.0
+        for name in self.sheet_names:
+            header = {normalize_column_name(col) for col in self.header(name)}
+            score = len(expected & header) / max(len(expected), 1)
+            if score > best_score:
+                best_name, best_score = name, score
+        return best_name if best_score >= MIN_FINGERPRINT_SCORE else None
+
+    def header(self, sheet_name: str) -> List[Any]:
+        """
+        Read only the header row of a sheet
+
+        Column names follow the pandas conventions (blank headers become 'Unnamed: N',
+        duplicates get a '.N' suffix), so the result is interchangeable with `df.columns.tolist()`.
+        """
+        if sheet_name not in self._headers:
+            if self.reader == "xlrd":
+                header = _xls_header(self._workbook, sheet_name)
+            elif self.reader is None:
+                header = pd.read_csv(self._open(), nrows=0).columns.tolist()
+            else:
+                header = _header_from_rows(self._rows(sheet_name))
+            self._headers[sheet_name] = header
+        return self._headers[sheet_name]
+
+    def preview(self, sheet_name: str, nrows: int = 5) -> pd.DataFrame:
+        """Read the first `nrows` data rows of a sheet"""
+        if self.reader in (None, "xlrd"):
+            return read_preview(self._open(), self.filename, sheet_name, nrows, self.engines)
+        first = next(self.iter_chunks(sheet_name, nrows), None)
+        return first if first is not None else pd.DataFrame(columns=self.header(sheet_name))
+
+    def iter_chunks(self, sheet_name: str, chunksize: Optional[int] = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """Stream a sheet as DataFrames of at most `chunksize` rows (see iter_chunks)"""
+        if self.reader in (None, "xlrd"):
+            return iter_chunks(self._open(), self.filename, sheet_name, chunksize, self.engines)
+        return _iter_row_chunks(self._rows(sheet_name), chunksize, self.engines)
+
+    def read(self, sheet_name: str) -> pd.DataFrame:
+        """Read the full contents of a sheet"""
+        if self.reader in (None, "xlrd"):
+            return read_file(self._open(), self.filename, sheet_name, self.engines)
+        first = next(self.iter_chunks(sheet_name, None), None)
+        return first if first is not None else pd.DataFrame(columns=self.header(sheet_name))
+
+    def close(self):
+        """Release the workbook handle"""
+        if self.reader == "openpyxl":
+            self._workbook.close()
+        elif self.reader == "xlrd":
+            self._workbook.release_resources()
+        elif self.reader == "calamine" and hasattr(self._workbook, "close"):
+            self._workbook.close()
+
+    def _rows(self, sheet_name: str) -> Iterator[tuple]:
+        """Iterate the raw rows of a sheet of the open calamine or openpyxl workbook"""
+        if self.reader == "calamine":
+            return _calamine_rows(self._workbook, sheet_name)
+        return _get_worksheet(self._workbook, sheet_name).iter_rows(values_only=True)
+
+    def _open(self) -> FileSource:
+        """A fresh readable source over the file content"""
+        return io.BytesIO(self._data) if self._data is not None else self._path
+
+def _iter_xlsx_chunks(source: FileSource, sheet_name: str, chunksize: Optional[int],
+                      engines: ReaderEngines) -> Iterator[pd.DataFrame]:
+    """Stream an .xlsx worksheet row by row with openpyxl and batch the rows into DataFrames"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = _get_worksheet(workbook, sheet_name).iter_rows(values_only=True)
+        yield from _iter_row_chunks(rows, chunksize, engines)
+    finally:
+        workbook.close()
+
+def _calamine_rows(workbook, sheet_name: str) -> Iterator[tuple]:
+    """Iterate the rows of a sheet of a calamine workbook"""
+    if sheet_name not in workbook.sheet_names:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    return iter_calamine_rows(workbook.get_sheet_by_name(sheet_name))
+
+def _excel_engine(engines: ReaderEngines) -> Optional[str]:
+    """Engine argument for pd.read_excel (None lets pandas pick openpyxl or xlrd by file type)"""
+    return "calamine" if engines.excel == "calamine" else None
+
+def _iter_row_chunks(rows: Iterable[tuple], chunksize: Optional[int],
+                     engines: ReaderEngines) -> Iterator[pd.DataFrame]:
+    """Batch worksheet rows into DataFrames, using the first non-empty row as the header"""
+    header = None
+    batch = []
+    offset = 0
+    for row in rows:
+        # Blank lines are skipped, same as pd.read_excel
+        if not any(_is_filled(value) for value in row):
+            continue
+        if header is None:
+            header = _normalize_header(row)
+            continue
+
+        row = list(row[:len(header)])
+        row.extend([None] * (len(header) - len(row)))
+        batch.append(row)
+        if chunksize and len(batch) >= chunksize:
+            yield _rows_to_frame(batch, header, offset, engines)
+            offset += len(batch)
+            batch = []
+
+    if batch:
+        yield _rows_to_frame(batch, header, offset, engines)
+
+def _rows_to_frame(rows: List[list], header: List[Any], offset: int, engines: ReaderEngines) -> pd.DataFrame:
+    """Build a chunk DataFrame whose index continues from the previous chunk"""
+    df = pd.DataFrame.from_records(rows, columns=header, index=pd.RangeIndex(offset, offset + len(rows)))
+    return apply_dtype_backend(df, engines)
+
+def _header_from_rows(rows: Iterable[tuple]) -> List[Any]:
+    """Normalize the first non-empty worksheet row into column names"""
+    for row in rows:
+        if any(_is_filled(value) for value in row):
+            return _normalize_header(row)
+    return []
+
+def _get_worksheet(workbook, sheet_name: str):
+    """Get an openpyxl worksheet by name, with the same error as pandas when it is missing"""
+    if sheet_name not in workbook.sheetnames:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    return workbook[sheet_name]
+
+def _open_xls(source: FileSource):
+    """Open a legacy .xls workbook with xlrd, loading sheets only when accessed"""
+    import xlrd
+
+    if hasattr(source, "read"):
+        return xlrd.open_workbook(file_contents=source.read(), on_demand=True)
+    return xlrd.open_workbook(os.fspath(source), on_demand=True)
+
+def _xls_header(workbook, sheet_name: str) -> List[Any]:
+    """Read the header of a sheet of an open xlrd workbook"""
+    if sheet_name not in workbook.sheet_names():
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    sheet = workbook.sheet_by_name(sheet_name)
+    # xlrd returns every number as float, pandas turns whole ones back into int
+    return _header_from_rows(
+        [int(value) if isinstance(value, float) and value.is_integer() else value for value in sheet.row_values(i)]
+        for i in range(sheet.nrows)
+    )
+
+def _normalize_header(values) -> List[Any]:
+    """Apply pandas' header conventions to a raw row of cell values"""
+    values = list(values)
+    while values and not _is_filled(values[-1]):
+        values.pop()
+
+    header = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = value if _is_filled(value) else f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+def _is_filled(value: Any) -> bool:
+    """Check if a cell value is non-empty"""
+    return value is not None and value != ""
+
+def _rewind(source: FileSource):
+    """Move file-like sources back to the start so they can be read again"""
+    if hasattr(source, "seek"):
+        source.seek(0)
@@ -0,0 +1 @@
+__ALL__ = []
@@ -0,0 +1,162 @@
+"""
+Headless command-line validator for scheduled bulk runs (cron, Airflow)
+
+Usage:
+    spd-columns-check /landing/net_asp --customer SRS --strict --format csv --output report.csv
+    spd-columns-check "/landing/**/Net_ASP_*.xlsx" --workers 8 --persist
+    spd-columns-check /landing/net_asp/2025-10 --record-keys
+    spd-columns-check "/archive/accepted/**/Net_ASP_*" --rebuild-key-index
+
+Exits with 0 when every file passes, 1 when any file fails or cannot be read,
+and 2 on usage errors or when no files are found. Never imports streamlit.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+# The validation modules use flat imports (as under `streamlit run src/...`), so src/ must be importable
+SRC_DIR = Path(__file__).resolve().parents[2]
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from batch import SUPPORTED_EXTENSIONS, extract_zip, rebuild_key_index, validate_batch  # noqa: E402
+from config import COLUMN_CONFIGS  # noqa: E402
+from file_readers import get_file_extension  # noqa: E402
+from report import create_batch_report  # noqa: E402
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="spd-columns-check",
+        description="Validate NET_ASP files against the customer column configurations.",
+    )
+    parser.add_argument("paths", nargs="+", help="Files, directories or glob patterns (zip archives are extracted)")
+    parser.add_argument("--customer", choices=list(COLUMN_CONFIGS.keys()), help="Customer (auto-detected if omitted)")
+    parser.add_argument("--product-line", help="Product line (auto-detected from the file name if omitted)")
+    parser.add_argument("--recursive", action="store_true", help="Also validate files in sub-directories")
+    parser.add_argument("--no-types", action="store_true", help="Skip data type validation")
+    parser.add_argument("--strict", action="store_true", help="Check every value instead of a sample")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only check rows changed since the file was last submitted (implies --strict)",
+    )
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (defaults to the CPU count)")
+    parser.add_argument("--format", choices=["json", "csv"], default="json", help="Report format")
+    parser.add_argument("--output", help="Report file (defaults to stdout)")
+    parser.add_argument("--persist", action="store_true", help="Store the results in the validation history tables")
+    parser.add_argument(
+        "--record-keys",
+        action="store_true",
+        help="Add the invoice keys of passed files to the index later submissions are checked against",
+    )
+    parser.add_argument(
+        "--rebuild-key-index",
+        action="store_true",
+        help="Rebuild the invoice key index from these accepted files (in name order) instead of validating them",
+    )
+    return parser
+
+
+def collect_files(patterns: List[str], recursive: bool = False) -> List[str]:
+    """
+    Expand files, directories and glob patterns into a sorted, de-duplicated list of files
+    """
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern, recursive=True) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            path = Path(match)
+            if path.is_dir():
+                candidates = path.rglob("*") if recursive else path.iterdir()
+                files.update(str(p) for p in candidates if p.is_file() and _is_supported(p.name))
+            elif path.is_file() and _is_supported(path.name):
+                files.add(str(path))
+    return sorted(files)
+
+
+def _is_supported(filename: str) -> bool:
+    return get_file_extension(filename) in SUPPORTED_EXTENSIONS + (".zip",) and not filename.startswith("~$")
+
+
+def write_report(entries: List[dict], report_format: str, output: str = None) -> None:
+    if report_format == "csv":
+        content = create_batch_report(entries).to_csv(index=False)
+    else:
+        content = json.dumps(entries, indent=2, default=str)
+
+    if output:
+        Path(output).write_text(content)
+    else:
+        sys.stdout.write(content + ("" if content.endswith("\n") else "\n"))
+
+
+def persist_entries(entries: List[dict]) -> None:
+    """
+    Bulk insert the results into the validation_runs / validation_findings tables
+    """
+    # The database layer is imported as the `src` package and needs the project settings, so it loads only here
+    root_dir = str(SRC_DIR.parent)
+    if root_dir not in sys.path:
+        sys.path.insert(0, root_dir)
+    from src.repository.validation_run import persist_validation_entries
+
+    stored = persist_validation_entries(entries, source="cli")
+    print(f"Stored {stored}/{len(entries)} validation runs.", file=sys.stderr)
+
+
+def cli(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    files = collect_files(args.paths, args.recursive)
+    if not files:
+        print("No CSV/Excel/zip files found.", file=sys.stderr)
+        return EXIT_USAGE
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for index, file in enumerate(files):
+            if get_file_extension(file) == ".zip":
+                zip_dir = os.path.join(tmp_dir, str(index))
+                os.makedirs(zip_dir)
+                paths.extend(extract_zip(file, zip_dir))
+            else:
+                paths.append(file)
+
+        if args.rebuild_key_index:
+            indexed = rebuild_key_index(paths, args.customer, args.product_line, max_workers=args.workers)
+            for label, count in indexed.items():
+                print(f"Indexed the invoice keys of {count} files for {label}.", file=sys.stderr)
+            return EXIT_OK if indexed else EXIT_FAILED
+
+        entries = validate_batch(
+            paths,
+            customer=args.customer,
+            product_line=args.product_line,
+            validate_types=not args.no_types,
+            strict=args.strict,
+            max_workers=args.workers,
+            incremental=args.incremental,
+            record_keys=args.record_keys,
+        )
+
+    write_report(entries, args.format, args.output)
+    if args.persist:
+        persist_entries(entries)
+
+    passed = sum(entry["status"] == "passed" for entry in entries)
+    print(f"{passed}/{len(entries)} files passed validation.", file=sys.stderr)
+    return EXIT_OK if passed == len(entries) else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
@@ -0,0 +1,202 @@
+"""
+HTTP API for column and data type validation
+
+Uploads are streamed to a temporary file instead of being held in memory, and
+the CPU-bound pandas work runs in a process pool so the event loop stays responsive.
+
+Run with:
+    uvicorn src.interface.wsgi.app:app --host 0.0.0.0 --port 8001 --workers 4
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from functools import partial
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import BackgroundTasks, FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+# The validation modules use flat imports (as under `streamlit run src/...`), so src/ must be importable
+SRC_DIR = Path(__file__).resolve().parents[2]
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from batch import SUPPORTED_EXTENSIONS, error_entry, validate_path  # noqa: E402
+from config import COLUMN_CONFIGS, VALIDATION_PLANS  # noqa: E402
+from file_readers import get_file_extension  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Worker processes per API process (the Dockerfile runs 4 uvicorn workers)
+VALIDATION_WORKERS = int(os.environ.get("VALIDATION_WORKERS", 2))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Store every validation in the validation_runs / validation_findings tables (see src/migrations)
+PERSIST_VALIDATION_RUNS = os.environ.get("PERSIST_VALIDATION_RUNS", "False") == "True"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # spawn: forking a process that already runs an event loop and threads is unsafe
+    context = multiprocessing.get_context("spawn")
+    app.state.executor = ProcessPoolExecutor(max_workers=VALIDATION_WORKERS, mp_context=context)
+    logger.info(f"Validation process pool started with {VALIDATION_WORKERS} workers")
+    yield
+    app.state.executor.shutdown(wait=True, cancel_futures=True)
+
+
+app = FastAPI(title="SPD Columns Check", lifespan=lifespan)
+
+
+@app.get("/")
+async def health() -> dict:
+    return {"status": "ok"}
+
+
+@app.get("/configs")
+async def configs() -> List[dict]:
+    return [
+        {
+            "customer": plan.customer,
+            "product_line": plan.product_line,
+            "file_prefix": plan.file_prefix,
+            "sheet_name": plan.sheet_name,
+            "essential": list(plan.essential),
+            "other": list(plan.other),
+            "column_types": dict(plan.column_types),
+            "rules": [asdict(rule) for rule in plan.rules],
+            "duplicate_key": list(plan.duplicate_key),
+            "references": dict(plan.references),
+        }
+        for plan in VALIDATION_PLANS.values()
+    ]
+
+
+@app.post("/validate")
+async def validate(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    customer: Optional[str] = Form(None),
+    product_line: Optional[str] = Form(None),
+    validate_types: bool = Form(True),
+    strict: bool = Form(False),
+    incremental: bool = Form(False),
+    record_keys: bool = Form(True),
+) -> dict:
+    _check_options(customer)
+    if not _is_supported(file):
+        raise HTTPException(status_code=400, detail=f"Unsupported file type '{_upload_name(file)}'")
+    entry = await _validate_upload(
+        request.app, file, customer, product_line, validate_types, strict, incremental, record_keys
+    )
+    _schedule_persist(background_tasks, [entry])
+    return entry
+
+
+@app.post("/validate/batch")
+async def validate_batch(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    customer: Optional[str] = Form(None),
+    product_line: Optional[str] = Form(None),
+    validate_types: bool = Form(True),
+    strict: bool = Form(False),
+    incremental: bool = Form(False),
+    record_keys: bool = Form(True),
+) -> List[dict]:
+    _check_options(customer)
+    # Unsupported files get an error entry instead of failing the other files of the batch
+    entries = await asyncio.gather(
+        *[
+            _validate_upload(
+                request.app, file, customer, product_line, validate_types, strict, incremental, record_keys
+            )
+            for file in files
+        ]
+    )
+    _schedule_persist(background_tasks, entries)
+    return entries
+
+
+def _check_options(customer: Optional[str]) -> None:
+    if customer is not None and customer not in COLUMN_CONFIGS:
+        raise HTTPException(status_code=400, detail=f"Unknown customer '{customer}'")
+
+
+async def _validate_upload(
+    app: FastAPI,
+    file: UploadFile,
+    customer: Optional[str],
+    product_line: Optional[str],
+    validate_types: bool,
+    strict: bool,
+    incremental: bool = False,
+    record_keys: bool = False,
+) -> dict:
+    filename = _upload_name(file)
+    if not _is_supported(file):
+        return error_entry(filename, customer, product_line, f"Unsupported file type '{filename}'")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, filename)
+        await _save_upload(file, path)
+        entry = await asyncio.get_running_loop().run_in_executor(
+            app.state.executor,
+            partial(
+                validate_path,
+                path,
+                customer,
+                product_line,
+                validate_types,
+                strict,
+                incremental=incremental,
+                record_keys=record_keys,
+            ),
+        )
+
+    logger.info("Validated upload", extra={"file_name": filename, "status": entry["status"]})
+    # Sample values can hold timestamps and other non-JSON types
+    return json.loads(json.dumps(entry, default=str))
+
+
+def _upload_name(file: UploadFile) -> str:
+    return os.path.basename(file.filename or "")
+
+
+def _is_supported(file: UploadFile) -> bool:
+    return get_file_extension(_upload_name(file)) in SUPPORTED_EXTENSIONS
+
+
+def _schedule_persist(background_tasks: BackgroundTasks, entries: List[dict]) -> None:
+    """Store the results after the response is sent, so the database never delays a validation"""
+    if PERSIST_VALIDATION_RUNS:
+        background_tasks.add_task(_persist_entries, entries)
+
+
+def _persist_entries(entries: List[dict]) -> None:
+    # Imported here: the database layer needs the project settings, which the API does not otherwise load
+    from src.repository.validation_run import persist_validation_entries
+
+    stored = persist_validation_entries(entries, source="api")
+    logger.info("Stored validation runs", extra={"stored": stored, "total": len(entries)})
+
+
+async def _save_upload(file: UploadFile, path: str) -> None:
+    """Copy the upload to disk in chunks so large files never sit in memory"""
+
+    def copy():
+        file.file.seek(0)
+        with open(path, "wb") as target:
+            shutil.copyfileobj(file.file, target, UPLOAD_CHUNK_SIZE)
+
+    await run_in_threadpool(copy)
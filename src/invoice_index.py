@@ -0,0 +1,283 @@
+"""
+Invoice keys of accepted files, kept on disk per customer / product line
+Lets a new submission be probed for lines already claimed in an earlier file
+"""
+import fcntl
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from config import ValidationPlan
+from duplicates import DuplicateChecker
+from row_hashes import safe_name
+from validation import MAX_INVALID_ROWS
+
+# PROJECT_PATHS.PROCESSED_DATA / "invoice_keys"; override with the INVOICE_INDEX_DIR environment variable
+DEFAULT_INVOICE_INDEX_DIR = Path(__file__).resolve().parent.parent / "data" / "processed" / "invoice_keys"
+# Appended segments are merged into one once there are more than this many
+MAX_SEGMENTS = 8
+# Files listed with their resubmitted rows (all resubmitted rows are counted)
+MAX_RESUBMITTED_SOURCES = 20
+
+class InvoiceKeyIndex:
+    """
+    Key hashes (see duplicates.hash_keys) of every accepted file, one directory per customer / product line
+
+    Each accepted file is appended as a segment: its sorted distinct key hashes plus the
+    id of the file they came from, saved as .npy files and memory-mapped when probed.
+    A manifest lists the segments and the indexed files. Probing sorts the new keys once
+    and binary searches every segment, so 1M keys take a fraction of a second; compaction
+    merges the segments into one, keeping the first file each key was claimed in.
+
+    A file added again under the same name replaces its earlier keys (a corrected
+    resubmission), and a changed duplicate key in the plan starts a new index, which
+    rebuild fills from the accepted files.
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = Path(directory or os.getenv("INVOICE_INDEX_DIR") or DEFAULT_INVOICE_INDEX_DIR)
+
+    def path(self, plan: ValidationPlan) -> Path:
+        """Get the directory holding the index of a customer / product line"""
+        return self.directory / safe_name(plan.customer) / safe_name(plan.product_line or "_")
+
+    def files(self, plan: ValidationPlan) -> List[Dict]:
+        """Get the indexed files (name, time added and number of keys), oldest first"""
+        return [source for source in self._read_manifest(plan)["sources"] if source["active"]]
+
+    def probe(self, plan: ValidationPlan, hashes: np.ndarray, exclude_file: str = None) -> np.ndarray:
+        """
+        Look up key hashes in the index
+
+        Args:
+            plan: Plan whose index is probed
+            hashes: Key hashes of the new submission
+            exclude_file: File name whose own earlier keys do not count (a corrected resubmission)
+
+        Returns:
+            int64 array with, per hash, the id of the first indexed file holding it (see
+            source_names) or -1 when it was never submitted
+        """
+        # A compaction may delete segments of the manifest read first, so it is read again once
+        for attempt in range(2):
+            manifest = self._read_manifest(plan)
+            try:
+                return self._probe(plan, manifest, hashes, exclude_file)
+            except FileNotFoundError:
+                if attempt:
+                    raise
+
+    def add(self, plan: ValidationPlan, file_name: str, hashes: np.ndarray) -> int:
+        """
+        Append the keys of an accepted file (replacing the keys of an earlier file of the same name)
+
+        Returns:
+            Number of distinct keys added
+        """
+        keys = np.unique(hashes)
+        with self._locked(plan):
+            manifest = self._read_manifest(plan)
+            replaced = False
+            for source in manifest["sources"]:
+                if source["active"] and source["file_name"] == file_name:
+                    source["active"] = False
+                    replaced = True
+            source_id = len(manifest["sources"])
+            manifest["sources"].append({
+                "file_name": file_name,
+                "added_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "keys": len(keys),
+                "active": True
+            })
+            manifest["segments"].append(self._write_segment(plan, keys, np.full(len(keys), source_id, np.uint32)))
+            if replaced or len(manifest["segments"]) > MAX_SEGMENTS:
+                self._compact(plan, manifest)
+            else:
+                self._write_manifest(plan, manifest)
+        return len(keys)
+
+    def compact(self, plan: ValidationPlan):
+        """Merge all segments into one, dropping the keys of replaced files"""
+        with self._locked(plan):
+            manifest = self._read_manifest(plan)
+            if manifest["segments"]:
+                self._compact(plan, manifest)
+
+    def rebuild(self, plan: ValidationPlan, files: Iterable[Tuple[str, np.ndarray]]) -> int:
+        """
+        Replace the index with the keys of accepted files
+
+        Args:
+            plan: Plan whose index is rebuilt
+            files: (file name, key hashes) of every accepted file, oldest first
+
+        Returns:
+            Number of files indexed
+        """
+        with self._locked(plan):
+            manifest = {"key": list(plan.duplicate_key), "sources": [], "segments": []}
+            keys, sources = [], []
+            latest = {}
+            for file_name, hashes in files:
+                if file_name in latest:
+                    manifest["sources"][latest[file_name]]["active"] = False
+                latest[file_name] = len(manifest["sources"])
+                file_keys = np.unique(hashes)
+                manifest["sources"].append({
+                    "file_name": file_name,
+                    "added_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "keys": len(file_keys),
+                    "active": True
+                })
+                keys.append(file_keys)
+                sources.append(np.full(len(file_keys), latest[file_name], np.uint32))
+            self._merge(plan, manifest, keys, sources)
+        return len(latest)
+
+    def source_names(self, plan: ValidationPlan) -> Dict[int, Dict]:
+        """Get the indexed files by the ids probe returns"""
+        return dict(enumerate(self._read_manifest(plan)["sources"]))
+
+    def _probe(self, plan: ValidationPlan, manifest: Dict, hashes: np.ndarray, exclude_file: str) -> np.ndarray:
+        if not manifest["segments"] or len(hashes) == 0:
+            return np.full(len(hashes), -1, dtype=np.int64)
+        usable = np.array(
+            [source["active"] and source["file_name"] != exclude_file for source in manifest["sources"]], dtype=bool
+        )
+        # Sorted distinct keys make every binary search cache friendly
+        unique, inverse = np.unique(hashes, return_inverse=True)
+        first = np.full(len(unique), -1, dtype=np.int64)
+        for name in manifest["segments"]:
+            keys, sources = self._load_segment(plan, name)
+            if len(keys) == 0:
+                continue
+            positions = np.searchsorted(keys, unique).clip(max=len(keys) - 1)
+            found_sources = sources[positions].astype(np.int64)
+            found = (keys[positions] == unique) & usable[found_sources]
+            # The earliest file a key was claimed in is reported
+            earlier = found & ((first < 0) | (found_sources < first))
+            first[earlier] = found_sources[earlier]
+        return first[inverse]
+
+    def _compact(self, plan: ValidationPlan, manifest: Dict):
+        """Merge the segments of a manifest into one (the caller holds the lock)"""
+        segments = [self._load_segment(plan, name) for name in manifest["segments"]]
+        self._merge(plan, manifest, [keys for keys, _ in segments], [sources for _, sources in segments])
+
+    def _merge(self, plan: ValidationPlan, manifest: Dict, keys: List[np.ndarray], sources: List[np.ndarray]):
+        """Write the keys of the active files as the only segment of a manifest (the caller holds the lock)"""
+        keys = np.concatenate(keys) if keys else np.empty(0, dtype=np.uint64)
+        sources = np.concatenate(sources) if sources else np.empty(0, dtype=np.uint32)
+        active = np.array([source["active"] for source in manifest["sources"]], dtype=bool)
+        if len(sources):
+            keep = active[sources]
+            keys, sources = keys[keep], sources[keep]
+
+        # Sort by key and keep the first (earliest) source of each key
+        order = np.argsort(keys)
+        keys, sources = keys[order], sources[order]
+        first = np.ones(len(keys), dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        starts = np.flatnonzero(first)
+        earliest = np.minimum.reduceat(sources, starts) if len(starts) else sources
+        manifest["segments"] = [self._write_segment(plan, keys[starts], earliest)]
+        self._write_manifest(plan, manifest)
+        self._remove_unlisted(plan, manifest["segments"])
+
+    def _read_manifest(self, plan: ValidationPlan) -> Dict:
+        """Read the manifest, or an empty one when there is none or it was built for another duplicate key"""
+        empty = {"key": list(plan.duplicate_key), "sources": [], "segments": []}
+        try:
+            manifest = json.loads((self.path(plan) / "manifest.json").read_text())
+        except (OSError, ValueError):
+            return empty
+        return manifest if manifest.get("key") == list(plan.duplicate_key) else empty
+
+    def _write_manifest(self, plan: ValidationPlan, manifest: Dict):
+        """Replace the manifest (written to a temporary file, then swapped in)"""
+        path = self.path(plan) / "manifest.json"
+        tmp_path = path.parent / f"{path.name}.{os.getpid()}.tmp"
+        tmp_path.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp_path, path)
+
+    def _write_segment(self, plan: ValidationPlan, keys: np.ndarray, sources: np.ndarray) -> str:
+        """Save the sorted keys and their source ids of a new segment and return its name"""
+        name = uuid.uuid4().hex
+        directory = self.path(plan)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / f"{name}.keys.npy", keys.astype(np.uint64))
+        np.save(directory / f"{name}.sources.npy", sources.astype(np.uint32))
+        return name
+
+    def _load_segment(self, plan: ValidationPlan, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Memory-map a segment, so a probe only reads the pages its searches touch"""
+        directory = self.path(plan)
+        return (
+            np.load(directory / f"{name}.keys.npy", mmap_mode="r"),
+            np.load(directory / f"{name}.sources.npy", mmap_mode="r")
+        )
+
+    def _remove_unlisted(self, plan: ValidationPlan, segments: List[str]):
+        """Delete merged segments and those of an index built for another duplicate key"""
+        keep = set(segments)
+        for path in self.path(plan).glob("*.npy"):
+            if path.name.split(".")[0] not in keep:
+                path.unlink(missing_ok=True)
+
+    @contextmanager
+    def _locked(self, plan: ValidationPlan) -> Iterator[None]:
+        """Serialize writers of one index (API workers and batch processes append concurrently)"""
+        directory = self.path(plan)
+        directory.mkdir(parents=True, exist_ok=True)
+        with open(directory / ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def check_resubmitted(checker: DuplicateChecker, plan: ValidationPlan, file_name: str,
+                      index: InvoiceKeyIndex = None) -> Dict:
+    """
+    Probe the invoice key index with the keys a DuplicateChecker hashed while the file was read
+
+    Args:
+        checker: Checker that folded every chunk of the file
+        plan: Plan of the file
+        file_name: Name of the file (its own earlier keys do not count)
+        index: Index to probe (defaults to data/processed/invoice_keys)
+
+    Returns:
+        Dictionary with the number of indexed files, rows checked and rows already submitted,
+        and the earlier files they were submitted in with the first resubmitted row numbers
+    """
+    index = index or InvoiceKeyIndex()
+    hashes, rows = checker.key_hashes()
+    sources = index.probe(plan, hashes, exclude_file=file_name)
+    resubmitted = sources >= 0
+    results = {
+        "indexed_files": len(index.files(plan)),
+        "checked_rows": len(hashes),
+        "resubmitted_rows": int(resubmitted.sum()),
+        "sources": []
+    }
+    if not results["resubmitted_rows"]:
+        return results
+
+    names = index.source_names(plan)
+    source_ids, counts = np.unique(sources[resubmitted], return_counts=True)
+    for source_id, count in sorted(zip(source_ids.tolist(), counts.tolist()), key=lambda item: -item[1]):
+        results["sources"].append({
+            "file_name": names[source_id]["file_name"],
+            "added_at": names[source_id]["added_at"],
+            "count": count,
+            "rows": rows[sources == source_id][:MAX_INVALID_ROWS].tolist()
+        })
+    results["sources"] = results["sources"][:MAX_RESUBMITTED_SOURCES]
+    return results
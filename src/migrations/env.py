@@ -0,0 +1,56 @@
+import sys
+from logging.config import fileConfig
+from pathlib import Path
+
+import sqlalchemy as sa
+from alembic import context
+
+# alembic.ini only puts src/ on the path, the models are imported as the `src` package
+ROOT_DIR = Path(__file__).resolve().parents[2]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from src import DATABASE_URI  # noqa: E402
+from src.db import models  # noqa: E402, F401  (registers the tables on Base.metadata)
+from src.db.db import Base  # noqa: E402
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def get_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or DATABASE_URI
+
+
+def run_migrations_offline() -> None:
+    """
+    Emit the migration SQL without connecting (`alembic upgrade head --sql`).
+    """
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = sa.create_engine(get_url(), poolclass=sa.pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,75 @@
+"""validation runs and findings
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "validation_runs",
+        sa.Column("id", sa.String(length=36), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("timezone('utc', now())"), nullable=False),
+        sa.Column("source", sa.String(length=16), nullable=False),
+        sa.Column("file_name", sa.String(length=255), nullable=False),
+        sa.Column("customer", sa.String(length=32), nullable=True),
+        sa.Column("product_line", sa.String(length=32), nullable=True),
+        sa.Column("sheet_name", sa.String(length=255), nullable=True),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("strict", sa.Boolean(), nullable=False),
+        sa.Column("total_rows", sa.Integer(), nullable=True),
+        sa.Column("total_file_columns", sa.Integer(), nullable=True),
+        sa.Column("missing_essential_count", sa.Integer(), nullable=False),
+        sa.Column("type_issue_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_validation_runs_customer_product_line_created_at",
+        "validation_runs",
+        ["customer", "product_line", "created_at"],
+    )
+
+    op.create_table(
+        "validation_findings",
+        sa.Column("id", sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column("run_id", sa.String(length=36), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("timezone('utc', now())"), nullable=False),
+        sa.Column("customer", sa.String(length=32), nullable=True),
+        sa.Column("product_line", sa.String(length=32), nullable=True),
+        sa.Column("kind", sa.String(length=32), nullable=False),
+        sa.Column("column_name", sa.String(length=255), nullable=False),
+        sa.Column("expected", sa.String(length=32), nullable=True),
+        sa.Column("actual", sa.String(length=64), nullable=True),
+        sa.Column("invalid_count", sa.Integer(), nullable=True),
+        sa.Column("invalid_percentage", sa.Float(), nullable=True),
+        sa.Column("detail", sa.JSON(), nullable=True),
+        sa.ForeignKeyConstraint(["run_id"], ["validation_runs.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_validation_findings_customer_product_line_created_at",
+        "validation_findings",
+        ["customer", "product_line", "created_at"],
+    )
+    op.create_index("ix_validation_findings_run_id", "validation_findings", ["run_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_validation_findings_run_id", table_name="validation_findings")
+    op.drop_index("ix_validation_findings_customer_product_line_created_at", table_name="validation_findings")
+    op.drop_table("validation_findings")
+    op.drop_index("ix_validation_runs_customer_product_line_created_at", table_name="validation_runs")
+    op.drop_table("validation_runs")
@@ -0,0 +1,176 @@
+"""
+Parser engine selection for the file readers
+Prefers the fastest installed engines (pyarrow for CSV, calamine for Excel) and falls back to pandas' defaults
+"""
+import datetime
+import importlib.util
+import logging
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Engines in order of preference; the last one of each ships with pandas
+CSV_ENGINES = ("pyarrow", "c")
+EXCEL_ENGINES = ("calamine", "openpyxl")
+# 'numpy' keeps pandas' classic dtypes, the others match pandas' dtype_backend options
+DTYPE_BACKENDS = ("numpy", "numpy_nullable", "pyarrow")
+
+# Bytes of CSV text pyarrow parses at a time when streaming (column types are inferred from the first block)
+CSV_BLOCK_SIZE = 16 * 1024 * 1024
+
+# Optional package each engine or backend needs
+_REQUIRED_MODULES = {"pyarrow": "pyarrow", "calamine": "python_calamine"}
+
+@dataclass(frozen=True)
+class ReaderEngines:
+    """Resolved engines used to parse uploads"""
+    csv: str
+    excel: str
+    dtype_backend: str
+
+    @property
+    def read_kwargs(self) -> Dict[str, str]:
+        """Extra keyword arguments for pd.read_csv / pd.read_excel"""
+        return {} if self.dtype_backend == "numpy" else {"dtype_backend": self.dtype_backend}
+
+def engine_available(engine: str) -> bool:
+    """Check if the package an engine or dtype backend needs is installed"""
+    module = _REQUIRED_MODULES.get(engine)
+    return module is None or importlib.util.find_spec(module) is not None
+
+def resolve_engines(csv: str = None, excel: str = None, dtype_backend: str = None) -> ReaderEngines:
+    """
+    Resolve the engines to read files with
+
+    Each choice comes from the argument, else the READER_CSV_ENGINE, READER_EXCEL_ENGINE
+    and READER_DTYPE_BACKEND environment variables, else 'auto'. 'auto' picks the fastest
+    installed engine, and a requested engine that is not installed falls back to it.
+
+    Args:
+        csv: CSV engine ('pyarrow', 'c' or 'auto')
+        excel: Excel engine ('calamine', 'openpyxl' or 'auto')
+        dtype_backend: 'numpy', 'numpy_nullable' or 'pyarrow'
+
+    Returns:
+        The resolved engines
+    """
+    csv = csv or os.getenv("READER_CSV_ENGINE", "auto")
+    excel = excel or os.getenv("READER_EXCEL_ENGINE", "auto")
+    dtype_backend = dtype_backend or os.getenv("READER_DTYPE_BACKEND", "numpy")
+
+    return ReaderEngines(
+        csv=_resolve(csv, CSV_ENGINES, "CSV engine"),
+        excel=_resolve(excel, EXCEL_ENGINES, "Excel engine"),
+        dtype_backend=_resolve(dtype_backend, DTYPE_BACKENDS, "dtype backend", fallback="numpy")
+    )
+
+@lru_cache(maxsize=None)
+def get_default_engines() -> ReaderEngines:
+    """Engines resolved from the environment, computed once per process"""
+    return resolve_engines()
+
+def _resolve(choice: str, options: tuple, kind: str, fallback: str = None) -> str:
+    """Resolve one engine choice against its options, falling back when it is unknown or not installed"""
+    if choice in options and engine_available(choice):
+        return choice
+    if choice != "auto":
+        logger.warning(f"{kind} '{choice}' is not available, falling back")
+    if fallback is not None:
+        return fallback
+    return next(engine for engine in options if engine_available(engine))
+
+def read_csv_table(source, header: List[Any]):
+    """
+    Parse a whole CSV file into an Arrow table with pyarrow's multi-threaded reader
+
+    Columns are renamed to the pandas-style header (deduplicated, 'Unnamed: N' for blanks)
+    so the frames match the C parser. Raises pyarrow.ArrowInvalid (a ValueError) when a
+    column cannot be parsed with the type inferred from its first block.
+    """
+    from pyarrow import csv
+
+    table = csv.read_csv(source)
+    if len(header) == table.num_columns:
+        table = table.rename_columns([str(name) for name in header])
+    return table
+
+def iter_csv_tables(source, header: List[Any], rows: int, block_size: int = None) -> Iterator[Any]:
+    """
+    Stream a CSV file as Arrow tables of `rows` rows (the last one shorter), parsing one block at a time
+
+    Memory stays bounded by the block (block_size, defaults to CSV_BLOCK_SIZE) and chunk sizes
+    whatever the length of the file. Columns are renamed like read_csv_table. Raises
+    pyarrow.ArrowInvalid (a ValueError) while iterating when a later block holds values the
+    types inferred from the first block cannot hold.
+    """
+    import pyarrow as pa
+    from pyarrow import csv
+
+    reader = csv.open_csv(source, read_options=csv.ReadOptions(block_size=block_size or CSV_BLOCK_SIZE))
+    names = [str(name) for name in header] if len(header) == len(reader.schema.names) else None
+    pending, pending_rows, yielded = [], 0, False
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= rows:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            yield _rename(table.slice(0, rows), names)
+            yielded = True
+            rest = table.slice(rows)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+    if pending_rows or not yielded:
+        # A file with a header only still gives one (empty) table
+        yield _rename(pa.Table.from_batches(pending, schema=reader.schema), names)
+
+def _rename(table, names: Optional[List[str]]):
+    return table.rename_columns(names) if names is not None else table
+
+def arrow_to_frame(table, engines: ReaderEngines, offset: int = 0) -> pd.DataFrame:
+    """Convert an Arrow table (or a slice of one) to a DataFrame indexed from `offset`"""
+    if engines.dtype_backend == "pyarrow":
+        df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    else:
+        df = table.to_pandas(date_as_object=False)
+        if engines.dtype_backend == "numpy_nullable":
+            df = df.convert_dtypes(dtype_backend="numpy_nullable", convert_integer=False)
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    return df
+
+def apply_dtype_backend(df: pd.DataFrame, engines: ReaderEngines) -> pd.DataFrame:
+    """Convert a frame built from Python rows to the configured dtype backend"""
+    if engines.dtype_backend == "numpy":
+        return df
+    # convert_integer=False keeps whole-number float columns as floats, same as the parsers do
+    return df.convert_dtypes(dtype_backend=engines.dtype_backend, convert_integer=False)
+
+def open_calamine(source):
+    """Open an .xlsx or .xls workbook with calamine (path or bytes buffer)"""
+    from python_calamine import CalamineWorkbook
+
+    if hasattr(source, "read"):
+        return CalamineWorkbook.from_filelike(source)
+    return CalamineWorkbook.from_path(os.fspath(source))
+
+def iter_calamine_rows(sheet) -> Iterator[tuple]:
+    """
+    Iterate the rows of a calamine sheet with cell values converted like pandas does
+
+    Blank cells become None, whole floats become int and dates become Timestamps.
+    """
+    for row in sheet.iter_rows():
+        yield tuple(_convert_calamine_cell(value) for value in row)
+
+def _convert_calamine_cell(value: Any) -> Optional[Any]:
+    """Convert one calamine cell value to what the openpyxl reader would return"""
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, datetime.date):
+        return pd.Timestamp(value)
+    return value
@@ -0,0 +1,322 @@
+"""
+Reference master-data checks (branches, ship-to numbers, items)
+Master lists are loaded once into sorted code hashes and read again only when their file changes
+"""
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import REFERENCE_TABLES, get_validation_plan
+from duplicates import key_texts
+from validation import FIRST_DATA_ROW, MAX_INVALID_ROWS
+
+# Where master lists are read from; override with REFERENCE_DATA_DIR (a directory or s3://bucket/prefix)
+DEFAULT_REFERENCE_DATA_DIR = Path(__file__).resolve().parent.parent / "data" / "reference"
+# Unknown codes listed per column with their counts and row numbers (all unknown codes are counted)
+MAX_UNKNOWN_CODES = 20
+# S3 master lists are checked for a new ETag at most this often, local files on every lookup
+S3_CHECK_SECONDS = 60
+
+def hash_codes(values) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Normalize and hash distinct code values (vectorized)
+
+    Codes compare as trimmed text, with whole floats written as integers, so a branch
+    matches whether it was read as 1042, 1042.0 or ' 1042'.
+
+    Returns:
+        Tuple of (normalized texts, uint64 hashes), one per value
+    """
+    texts = pd.Index(key_texts(values), dtype=object).str.strip().to_numpy(dtype=object)
+    return texts, pd.util.hash_array(texts)
+
+@dataclass(frozen=True)
+class ReferenceTable:
+    """One master list held as the sorted distinct hashes of its codes (8 bytes per code)"""
+    name: str
+    source: str
+    version: str
+    hashes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def contains(self, hashes: np.ndarray) -> np.ndarray:
+        """Mask of the code hashes found in the master list (one binary search each)"""
+        if not len(self.hashes):
+            return np.zeros(len(hashes), dtype=bool)
+        positions = np.searchsorted(self.hashes, hashes).clip(max=len(self.hashes) - 1)
+        return self.hashes[positions] == hashes
+
+class ReferenceStore:
+    """
+    Master lists of REFERENCE_TABLES, loaded on first use and cached for the life of the process
+
+    Each lookup compares the file's version, its modification time and size for a local file
+    or its ETag for S3, with the cached one, so Streamlit reruns, API requests and batch
+    files reuse the loaded list and an updated list is picked up without a restart.
+    S3 versions are checked at most every S3_CHECK_SECONDS.
+    """
+
+    def __init__(self, location: str = None):
+        self.location = str(location or os.getenv("REFERENCE_DATA_DIR") or DEFAULT_REFERENCE_DATA_DIR)
+        self._tables = {}
+        self._checked_at = {}
+        self._lock = threading.Lock()
+        self._s3_client = None
+
+    def source(self, name: str) -> str:
+        """Get the path or s3:// URI a master list is read from"""
+        return f"{self.location.rstrip('/')}/{REFERENCE_TABLES[name]['file']}"
+
+    def table(self, name: str) -> ReferenceTable:
+        """
+        Get a master list, reading it again only when its file changed
+
+        Raises:
+            FileNotFoundError: When the master list does not exist
+        """
+        source = self.source(name)
+        cached = self._tables.get(name)
+        if cached is not None and cached.source == source:
+            if self._is_s3(source) and time.monotonic() - self._checked_at.get(name, 0) < S3_CHECK_SECONDS:
+                return cached
+            version = self._version(source)
+            if version == cached.version:
+                self._checked_at[name] = time.monotonic()
+                return cached
+        else:
+            version = self._version(source)
+
+        # The version is taken before reading, so a file replaced meanwhile is read again next time
+        table = ReferenceTable(name, source, version, self._load(source, REFERENCE_TABLES[name]["column"]))
+        with self._lock:
+            self._tables[name] = table
+            self._checked_at[name] = time.monotonic()
+        return table
+
+    def version(self, name: str) -> Optional[str]:
+        """Get the version of a master list after checking its file (None when it cannot be read)"""
+        try:
+            return self.table(name).version
+        except Exception:
+            return None
+
+    def _version(self, source: str) -> str:
+        """Get the modification time and size of a local file, or the ETag of an S3 object"""
+        if self._is_s3(source):
+            bucket, key = self._split_s3(source)
+            try:
+                return self._s3().head_object(Bucket=bucket, Key=key)["ETag"]
+            except Exception as e:
+                if getattr(e, "response", {}).get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                    raise FileNotFoundError(f"Master list {source} not found") from e
+                raise
+        try:
+            stat = os.stat(source)
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"Master list {source} not found") from e
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def _load(self, source: str, column: str) -> np.ndarray:
+        """Read the code column of a master list into its sorted distinct hashes"""
+        data = source
+        if self._is_s3(source):
+            bucket, key = self._split_s3(source)
+            data = io.BytesIO(self._s3().get_object(Bucket=bucket, Key=key)["Body"].read())
+        if source.endswith(".parquet"):
+            codes = pd.read_parquet(data, columns=[column])[column]
+        else:
+            codes = pd.read_csv(data, usecols=[column], dtype=str)[column]
+        texts, hashes = hash_codes(codes.dropna().unique())
+        return np.unique(hashes[texts != ""])
+
+    def _s3(self):
+        """S3 client, created on first use (boto3 is only needed for master lists on S3)"""
+        if self._s3_client is None:
+            import boto3
+            self._s3_client = boto3.client("s3")
+        return self._s3_client
+
+    @staticmethod
+    def _is_s3(source: str) -> bool:
+        return source.startswith("s3://")
+
+    @staticmethod
+    def _split_s3(source: str) -> Tuple[str, str]:
+        bucket, _, key = source[len("s3://"):].partition("/")
+        return bucket, key
+
+@lru_cache(maxsize=None)
+def _shared_store(location: str) -> ReferenceStore:
+    return ReferenceStore(location)
+
+def get_reference_store(location: str = None) -> ReferenceStore:
+    """Get the process-wide store of a location (defaults to REFERENCE_DATA_DIR or data/reference)"""
+    return _shared_store(str(location or os.getenv("REFERENCE_DATA_DIR") or DEFAULT_REFERENCE_DATA_DIR))
+
+def reference_versions(customer: str, product_line: str = None, store: ReferenceStore = None) -> Tuple:
+    """Get the versions of a plan's master lists, to key cached reference results (changes when a list does)"""
+    store = store or get_reference_store()
+    return tuple(store.version(name) for name in get_validation_plan(customer, product_line).references.values())
+
+class ReferenceChecker:
+    """
+    Folds the codes of a file that are missing from their master lists, chunk by chunk
+
+    Each chunk's reference columns are factorized and only their distinct codes are hashed
+    and looked up, so a chunk costs one hash per distinct code plus one gather per row.
+    Empty values are not checked, they are reported by the data type validation. Master
+    lists that cannot be read are reported as unavailable instead of failing the file.
+
+    Usage, reading the file once with the other checks:
+
+        references = ReferenceChecker(customer, product_line)
+        type_results = validate_data_types_chunked(references.watch(chunks), customer, product_line)
+        reference_results = references.results()
+    """
+
+    def __init__(self, customer: str, product_line: str = None, store: ReferenceStore = None):
+        self.references = get_validation_plan(customer, product_line).references
+        self.store = store or get_reference_store()
+        self.total_rows = 0
+        self.columns_seen = None
+        self.tables = {}
+        self.errors = {}
+        self.states = {col: _new_reference_state() for col in self.references}
+
+    def fold(self, chunk: pd.DataFrame):
+        """Look up the codes of one chunk in the master lists of its reference columns"""
+        self.total_rows += len(chunk)
+        if self.columns_seen is None:
+            self.columns_seen = set(chunk.columns)
+        for col, name in self.references.items():
+            if col not in chunk.columns:
+                continue
+            table = self._table(col, name)
+            if table is None:
+                continue
+
+            codes, uniques = pd.factorize(chunk[col])
+            texts, hashes = hash_codes(uniques)
+            filled = texts != ""
+            unknown_codes = filled & ~table.contains(hashes)
+            state = self.states[col]
+            # Code -1 (empty) takes the appended False
+            state["checked_rows"] += int(np.append(filled, False)[codes].sum())
+            if not unknown_codes.any():
+                continue
+            unknown = np.append(unknown_codes, False)[codes]
+            state["hashes"].append(hashes[codes[unknown]])
+            state["rows"].append(chunk.index.to_numpy()[unknown].astype("int64") + FIRST_DATA_ROW)
+            for code_hash, text in zip(hashes[unknown_codes].tolist(), texts[unknown_codes]):
+                state["values"].setdefault(code_hash, text)
+
+    def watch(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Fold each chunk while passing it on (e.g. to validate_data_types_chunked)"""
+        for chunk in chunks:
+            self.fold(chunk)
+            yield chunk
+
+    def results(self) -> Dict:
+        """
+        Get the reference results of the folded chunks
+
+        Returns:
+            Dictionary with one check per reference column in the file (rows checked, rows and
+            distinct codes missing from the master list and the MAX_UNKNOWN_CODES most frequent
+            unknown codes with their counts and row numbers), the checks skipped because the file
+            lacks the column or the master list could not be read, and the total unknown rows
+        """
+        columns_seen = self.columns_seen or set()
+        checks = []
+        unavailable = []
+        skipped = []
+        for col, name in self.references.items():
+            if col not in columns_seen:
+                skipped.append({"column": col, "table": name})
+                continue
+            if col in self.errors:
+                unavailable.append({"column": col, "table": name, "error": self.errors[col]})
+                continue
+
+            state = self.states[col]
+            hashes, rows = _concatenate(state["hashes"], np.uint64), _concatenate(state["rows"], np.int64)
+            # Hash-based group-by: most frequent codes first, then in order of their first row
+            code_hashes, first, counts = np.unique(hashes, return_index=True, return_counts=True)
+            order = np.lexsort((first, -counts))[:MAX_UNKNOWN_CODES]
+            check = {
+                "column": col,
+                "table": name,
+                "table_codes": len(self.tables[col]),
+                "checked_rows": state["checked_rows"],
+                "unknown_rows": len(hashes),
+                "unknown_codes": len(code_hashes),
+                "unknown_percentage": round(len(hashes) / max(self.total_rows, 1) * 100, 2),
+                "codes": [
+                    {
+                        "code": state["values"][code_hash],
+                        "count": int(counts[position]),
+                        "rows": rows[hashes == code_hash][:MAX_INVALID_ROWS].tolist()
+                    }
+                    for position, code_hash in zip(order.tolist(), code_hashes[order].tolist())
+                ]
+            }
+            check["status"] = "❌ Unknown Codes" if check["unknown_rows"] else "✅ Passed"
+            checks.append(check)
+
+        return {
+            "checks": checks,
+            "unavailable": unavailable,
+            "skipped": skipped,
+            "unknown_rows": sum(check["unknown_rows"] for check in checks),
+            "total_rows": self.total_rows
+        }
+
+    def _table(self, col: str, name: str) -> Optional[ReferenceTable]:
+        """Get the master list of a column once per file (None when it cannot be read)"""
+        if col not in self.tables and col not in self.errors:
+            try:
+                self.tables[col] = self.store.table(name)
+            except Exception as e:
+                self.errors[col] = str(e) or type(e).__name__
+        return self.tables.get(col)
+
+def validate_references(chunks: Iterable[pd.DataFrame], customer: str, product_line: str = None,
+                        store: ReferenceStore = None) -> Dict:
+    """
+    Check the code columns of a file against the master lists of its customer / product line
+
+    Args:
+        chunks: DataFrame chunks of the same file (e.g. from file_readers.iter_chunks), or [df]
+        customer: Selected customer
+        product_line: Selected product line (None for NVR/WW)
+        store: Where master lists are read from (defaults to the shared store of REFERENCE_DATA_DIR)
+
+    Returns:
+        Reference results (see ReferenceChecker.results)
+    """
+    checker = ReferenceChecker(customer, product_line, store)
+    for chunk in chunks:
+        checker.fold(chunk)
+    return checker.results()
+
+def _new_reference_state() -> Dict:
+    """Get the empty running state of a reference column"""
+    return {
+        "checked_rows": 0,
+        "hashes": [],
+        "rows": [],
+        "values": {}
+    }
+
+def _concatenate(arrays, dtype) -> np.ndarray:
+    return np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
@@ -0,0 +1,106 @@
+"""
+Exportable validation reports
+Kept free of Streamlit so batch jobs and the CLI can build the same reports
+"""
+import pandas as pd
+from typing import Dict, List
+
+def create_export_report(results: Dict, type_results: Dict, customer: str, product_line: str, filename: str,
+                         rule_results: Dict = None, duplicate_results: Dict = None,
+                         resubmission_results: Dict = None, reference_results: Dict = None) -> pd.DataFrame:
+    """Create exportable validation report (row rule, duplicate, resubmission and reference columns when given)"""
+    
+    report_data = {
+        "Customer": [customer],
+        "Product Line": [product_line or "N/A"],
+        "File Name": [filename],
+        "Total File Columns": [results["total_file_columns"]],
+        "Missing Essential": [", ".join(str(col) for col in results["missing_essential"])],
+        "Extra Columns": [", ".join(str(col) for col in results["extra_columns"])],
+        "Essential Match Rate": [f"{len(results['matching_essential']) / max(results['total_essential_required'], 1) * 100:.1f}%"],
+        "Data Type Issues": [len(type_results.get("type_issues", []))],
+        "Data Type Match Rate": [f"{len(type_results.get('type_matches', [])) / max(type_results.get('total_checked', 1), 1) * 100:.1f}%"]
+    }
+    
+    if results.get("suggestions"):
+        report_data["Column Suggestions"] = ["; ".join(
+            f"{col} -> " + ", ".join(format_suggestion(s) for s in suggestions)
+            for col, suggestions in results["suggestions"].items()
+        )]
+    
+    if type_results.get("strict"):
+        report_data["Invalid Values"] = ["; ".join(
+            f"{issue['column']}: {issue['invalid_count']} ({issue['invalid_percentage']}%) rows {issue['invalid_rows']}"
+            for issue in type_results["type_issues"]
+        )]
+    
+    if rule_results is not None:
+        report_data["Rule Violations"] = [len(rule_results.get("rule_violations", []))]
+        report_data["Violated Rules"] = ["; ".join(
+            f"{violation['rule']}: {violation['violation_count']} ({violation['violation_percentage']}%) "
+            f"rows {violation['invalid_rows']}"
+            for violation in rule_results.get("rule_violations", [])
+        )]
+    
+    if duplicate_results is not None:
+        report_data["Duplicate Lines"] = [duplicate_results.get("duplicate_rows", 0)]
+        report_data["Duplicate Groups"] = ["; ".join(
+            " / ".join(str(value) for value in group["key"].values()) + f": {group['count']} rows {group['rows']}"
+            for group in duplicate_results.get("groups", [])
+        )]
+    
+    if resubmission_results is not None:
+        report_data["Resubmitted Lines"] = [resubmission_results.get("resubmitted_rows", 0)]
+        report_data["Resubmitted From"] = ["; ".join(
+            f"{source['file_name']}: {source['count']} rows {source['rows']}"
+            for source in resubmission_results.get("sources", [])
+        )]
+    
+    if reference_results is not None:
+        report_data["Unknown Code Lines"] = [reference_results.get("unknown_rows", 0)]
+        report_data["Unknown Codes"] = ["; ".join(
+            f"{check['column']}: " + ", ".join(f"{code['code']} ({code['count']})" for code in check["codes"])
+            for check in reference_results.get("checks", []) if check["unknown_rows"]
+        )]
+    
+    return pd.DataFrame(report_data)
+
+def format_suggestion(suggestion: Dict) -> str:
+    """Describe one column suggestion for display, e.g. 'Customer Invoice#' (same after normalizing)"""
+    if suggestion["match"] == "normalized":
+        return f"{suggestion['column']!r} (same after normalizing)"
+    return f"{suggestion['column']!r} ({suggestion['score']:.0%} similar)"
+
+def create_batch_report(entries: List[Dict]) -> pd.DataFrame:
+    """
+    Create one consolidated report for a batch of validated files
+    
+    Args:
+        entries: Per-file results from batch.validate_path
+    
+    Returns:
+        DataFrame with one create_export_report row per file plus its status
+    """
+    rows = []
+    for entry in entries:
+        if entry["results"] is not None:
+            row = create_export_report(
+                entry["results"], entry["type_results"] or {},
+                entry["customer"], entry["product_line"], entry["file_name"],
+                entry.get("rule_results"), entry.get("duplicate_results"), entry.get("resubmission_results"),
+                entry.get("reference_results")
+            )
+        else:
+            row = pd.DataFrame({
+                "Customer": [entry["customer"] or "Unknown"],
+                "Product Line": [entry["product_line"] or "N/A"],
+                "File Name": [entry["file_name"]]
+            })
+        row.insert(3, "Status", entry["status"])
+        row["Error"] = entry["error"] or ""
+        rows.append(row)
+    
+    if not rows:
+        return pd.DataFrame()
+    # convert_dtypes keeps counts as integers when error rows leave them empty
+    return pd.concat(rows, ignore_index=True).convert_dtypes()
@@ -1,6 +1,9 @@
 import logging
+from collections.abc import Iterable, Iterator
+from itertools import islice
 from typing import Type
 
+import sqlalchemy as sa
 from pydantic import BaseModel
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
@@ -9,6 +12,9 @@ from src import PROJECT_ENVS
 
 logger = logging.getLogger(__name__)
 
+# Rows per INSERT/upsert statement and ids per IN query / page
+DEFAULT_BATCH_SIZE = 1000
+
 
 class BaseRepository:
     def __init__(self, db_session: Session, model_schema: BaseModel, model_table: Type):
@@ -17,6 +23,9 @@ class BaseRepository:
         self.model_schema = model_schema
 
     def alembic_to_pydantic(self, db_record: Type):
+        if isinstance(db_record, Iterator):
+            # Converted one record at a time as the caller consumes them
+            return (self.model_schema.model_validate(record) for record in db_record)
         if not db_record:
             return db_record
         if isinstance(db_record, list):
@@ -73,3 +82,135 @@ class BaseRepository:
             logger.error(f"Database error occurred: {e}", extra={"error": e}, exc_info=PROJECT_ENVS.DEBUG)
             self.db_session.rollback()
             return 0
+
+    def create_many(self, data: Iterable[BaseModel | dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Insert records with one executemany INSERT per batch and a single commit.
+
+        Returns the number of inserted records, or 0 if the whole insert was rolled back.
+        """
+        try:
+            inserted = self.insert_many(data, batch_size)
+            self.db_session.commit()
+            return inserted
+        except SQLAlchemyError as e:
+            logger.error(f"Database error occurred: {e}", extra={"error": e}, exc_info=PROJECT_ENVS.DEBUG)
+            self.db_session.rollback()
+            return 0
+
+    def insert_many(self, data: Iterable[BaseModel | dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Insert records with one executemany INSERT per batch, without committing.
+
+        For inserts that share a transaction with other writes: the caller commits, and rolls back
+        on SQLAlchemyError. Returns the number of inserted records.
+        """
+        inserted = 0
+        for batch in _batched(data, batch_size):
+            rows = [_to_row(record) for record in batch]
+            self.db_session.execute(sa.insert(self.model_table), rows)
+            inserted += len(rows)
+        return inserted
+
+    def read_many(self, ids: Iterable[str], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[BaseModel]:
+        """
+        Read records by id with one IN query per batch of ids.
+
+        Records are converted to pydantic lazily as the returned iterator is consumed.
+        Ids that do not exist are skipped, and results are not ordered like `ids`.
+        """
+        for batch in _batched(ids, batch_size):
+            try:
+                query = sa.select(self.model_table).where(self.model_table.id.in_(batch))
+                records = self.db_session.scalars(query).all()
+            except SQLAlchemyError as e:
+                logger.error(f"Database error occurred: {e}", extra={"error": e}, exc_info=PROJECT_ENVS.DEBUG)
+                return
+            yield from self.alembic_to_pydantic(iter(records))
+
+    def upsert_many(
+        self,
+        data: Iterable[BaseModel | dict],
+        index_elements: list[str] = None,
+        fields: list[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> int:
+        """
+        Insert records, updating `fields` of the ones that conflict on `index_elements`.
+
+        Uses INSERT ... ON CONFLICT (PostgreSQL and SQLite). By default conflicts are detected on
+        the primary key and every other column is updated; with no fields to update, conflicting
+        records are left untouched. Returns the number of processed records (0 if rolled back).
+
+        Raises ValueError, before writing anything, when the session is bound to another dialect.
+        """
+        table = self.model_table.__table__
+        index_elements = index_elements or [column.name for column in table.primary_key.columns]
+        fields = fields if fields is not None else [c.name for c in table.columns if c.name not in index_elements]
+
+        dialect = self.db_session.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise ValueError(f"upsert_many needs PostgreSQL or SQLite, the session is bound to {dialect}")
+
+        statement = insert(self.model_table)
+        if fields:
+            statement = statement.on_conflict_do_update(
+                index_elements=index_elements, set_={field: statement.excluded[field] for field in fields}
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=index_elements)
+
+        processed = 0
+        try:
+            for batch in _batched(data, batch_size):
+                rows = [_to_row(record) for record in batch]
+                self.db_session.execute(statement, rows)
+                processed += len(rows)
+            self.db_session.commit()
+            return processed
+        except SQLAlchemyError as e:
+            logger.error(f"Database error occurred: {e}", extra={"error": e}, exc_info=PROJECT_ENVS.DEBUG)
+            self.db_session.rollback()
+            return 0
+
+    def iter_all(self, *filters, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[BaseModel]:
+        """
+        Stream every record (optionally filtered) in id order with keyset pagination.
+
+        Each page is `WHERE id > <last id> ORDER BY id LIMIT batch_size`, so deep pages cost the
+        same as the first one (no OFFSET scans) and only one page is held in memory.
+        """
+        last_id = None
+        while True:
+            query = sa.select(self.model_table).where(*filters).order_by(self.model_table.id).limit(batch_size)
+            if last_id is not None:
+                query = query.where(self.model_table.id > last_id)
+            try:
+                records = self.db_session.scalars(query).all()
+            except SQLAlchemyError as e:
+                logger.error(f"Database error occurred: {e}", extra={"error": e}, exc_info=PROJECT_ENVS.DEBUG)
+                return
+            yield from self.alembic_to_pydantic(iter(records))
+            if len(records) < batch_size:
+                return
+            last_id = records[-1].id
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """
+    Split an iterable into lists of at most `size` items.
+    """
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _to_row(record: BaseModel | dict) -> dict:
+    """
+    Column values of a record for an INSERT statement.
+    """
+    return record.model_dump() if isinstance(record, BaseModel) else record
@@ -0,0 +1,279 @@
+import json
+import logging
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+
+import sqlalchemy as sa
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from src import DATABASE_URI, PROJECT_ENVS
+from src.db.db import FastAPISessionMaker
+from src.db.models import ValidationFinding, ValidationRun
+from src.repository.base import DEFAULT_BATCH_SIZE, BaseRepository
+from src.schema.validation import ValidationFindingModel, ValidationRunModel
+
+logger = logging.getLogger(__name__)
+
+MISSING_ESSENTIAL = "missing_essential"
+TYPE_MISMATCH = "type_mismatch"
+RULE_VIOLATION = "rule_violation"
+DUPLICATE_KEY = "duplicate_key"
+RESUBMITTED_KEY = "resubmitted_key"
+UNKNOWN_CODE = "unknown_code"
+
+_session_maker = FastAPISessionMaker(DATABASE_URI)
+
+
+class ValidationRunRepository(BaseRepository):
+    def __init__(self, db_session: Session):
+        super().__init__(db_session, ValidationRunModel, ValidationRun)
+
+    def save_entries(self, entries: Iterable[dict], source: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Store batch validation entries (see `batch.validate_path`) as runs and findings.
+
+        Runs and findings are bulk inserted in batches within a single transaction.
+        Returns the number of stored runs, or 0 if the whole insert was rolled back.
+        """
+        created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+        runs = []
+        findings = []
+        for entry in entries:
+            run = _run_row(entry, source, created_at)
+            runs.append(run)
+            findings.extend(_finding_rows(entry, run))
+
+        try:
+            self.insert_many(runs, batch_size)
+            ValidationFindingRepository(self.db_session).insert_many(findings, batch_size)
+            self.db_session.commit()
+            return len(runs)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error occurred: {e}", extra={"error": e}, exc_info=PROJECT_ENVS.DEBUG)
+            self.db_session.rollback()
+            return 0
+
+    def recent_failures(
+        self, customer: str, product_line: str | None = None, days: int = 90, limit: int | None = None
+    ) -> list[ValidationRunModel]:
+        """
+        Failed and errored runs of a customer / product line in the last `days` days, newest first.
+        """
+        query = (
+            sa.select(ValidationRun)
+            .where(*_scope(ValidationRun, customer, product_line, days), ValidationRun.status != "passed")
+            .order_by(ValidationRun.created_at.desc())
+            .limit(limit)
+        )
+        try:
+            return self.alembic_to_pydantic(self.db_session.scalars(query).all())
+        except SQLAlchemyError as e:
+            logger.error(f"Database error occurred: {e}", extra={"error": e}, exc_info=PROJECT_ENVS.DEBUG)
+            return []
+
+
+class ValidationFindingRepository(BaseRepository):
+    def __init__(self, db_session: Session):
+        super().__init__(db_session, ValidationFindingModel, ValidationFinding)
+
+    def column_trend(self, customer: str, product_line: str | None = None, days: int = 90) -> list[dict]:
+        """
+        How often each column failed in the last `days` days, most frequent first.
+
+        Returns dicts with column_name, kind, count and last_seen.
+        """
+        query = (
+            sa.select(
+                ValidationFinding.column_name,
+                ValidationFinding.kind,
+                sa.func.count().label("count"),
+                sa.func.max(ValidationFinding.created_at).label("last_seen"),
+            )
+            .where(*_scope(ValidationFinding, customer, product_line, days))
+            .group_by(ValidationFinding.column_name, ValidationFinding.kind)
+            .order_by(sa.desc("count"))
+        )
+        try:
+            return [dict(row._mapping) for row in self.db_session.execute(query)]
+        except SQLAlchemyError as e:
+            logger.error(f"Database error occurred: {e}", extra={"error": e}, exc_info=PROJECT_ENVS.DEBUG)
+            return []
+
+
+def persist_validation_entries(entries: list[dict], source: str) -> int:
+    """
+    Store validation entries in a new session.
+
+    Meant to run off the request path (FastAPI BackgroundTasks, end of a CLI run); database
+    errors are logged and reported as 0 stored runs instead of being raised.
+    """
+    try:
+        with _session_maker.context_session() as session:
+            return ValidationRunRepository(session).save_entries(entries, source)
+    except SQLAlchemyError as e:
+        logger.error(f"Database error occurred: {e}", extra={"error": e}, exc_info=PROJECT_ENVS.DEBUG)
+        return 0
+
+
+def _scope(table, customer: str, product_line: str | None, days: int) -> list:
+    """
+    Filters matching the (customer, product_line, created_at) index of a table.
+    """
+    since = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+    product_filter = table.product_line.is_(None) if product_line is None else table.product_line == product_line
+    return [table.customer == customer, product_filter, table.created_at >= since]
+
+
+def _run_row(entry: dict, source: str, created_at: datetime) -> dict:
+    results = entry.get("results") or {}
+    type_results = entry.get("type_results") or {}
+    return {
+        "id": str(uuid.uuid4()),
+        "created_at": created_at,
+        "source": source,
+        "file_name": entry["file_name"],
+        "customer": entry.get("customer"),
+        "product_line": entry.get("product_line"),
+        "sheet_name": entry.get("sheet_name"),
+        "status": entry["status"],
+        "error": entry.get("error"),
+        "strict": bool(type_results.get("strict", False)),
+        "total_rows": type_results.get("total_rows"),
+        "total_file_columns": results.get("total_file_columns"),
+        "missing_essential_count": len(results.get("missing_essential", [])),
+        "type_issue_count": len(type_results.get("type_issues", [])),
+    }
+
+
+def _finding_rows(entry: dict, run: dict) -> list[dict]:
+    shared = {
+        "run_id": run["id"],
+        "created_at": run["created_at"],
+        "customer": run["customer"],
+        "product_line": run["product_line"],
+    }
+    results = entry.get("results") or {}
+    type_results = entry.get("type_results") or {}
+    rule_results = entry.get("rule_results") or {}
+    duplicate_results = entry.get("duplicate_results") or {}
+    resubmission_results = entry.get("resubmission_results") or {}
+    reference_results = entry.get("reference_results") or {}
+    rows = []
+
+    for column in results.get("missing_essential", []):
+        suggestions = results.get("suggestions", {}).get(column)
+        rows.append(
+            {
+                **shared,
+                "kind": MISSING_ESSENTIAL,
+                "column_name": column,
+                "expected": None,
+                "actual": None,
+                "invalid_count": None,
+                "invalid_percentage": None,
+                "detail": _to_json({"suggestions": suggestions}) if suggestions else None,
+            }
+        )
+
+    for issue in type_results.get("type_issues", []):
+        rows.append(
+            {
+                **shared,
+                "kind": TYPE_MISMATCH,
+                "column_name": issue["column"],
+                "expected": issue.get("expected"),
+                "actual": issue.get("actual"),
+                "invalid_count": issue.get("invalid_count"),
+                "invalid_percentage": issue.get("invalid_percentage"),
+                "detail": _to_json(
+                    {"sample_values": issue.get("sample_values", []), "invalid_rows": issue.get("invalid_rows", [])}
+                ),
+            }
+        )
+
+    for violation in rule_results.get("rule_violations", []):
+        # Rules are tracked under the first column they read
+        rows.append(
+            {
+                **shared,
+                "kind": RULE_VIOLATION,
+                "column_name": violation["columns"][0],
+                "expected": None,
+                "actual": None,
+                "invalid_count": violation.get("violation_count"),
+                "invalid_percentage": violation.get("violation_percentage"),
+                "detail": _to_json(
+                    {
+                        "rule": violation["rule"],
+                        "expression": violation["expression"],
+                        "sample_values": violation.get("sample_values", []),
+                        "invalid_rows": violation.get("invalid_rows", []),
+                    }
+                ),
+            }
+        )
+
+    if duplicate_results.get("duplicate_rows"):
+        # One finding per file, tracked under the first key column
+        rows.append(
+            {
+                **shared,
+                "kind": DUPLICATE_KEY,
+                "column_name": duplicate_results["key"][0],
+                "expected": None,
+                "actual": None,
+                "invalid_count": duplicate_results["duplicate_rows"],
+                "invalid_percentage": round(
+                    duplicate_results["duplicate_rows"] / max(duplicate_results["total_rows"], 1) * 100, 2
+                ),
+                "detail": _to_json(
+                    {
+                        "key": duplicate_results["key"],
+                        "duplicate_groups": duplicate_results["duplicate_groups"],
+                        "groups": duplicate_results["groups"],
+                    }
+                ),
+            }
+        )
+
+    if resubmission_results.get("resubmitted_rows"):
+        rows.append(
+            {
+                **shared,
+                "kind": RESUBMITTED_KEY,
+                "column_name": duplicate_results["key"][0],
+                "expected": None,
+                "actual": None,
+                "invalid_count": resubmission_results["resubmitted_rows"],
+                "invalid_percentage": round(
+                    resubmission_results["resubmitted_rows"] / max(duplicate_results["total_rows"], 1) * 100, 2
+                ),
+                "detail": _to_json({"sources": resubmission_results["sources"]}),
+            }
+        )
+
+    for check in reference_results.get("checks", []):
+        if not check["unknown_rows"]:
+            continue
+        rows.append(
+            {
+                **shared,
+                "kind": UNKNOWN_CODE,
+                "column_name": check["column"],
+                "expected": check["table"],
+                "actual": None,
+                "invalid_count": check["unknown_rows"],
+                "invalid_percentage": check["unknown_percentage"],
+                "detail": _to_json({"unknown_codes": check["unknown_codes"], "codes": check["codes"]}),
+            }
+        )
+    return rows
+
+
+def _to_json(value: dict) -> dict:
+    """
+    Sample values can hold timestamps and NumPy scalars, which JSON columns cannot store.
+    """
+    return json.loads(json.dumps(value, default=str))
@@ -0,0 +1,108 @@
+"""
+Row fingerprints of previously validated files
+Lets a re-submitted file skip the rows it shares with its last submission
+"""
+import io
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Override with the ROW_HASH_DIR environment variable (e.g. a shared volume for the API workers)
+DEFAULT_ROW_HASH_DIR = Path(__file__).resolve().parent.parent / "data" / "row_hashes"
+
+def hash_rows(df: pd.DataFrame) -> np.ndarray:
+    """
+    Fingerprint every row of a DataFrame in one vectorized pass
+
+    The index is left out, so a row keeps its hash when rows above it are added or removed.
+
+    Returns:
+        uint64 array with one hash per row
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+@dataclass
+class RowVerdicts:
+    """
+    Per-row validation verdicts of one submission
+
+    `invalid` has one row per hash and one column per entry of `columns`, True where the
+    value broke the expected type. Verdicts only carry over while `signature` (the checked
+    columns and their expected types) is unchanged.
+    """
+    signature: Tuple[Tuple[str, str], ...]
+    hashes: np.ndarray
+    invalid: np.ndarray
+
+    @property
+    def columns(self) -> List[str]:
+        return [column for column, _ in self.signature]
+
+    def lookup(self, hashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find previously validated rows
+
+        Args:
+            hashes: Row hashes of the new submission
+
+        Returns:
+            Tuple of (mask of the known rows, their stored verdicts)
+        """
+        if len(self.hashes) == 0:
+            return np.zeros(len(hashes), dtype=bool), self.invalid[:0]
+        # Stored hashes are sorted, so every lookup is a binary search
+        positions = np.searchsorted(self.hashes, hashes).clip(max=len(self.hashes) - 1)
+        found = self.hashes[positions] == hashes
+        return found, self.invalid[positions[found]]
+
+class RowHashStore:
+    """
+    Row verdicts on disk, one compressed .npz file per customer / product line / file stem
+    """
+
+    def __init__(self, directory: str = None):
+        self.directory = Path(directory or os.getenv("ROW_HASH_DIR") or DEFAULT_ROW_HASH_DIR)
+
+    def path(self, customer: str, product_line: Optional[str], file_name: str) -> Path:
+        """Get the file holding the verdicts of a submission (dates and versions in the stem are kept)"""
+        directory = self.directory / safe_name(customer) / safe_name(product_line or "_")
+        return directory / f"{safe_name(Path(file_name).stem)}.npz"
+
+    def load(self, customer: str, product_line: Optional[str], file_name: str) -> Optional[RowVerdicts]:
+        """Load the verdicts of the last submission, or None if there is none (or it cannot be read)"""
+        path = self.path(customer, product_line, file_name)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                signature = tuple(zip(data["columns"].tolist(), data["types"].tolist()))
+                return RowVerdicts(signature, data["hashes"], data["invalid"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def save(self, customer: str, product_line: Optional[str], file_name: str, verdicts: RowVerdicts):
+        """Replace the stored verdicts of a submission (written to a temporary file, then swapped in)"""
+        order = np.argsort(verdicts.hashes, kind="stable")
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            columns=np.array(verdicts.columns, dtype=str),
+            types=np.array([expected for _, expected in verdicts.signature], dtype=str),
+            hashes=verdicts.hashes[order],
+            invalid=verdicts.invalid[order]
+        )
+
+        path = self.path(customer, product_line, file_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.parent / f"{path.name}.{os.getpid()}.tmp"
+        tmp_path.write_bytes(buffer.getvalue())
+        os.replace(tmp_path, path)
+
+def safe_name(part: str) -> str:
+    """Make a customer, product line or file stem safe to use as a path component"""
+    return re.sub(r"[^\w.-]", "_", str(part)).lstrip(".") or "_"
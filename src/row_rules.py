@@ -0,0 +1,217 @@
+"""
+Cross-column business rules checked on every row
+A plan's rules are compiled once into NumPy comparisons and run over whole chunks
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import RowRule, ValidationPlan, get_validation_plan
+from date_parsing import DateFormatStore, infer_date_format, parse_dates
+from validation import FIRST_DATA_ROW, MAX_INVALID_ROWS
+
+_COMPARISONS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A row rule with its comparison and constant resolved for the column types"""
+    rule: RowRule
+    compare: Callable[[np.ndarray, np.ndarray], np.ndarray]
+    is_date: bool
+    constant: Optional[float] = None
+
+@lru_cache(maxsize=None)
+def compile_rules(plan: ValidationPlan) -> Tuple[CompiledRule, ...]:
+    """Compile the row rules of a plan (once per plan)"""
+    compiled = []
+    for rule in plan.rules:
+        is_date = plan.column_types[rule.column] == "date"
+        constant = None
+        if rule.value is not None:
+            # Dates compare as nanoseconds since 1970, numbers as floats
+            constant = float(pd.Timestamp(rule.value).value) if is_date else float(rule.value)
+        compiled.append(CompiledRule(rule, _COMPARISONS[rule.operator], is_date, constant))
+    return tuple(compiled)
+
+class RowRuleChecker:
+    """
+    Folds the row rule violations of a file chunk by chunk
+
+    Every column a rule reads is converted once per chunk (dates parsed with the column's
+    learned format, numbers coerced to floats) and shared by all rules reading it; each
+    rule is then one vectorized comparison. Rows where a side is empty or not of its type
+    are not counted, they are reported by the data type validation.
+
+    Usage, reading the file once for both checks:
+
+        checker = RowRuleChecker(customer, product_line)
+        type_results = validate_data_types_chunked(checker.watch(chunks), customer, product_line)
+        rule_results = checker.results()
+    """
+
+    def __init__(self, customer: str, product_line: str = None, format_store: DateFormatStore = None):
+        plan = get_validation_plan(customer, product_line)
+        self.rules = compile_rules(plan)
+        self.column_types = plan.column_types
+        self.date_formats = (format_store or DateFormatStore()).formats(customer)
+        self.total_rows = 0
+        self.columns_seen = None
+        self.states = [_new_rule_state() for _ in self.rules]
+
+    def fold(self, chunk: pd.DataFrame):
+        """Check one chunk against every rule whose columns are in the file"""
+        self.total_rows += len(chunk)
+        if self.columns_seen is None:
+            self.columns_seen = set(chunk.columns)
+        values = {}
+        for compiled, state in zip(self.rules, self.states):
+            rule = compiled.rule
+            if any(col not in chunk.columns for col in rule.columns):
+                continue
+            left, left_valid = self._values(chunk, rule.column, values)
+            if rule.other is not None:
+                right, right_valid = self._values(chunk, rule.other, values)
+            else:
+                right, right_valid = compiled.constant, True
+            checked = left_valid & right_valid
+            violated = checked & ~compiled.compare(left, right)
+            self._record(state, chunk, rule, checked, violated)
+
+    def watch(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Fold each chunk while passing it on (e.g. to validate_data_types_chunked)"""
+        for chunk in chunks:
+            self.fold(chunk)
+            yield chunk
+
+    def results(self) -> Dict:
+        """
+        Get the rule results of the folded chunks
+
+        Returns:
+            Dictionary with the violated and passed rules, the rules skipped because the file
+            lacks their columns, and the number of rules checked and rows read
+        """
+        columns_seen = self.columns_seen or set()
+        rule_violations = []
+        rule_passes = []
+        skipped_rules = []
+        for compiled, state in zip(self.rules, self.states):
+            rule = compiled.rule
+            missing = [col for col in rule.columns if col not in columns_seen]
+            if missing:
+                skipped_rules.append({"rule": rule.name, "expression": rule.expression, "missing_columns": missing})
+                continue
+
+            result = {
+                "rule": rule.name,
+                "expression": rule.expression,
+                "columns": list(rule.columns),
+                "checked_rows": state["checked_rows"],
+                "violation_count": state["violation_count"],
+                "violation_percentage": round(state["violation_count"] / max(self.total_rows, 1) * 100, 2)
+            }
+            if state["violation_count"]:
+                result["status"] = "❌ Violated"
+                result["invalid_rows"] = state["invalid_rows"]
+                result["sample_values"] = state["sample_values"]
+                rule_violations.append(result)
+            else:
+                result["status"] = "✅ Passed"
+                rule_passes.append(result)
+
+        return {
+            "rule_violations": rule_violations,
+            "rule_passes": rule_passes,
+            "skipped_rules": skipped_rules,
+            "total_checked": len(rule_violations) + len(rule_passes),
+            "total_rows": self.total_rows
+        }
+
+    def _values(self, chunk: pd.DataFrame, col: str, values: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """Get a column as comparable numbers and the mask of its usable values (converted once per chunk)"""
+        if col not in values:
+            series = chunk[col]
+            if self.column_types[col] == "date":
+                date_format = infer_date_format(series, preferred=self.date_formats.get(col))
+                self.date_formats[col] = date_format
+                parsed = parse_dates(series, date_format).to_numpy()
+                valid = ~np.isnat(parsed)
+                # As floats, nanoseconds since 1970 are still precise to a microsecond
+                numbers = parsed.astype("int64").astype("float64")
+            else:
+                numbers = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+                valid = ~np.isnan(numbers)
+            values[col] = (numbers, valid)
+        return values[col]
+
+    def _record(self, state: Dict, chunk: pd.DataFrame, rule: RowRule, checked: np.ndarray, violated: np.ndarray):
+        """Add a chunk's violations to the running counts and samples of a rule"""
+        state["checked_rows"] += int(checked.sum())
+        violation_count = int(violated.sum())
+        if not violation_count:
+            return
+        state["violation_count"] += violation_count
+        limit = MAX_INVALID_ROWS - len(state["invalid_rows"])
+        if limit <= 0:
+            return
+        positions = np.flatnonzero(violated)[:limit]
+        state["invalid_rows"].extend(int(label) + FIRST_DATA_ROW for label in chunk.index[positions])
+        sample = chunk.iloc[positions][list(rule.columns)]
+        state["sample_values"].extend(sample.to_dict("records"))
+
+def validate_row_rules(chunks: Iterable[pd.DataFrame], customer: str, product_line: str = None,
+                       format_store: DateFormatStore = None) -> Dict:
+    """
+    Check every row of a file against the row rules of its customer / product line
+
+    Args:
+        chunks: DataFrame chunks of the same file (e.g. from file_readers.iter_chunks), or [df]
+        customer: Selected customer
+        product_line: Selected product line (None for NVR/WW)
+        format_store: Where learned date formats are read from (defaults to data/date_formats.json)
+
+    Returns:
+        Rule results (see RowRuleChecker.results)
+    """
+    checker = RowRuleChecker(customer, product_line, format_store)
+    for chunk in chunks:
+        checker.fold(chunk)
+    return checker.results()
+
+def validate_with_row_rules(validator: Callable[..., Dict], chunks: Iterable[pd.DataFrame], customer: str,
+                            product_line: str = None, **options) -> Tuple[Dict, Dict]:
+    """
+    Run a chunked data type validator and the row rules over a single read of a file
+
+    Args:
+        validator: validate_data_types_chunked or validate_data_types_incremental
+        chunks: DataFrame chunks of the same file (e.g. from file_readers.iter_chunks)
+        customer: Selected customer
+        product_line: Selected product line (None for NVR/WW)
+        options: Passed on to the validator (e.g. strict=True or file_name=...)
+
+    Returns:
+        Tuple of (data type results, rule results)
+    """
+    checker = RowRuleChecker(customer, product_line)
+    type_results = validator(checker.watch(chunks), customer, product_line, **options)
+    return type_results, checker.results()
+
+def _new_rule_state() -> Dict:
+    """Get the empty running state of a rule"""
+    return {
+        "checked_rows": 0,
+        "violation_count": 0,
+        "invalid_rows": [],
+        "sample_values": []
+    }
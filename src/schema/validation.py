@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class ValidationRunModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    created_at: datetime
+    source: str
+    file_name: str
+    customer: Optional[str] = None
+    product_line: Optional[str] = None
+    sheet_name: Optional[str] = None
+    status: str
+    error: Optional[str] = None
+    strict: bool = False
+    total_rows: Optional[int] = None
+    total_file_columns: Optional[int] = None
+    missing_essential_count: int = 0
+    type_issue_count: int = 0
+
+
+class ValidationFindingModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: Optional[int] = None
+    run_id: str
+    created_at: datetime
+    customer: Optional[str] = None
+    product_line: Optional[str] = None
+    kind: str
+    column_name: str
+    expected: Optional[str] = None
+    actual: Optional[str] = None
+    invalid_count: Optional[int] = None
+    invalid_percentage: Optional[float] = None
+    detail: Optional[dict[str, Any]] = None
@@ -4,7 +4,8 @@ UI components for the Streamlit app
 import streamlit as st
 import pandas as pd
 from typing import Dict, List
-from config import get_column_names, get_expected_data_types
+from config import get_validation_plan, has_product_lines
+from report import create_export_report, format_suggestion
 
 def display_validation_summary(results: Dict, customer: str, product_line: str):
     """Display the validation results in a formatted way"""
@@ -30,8 +31,11 @@ def display_validation_summary(results: Dict, customer: str, product_line: str):
     # Detailed results
     if results["missing_essential"]:
         st.error("❌ **Missing Essential Columns** (Exact match required)")
+        suggestions = results.get("suggestions", {})
         for col in sorted(results["missing_essential"]):
             st.code(f"• {repr(col)}")
+            if col in suggestions:
+                st.caption("💡 Did you mean: " + ", ".join(format_suggestion(s) for s in suggestions[col]))
     else:
         st.success("✅ All essential columns are present!")
     
@@ -65,6 +69,8 @@ def display_data_type_validation(type_results: Dict, customer: str, product_line
         - **String columns** accept any data type (most flexible for business data)
         - **Numeric columns** check if data can be converted to numbers
         - **Date columns** check if data can be parsed as dates
+        - **Strict mode** checks every row instead of a sample and counts the violations
+        - **Incremental revalidation** re-checks only rows changed since the file was last submitted
         
         This validation is designed to be flexible with Excel's "General" format.
         """)
@@ -82,6 +88,15 @@ def display_data_type_validation(type_results: Dict, customer: str, product_line
         match_rate = len(type_results["type_matches"]) / max(type_results["total_checked"], 1) * 100
         st.metric("Type Match Rate", f"{match_rate:.1f}%")
     
+    if "total_rows" in type_results:
+        st.caption(f"Rows checked: {type_results['total_rows']:,}")
+    if "incremental" in type_results:
+        incremental = type_results["incremental"]
+        st.caption(
+            f"♻️ Reused verdicts of {incremental['reused_rows']:,} unchanged rows from the last submission, "
+            f"validated {incremental['validated_rows']:,} new or changed rows"
+        )
+    
     # Show type issues
     if type_results["type_issues"]:
         st.error("❌ **Data Type Issues**")
@@ -91,6 +106,10 @@ def display_data_type_validation(type_results: Dict, customer: str, product_line
                 st.write(f"**Expected:** {issue['expected']}")
                 st.write(f"**Pandas Detected:** {issue['actual']}")
                 st.write(f"**Sample Values:** {issue['sample_values']}")
+                if 'invalid_count' in issue:
+                    st.write(f"**Invalid Values:** {issue['invalid_count']:,} ({issue['invalid_percentage']}% of rows)")
+                if issue.get('invalid_rows'):
+                    st.write(f"**First Invalid Rows:** {', '.join(str(row) for row in issue['invalid_rows'])}")
                 if issue['expected'] == 'string':
                     st.info("💡 String columns are very flexible - this might not be an actual issue.")
     else:
@@ -102,11 +121,162 @@ def display_data_type_validation(type_results: Dict, customer: str, product_line
     #         for match in type_results["type_matches"]:
     #             st.write(f"• **{match['column']}**: Expected {match['expected']}, Got {match['actual']} ✅")
 
-def display_file_analysis(df: pd.DataFrame):
-    """Display detailed file analysis"""
+def display_rule_validation(rule_results: Dict, customer: str, product_line: str):
+    """Display row rule results"""
+    
+    st.subheader(f"📏 Row Rules for {customer} - {product_line}")
+    
+    if not rule_results["total_checked"] and not rule_results["skipped_rules"]:
+        st.info("No row rules are configured for this customer.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Rules Checked", rule_results["total_checked"])
+    
+    with col2:
+        st.metric("Rules Violated", len(rule_results["rule_violations"]))
+    
+    with col3:
+        st.metric("Rules Skipped", len(rule_results["skipped_rules"]))
+    
+    if rule_results["rule_violations"]:
+        st.error("❌ **Row Rule Violations**")
+        for violation in rule_results["rule_violations"]:
+            with st.expander(f"🔴 {violation['rule']} - {violation['violation_count']:,} rows"):
+                st.write(f"**Rule:** `{violation['expression']}`")
+                st.write(f"**Violations:** {violation['violation_count']:,} ({violation['violation_percentage']}% of rows)")
+                st.write(f"**First Violating Rows:** {', '.join(str(row) for row in violation['invalid_rows'])}")
+                st.dataframe(
+                    pd.DataFrame(violation["sample_values"], index=violation["invalid_rows"]).astype(str),
+                    use_container_width=True
+                )
+    elif rule_results["total_checked"]:
+        st.success("✅ All rows satisfy the row rules!")
+    
+    for skipped in rule_results["skipped_rules"]:
+        st.caption(f"⏭️ Skipped {skipped['rule']!r}: missing {', '.join(skipped['missing_columns'])}")
+
+def display_duplicate_validation(duplicate_results: Dict, customer: str, product_line: str):
+    """Display duplicate rebate line results"""
+    
+    st.subheader(f"👯 Duplicate Lines for {customer} - {product_line}")
+    
+    if not duplicate_results["key"]:
+        st.info("No duplicate key is configured for this customer.")
+        return
+    if duplicate_results["missing_columns"]:
+        st.caption(f"⏭️ Skipped: missing {', '.join(duplicate_results['missing_columns'])}")
+        return
+    
+    key = ", ".join(repr(col) for col in duplicate_results["key"])
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Rows Checked", f"{duplicate_results['checked_rows']:,}")
+    
+    with col2:
+        st.metric("Duplicate Groups", f"{duplicate_results['duplicate_groups']:,}")
+    
+    with col3:
+        st.metric("Duplicate Lines", f"{duplicate_results['duplicate_rows']:,}")
+    
+    if duplicate_results["duplicate_rows"]:
+        st.error(f"❌ **Duplicate Lines** (same {key})")
+        groups_df = pd.DataFrame([
+            {
+                **{col: str(value) for col, value in group["key"].items()},
+                "Rows": group["count"],
+                "Row Numbers": ", ".join(str(row) for row in group["rows"])
+            }
+            for group in duplicate_results["groups"]
+        ])
+        st.dataframe(groups_df, use_container_width=True, hide_index=True)
+        if duplicate_results["duplicate_groups"] > len(duplicate_results["groups"]):
+            st.caption(f"Showing the first {len(duplicate_results['groups'])} of "
+                       f"{duplicate_results['duplicate_groups']:,} duplicate groups")
+    else:
+        st.success(f"✅ No duplicate lines (same {key})!")
+
+def display_resubmission_validation(resubmission_results: Dict, customer: str, product_line: str):
+    """Display the lines already submitted in earlier accepted files"""
+    
+    st.subheader(f"🔁 Resubmitted Lines for {customer} - {product_line}")
+    
+    if not resubmission_results["indexed_files"]:
+        st.info("No accepted files are indexed for this customer yet.")
+        return
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.metric("Indexed Files", resubmission_results["indexed_files"])
+    
+    with col2:
+        st.metric("Resubmitted Lines", f"{resubmission_results['resubmitted_rows']:,}")
+    
+    if resubmission_results["resubmitted_rows"]:
+        st.error("❌ **Lines Already Submitted** in earlier accepted files")
+        sources_df = pd.DataFrame([
+            {
+                "Submitted In": source["file_name"],
+                "Indexed At": source["added_at"],
+                "Rows": source["count"],
+                "Row Numbers": ", ".join(str(row) for row in source["rows"])
+            }
+            for source in resubmission_results["sources"]
+        ])
+        st.dataframe(sources_df, use_container_width=True, hide_index=True)
+    else:
+        st.success(f"✅ None of the {resubmission_results['checked_rows']:,} lines was submitted before!")
+
+def display_reference_validation(reference_results: Dict, customer: str, product_line: str):
+    """Display the codes missing from the master lists (branches, ship-to numbers, items)"""
+    
+    st.subheader(f"📚 Reference Data for {customer} - {product_line}")
+    
+    if not (reference_results["checks"] or reference_results["unavailable"] or reference_results["skipped"]):
+        st.info("No master lists are configured for this customer.")
+        return
+    
+    for check in reference_results["checks"]:
+        if check["unknown_rows"]:
+            st.error(f"❌ **{check['column']}**: {check['unknown_rows']:,} lines with {check['unknown_codes']:,} "
+                     f"codes not in {check['table']} ({check['table_codes']:,} codes)")
+            codes_df = pd.DataFrame([
+                {
+                    "Code": code["code"],
+                    "Rows": code["count"],
+                    "Row Numbers": ", ".join(str(row) for row in code["rows"])
+                }
+                for code in check["codes"]
+            ])
+            st.dataframe(codes_df, use_container_width=True, hide_index=True)
+            if check["unknown_codes"] > len(check["codes"]):
+                st.caption(f"Showing the {len(check['codes'])} most frequent of "
+                           f"{check['unknown_codes']:,} unknown codes")
+        else:
+            st.success(f"✅ **{check['column']}**: all {check['checked_rows']:,} codes are in {check['table']}")
+    
+    for unavailable in reference_results["unavailable"]:
+        st.warning(f"⚠️ {unavailable['column']} not checked: {unavailable['error']}")
+    
+    for skipped in reference_results["skipped"]:
+        st.caption(f"⏭️ Skipped {skipped['column']!r}: not in the file")
+
+def display_file_analysis(df: pd.DataFrame, preview: bool = False):
+    """Display detailed file analysis (pass preview=True when df holds the preview rows only)"""
     
     file_columns = df.columns.tolist()
     
+    if preview:
+        st.caption(
+            f"ℹ️ Based on the {len(df)}-row file preview - enable the Data Type Summary to analyze the full sheet"
+        )
+    else:
+        st.caption(f"ℹ️ Based on the full sheet ({len(df):,} rows)")
+    
     # Show exact column names with repr() to see hidden characters
     st.write("**🔍 EXACT Column Names in Your File:**")
     for i, col in enumerate(file_columns):
@@ -115,51 +285,41 @@ def display_file_analysis(df: pd.DataFrame):
 def display_expected_configuration(customer: str, product_line: str):
     """Display expected column configuration"""
     
-    if customer not in ["NVR", "WW"] and product_line:
-        config = get_column_names(customer, product_line)
-        expected_types = get_expected_data_types(customer, product_line)
-        
-        if config["essential"] or config["other"]:
-            with st.expander(f"📋 View {customer} - {product_line} Configuration"):
-                if config["essential"]:
-                    st.write("**Essential Columns (Exact match required):**")
-                    for col in config["essential"]:
-                        expected_type = expected_types.get(col, "unknown")
-                        st.code(f"• {repr(col)} → {expected_type}")
-                
-                if config["other"]:
-                    st.write("**Other Columns (Flexible):**")
-                    for col in config["other"]:
-                        expected_type = expected_types.get(col, "unknown")
-                        st.code(f"• {repr(col)} → {expected_type}")
-        else:
-            st.info(f"⚠️ Configuration for {customer} - {product_line} is not yet defined")
-    elif customer in ["NVR", "WW"]:
-        config = get_column_names(customer)
-        expected_types = get_expected_data_types(customer)
-        
-        if config["essential"] or config["other"]:
-            with st.expander(f"📋 View {customer} Configuration"):
-                if config["essential"]:
-                    st.write("**Essential Columns (Exact match required):**")
-                    for col in config["essential"]:
-                        expected_type = expected_types.get(col, "unknown")
-                        st.code(f"• {repr(col)} → {expected_type}")
-                
-                if config["other"]:
-                    st.write("**Other Columns (Flexible):**")
-                    for col in config["other"]:
-                        expected_type = expected_types.get(col, "unknown")
-                        st.code(f"• {repr(col)} → {expected_type}")
-        else:
-            st.info(f"ℹ️ {customer} customer configuration will be applied after file upload")
+    if has_product_lines(customer) and not product_line:
+        return
+    
+    plan = get_validation_plan(customer, product_line)
+    
+    if plan.essential or plan.other:
+        with st.expander(f"📋 View {plan.label} Configuration"):
+            if plan.essential:
+                st.write("**Essential Columns (Exact match required):**")
+                for col in plan.essential:
+                    st.code(f"• {repr(col)} → {plan.column_types.get(col, 'unknown')}")
+            
+            if plan.other:
+                st.write("**Other Columns (Flexible):**")
+                for col in plan.other:
+                    st.code(f"• {repr(col)} → {plan.column_types.get(col, 'unknown')}")
+    else:
+        st.info(f"⚠️ Configuration for {plan.label} is not yet defined")
 
-def display_data_type_summary(df: pd.DataFrame):
-    """Display data type summary table"""
+def display_data_type_summary(df: pd.DataFrame, summary: List[Dict] = None, compaction: Dict = None):
+    """Display data type summary table (pass a precomputed summary to skip recomputing it)"""
     
-    from validation import get_data_type_summary
+    if compaction is not None:
+        from compaction import format_bytes, summarize_conversions
+        st.caption(
+            f"🗜️ Memory: {format_bytes(compaction['bytes_before'])} → {format_bytes(compaction['bytes_after'])} "
+            f"({compaction['saved_percentage']}% saved, {len(compaction['conversions'])} columns compacted)"
+        )
+        if compaction["conversions"]:
+            # Shown inside the summary expander, which cannot hold another expander
+            st.caption(" · ".join(summarize_conversions(compaction)))
     
-    summary = get_data_type_summary(df)
+    if summary is None:
+        from validation import get_data_type_summary
+        summary = get_data_type_summary(df)
     
     st.write("**📊 Data Type Summary:**")
     
@@ -170,6 +330,10 @@ def display_data_type_summary(df: pd.DataFrame):
             "Data Type": s["dtype"],
             "Null Count": s["null_count"],
             "Null %": f"{s['null_percentage']}%",
+            # Large columns get a sampled estimate, marked with "~"
+            "Distinct": f"{s['distinct_estimate']:,}" if s.get("distinct_exact", True) else f"~{s['distinct_estimate']:,}",
+            "Min": "" if s.get("min") is None else str(s["min"]),
+            "Max": "" if s.get("max") is None else str(s["max"]),
             "Sample Values": str(s["sample_values"][:2])  # Show first 2 samples
         }
         for s in summary
@@ -177,19 +341,34 @@ def display_data_type_summary(df: pd.DataFrame):
     
     st.dataframe(summary_df, use_container_width=True)
 
-def create_export_report(results: Dict, type_results: Dict, customer: str, product_line: str, filename: str) -> pd.DataFrame:
-    """Create exportable validation report"""
-    
-    report_data = {
-        "Customer": [customer],
-        "Product Line": [product_line or "N/A"],
-        "File Name": [filename],
-        "Total File Columns": [results["total_file_columns"]],
-        "Missing Essential": [", ".join(results["missing_essential"])],
-        "Extra Columns": [", ".join(results["extra_columns"])],
-        "Essential Match Rate": [f"{len(results['matching_essential']) / max(results['total_essential_required'], 1) * 100:.1f}%"],
-        "Data Type Issues": [len(type_results.get("type_issues", []))],
-        "Data Type Match Rate": [f"{len(type_results.get('type_matches', [])) / max(type_results.get('total_checked', 1), 1) * 100:.1f}%"]
-    }
-    
-    return pd.DataFrame(report_data)
+def display_diagnostics(profiler):
+    """Display the duration, throughput and memory use of each validation stage"""
+    from compaction import format_bytes
+    
+    def fmt_bytes(size):
+        return format_bytes(size) if size is not None else "–"
+    
+    st.subheader("🩺 Diagnostics")
+    if not profiler.stages:
+        st.info("No stages were run.")
+        return
+    
+    diagnostics_df = pd.DataFrame([
+        {
+            "Stage": stage["stage"] + (f" ({stage['step']})" if stage.get("step") else ""),
+            "Duration (s)": round(stage["duration_seconds"], 3),
+            "Rows": stage["rows"],
+            "Columns": stage["columns"],
+            "Rows/s": stage["rows_per_second"],
+            "Peak Traced": fmt_bytes(stage["peak_traced_bytes"]),
+            "RSS": fmt_bytes(stage["rss_bytes"])
+        }
+        for stage in profiler.summary()
+    ]).astype({"Rows": "Int64", "Columns": "Int64"})
+    st.dataframe(diagnostics_df, use_container_width=True, hide_index=True)
+    
+    peak_rss = profiler.stages[-1].peak_rss_bytes
+    st.caption(
+        f"Total: {profiler.total_seconds:.3f}s · Peak process RSS: {fmt_bytes(peak_rss)} · "
+        "Cached results make repeated stages near-instant"
+    )
@@ -0,0 +1,108 @@
+"""
+Content-hash keyed cache for parsed uploads and validation results
+Keeps Streamlit reruns from re-parsing and re-validating the same file
+"""
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import pandas as pd
+
+# Default memory budget for cached frames and results
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+def content_hash(data: bytes) -> str:
+    """Get a short hex digest identifying the file content"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory held by a cached value in bytes"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+class UploadCache:
+    """
+    Thread-safe LRU cache with size-based eviction
+
+    Keys should start with the content hash of the upload so a re-uploaded
+    file with the same bytes hits the cache regardless of its name.
+    Cached values are shared between reruns and sessions and must not be mutated.
+    Values with a close() method (e.g. open file handles) are closed when they are
+    evicted, replaced or cleared.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self) -> int:
+        """Estimated memory held by all cached values"""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Get a cached value, computing and storing it on a miss
+
+        The computation runs outside the lock so a slow parse does not block other sessions.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value and evict the least recently used entries beyond the memory budget"""
+        size = estimate_size(value)
+        dropped = []
+        with self._lock:
+            if key in self._entries:
+                replaced, replaced_size = self._entries.pop(key)
+                self._total_bytes -= replaced_size
+                if replaced is not value:
+                    dropped.append(replaced)
+            # Values larger than the whole budget are returned but never cached
+            if size <= self.max_bytes:
+                self._entries[key] = (value, size)
+                self._total_bytes += size
+                while self._total_bytes > self.max_bytes:
+                    _, (evicted, evicted_size) = self._entries.popitem(last=False)
+                    self._total_bytes -= evicted_size
+                    dropped.append(evicted)
+        # Closed outside the lock, like values are computed outside it
+        _close_all(dropped)
+
+    def clear(self):
+        """Drop all cached values"""
+        with self._lock:
+            dropped = [value for value, _ in self._entries.values()]
+            self._entries.clear()
+            self._total_bytes = 0
+        _close_all(dropped)
+
+def _close_all(values):
+    """Close the dropped values that hold resources"""
+    for value in values:
+        close = getattr(value, "close", None)
+        if callable(close):
+            close()
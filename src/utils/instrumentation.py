@@ -0,0 +1,141 @@
+"""
+Stage timing and memory metrics of the validation pipeline, logged as structured fields.
+"""
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass
+class StageMetrics:
+    """
+    Measurements of one pipeline stage.
+
+    `rows` and `columns` are filled in by the caller while the stage runs. Memory figures are
+    None when they cannot be measured: `peak_traced_bytes` needs tracemalloc enabled, and RSS
+    is only read on Linux (current) and Unix (process peak).
+    """
+
+    stage: str
+    duration_seconds: float = 0.0
+    rows: Optional[int] = None
+    columns: Optional[int] = None
+    peak_traced_bytes: Optional[int] = None
+    rss_bytes: Optional[int] = None
+    peak_rss_bytes: Optional[int] = None
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        if not self.rows or self.duration_seconds <= 0:
+            return None
+        return round(self.rows / self.duration_seconds, 1)
+
+    def to_dict(self) -> dict:
+        metrics = asdict(self)
+        metrics["rows_per_second"] = self.rows_per_second
+        metrics |= metrics.pop("extra")
+        return metrics
+
+
+class PipelineProfiler:
+    """
+    Times the stages of a validation run and logs each one as structured fields.
+
+    Usage looks like:
+
+        profiler = PipelineProfiler("single_file", trace_memory=True)
+        with profiler.stage("type_check") as stage:
+            results = validate_data_types_chunked(...)
+            stage.rows = results["total_rows"]
+
+    Every finished stage is logged with its metrics in `extra`, so the json_datadog formatter
+    emits them as JSON fields. tracemalloc slows allocations down noticeably, so per-stage
+    Python heap peaks are only traced when `trace_memory` is set.
+    """
+
+    def __init__(self, pipeline: str, trace_memory: bool = False, **context):
+        self.pipeline = pipeline
+        self.trace_memory = trace_memory
+        self.context = context
+        self.stages: List[StageMetrics] = []
+
+    @contextmanager
+    def stage(self, name: str, **extra) -> Iterator[StageMetrics]:
+        metrics = StageMetrics(stage=name, extra=extra)
+        started_tracing = self._start_tracing()
+        start = time.perf_counter()
+        try:
+            yield metrics
+        finally:
+            metrics.duration_seconds = round(time.perf_counter() - start, 6)
+            if self.trace_memory:
+                metrics.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+            metrics.rss_bytes = current_rss_bytes()
+            metrics.peak_rss_bytes = peak_rss_bytes()
+            if metrics.rss_bytes is not None and metrics.peak_rss_bytes is not None:
+                # The kernel's high-water mark can lag slightly behind the current figure
+                metrics.peak_rss_bytes = max(metrics.peak_rss_bytes, metrics.rss_bytes)
+            self.stages.append(metrics)
+            logger.info(
+                f"Stage {name!r} of {self.pipeline!r} finished in {metrics.duration_seconds:.4f}s",
+                extra={"pipeline": self.pipeline, **self.context, **metrics.to_dict()},
+            )
+
+    def summary(self) -> List[dict]:
+        """
+        Returns the metrics of every finished stage, in the order they ran.
+        """
+        return [stage.to_dict() for stage in self.stages]
+
+    @property
+    def total_seconds(self) -> float:
+        return round(sum(stage.duration_seconds for stage in self.stages), 6)
+
+    def _start_tracing(self) -> bool:
+        """
+        Starts tracemalloc (or resets its peak) for a new stage. Returns True if this call started it.
+        """
+        if not self.trace_memory:
+            return False
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            return False
+        tracemalloc.start()
+        return True
+
+
+def current_rss_bytes() -> Optional[int]:
+    """
+    Returns the resident set size of this process (Linux only, None elsewhere).
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Returns the highest resident set size this process has reached (None on Windows).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,86 @@
+"""
+Logging configuration of the project: Rich console output locally, JSON records for Datadog elsewhere.
+
+`src/__init__.py` applies it when the package is imported (API, CLI, database). The Streamlit app imports
+its modules flat and never loads the package, so it calls `configure_logging` itself. Only the standard
+library and the formatter packages are imported here, so the module loads either way.
+"""
+import logging
+import logging.config
+import os
+
+from pythonjsonlogger.jsonlogger import JsonFormatter
+from rich.logging import RichHandler
+
+# ENV_STATE values (see src.constants.Envs) that log to the console instead of Datadog
+CONSOLE_ENV_STATES = ("LOCAL", "DEV")
+
+
+class RichCustomFormatter(logging.Formatter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rich_handler = RichHandler(rich_tracebacks=True, tracebacks_suppress=[], tracebacks_show_locals=True)
+
+    def format(self, record):
+        return super().format(record)
+
+
+def get_logging_config(
+    env_state: str | None = None, log_level: str | None = None, disable_existing_loggers: bool = True
+) -> dict:
+    """
+    Returns the `logging.config.dictConfig` configuration of an environment.
+
+    `env_state` and `log_level` default to the ENV_STATE and LOG_LVL environment variables, like `ProjectEnvs`.
+    """
+    env_state = (env_state or os.environ.get("ENV_STATE", "LOCAL")).upper()
+    log_level = log_level or os.environ.get("LOG_LVL", "DEBUG")
+    handlers = ["console"] if env_state in CONSOLE_ENV_STATES else ["datadog"]
+    return {
+        "version": 1,
+        "disable_existing_loggers": disable_existing_loggers,
+        "formatters": {
+            "console": {
+                "()": RichCustomFormatter,
+                "format": "%(message)s",
+                "datefmt": "<%d %b %Y | %H:%M:%S>",
+            },
+            "json_datadog": {
+                "()": JsonFormatter,
+                "format": "%(asctime)s %(levelname)s [%(name)s] [%(filename)s:%(lineno)d] "
+                "[dd.service=%(dd.service)s dd.env=%(dd.env)s dd.version=%(dd.version)s "
+                "dd.trace_id=%(dd.trace_id)s dd.span_id=%(dd.span_id)s] - %(message)s",
+                "datefmt": "<%d %b %Y | %H:%M:%S>",
+            },
+        },
+        "handlers": {
+            "console": {
+                "class": "rich.logging.RichHandler",
+                "level": log_level,
+                "formatter": "console",
+                "rich_tracebacks": True,
+                "tracebacks_show_locals": True,
+            },
+            "datadog": {
+                "class": "logging.StreamHandler",
+                "formatter": "json_datadog",
+            },
+        },
+        "loggers": {
+            "": {
+                "handlers": handlers,
+                "level": log_level,
+                "propagate": True,
+            },
+        },
+    }
+
+
+def configure_logging(
+    env_state: str | None = None, log_level: str | None = None, disable_existing_loggers: bool = True
+) -> None:
+    """
+    Applies the logging configuration of an environment (see `get_logging_config`) and captures warnings.
+    """
+    logging.captureWarnings(True)
+    logging.config.dictConfig(get_logging_config(env_state, log_level, disable_existing_loggers))
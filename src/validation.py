@@ -3,8 +3,27 @@ Validation functions for column names and data types
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Set
-from config import get_column_names, get_expected_data_types
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Set
+from config import get_validation_plan
+from column_matching import get_column_matcher
+from date_parsing import DateFormatStore, infer_date_format, parse_dates
+from row_hashes import RowHashStore, RowVerdicts, hash_rows
+
+# Data starts on row 2 of the sheet, below the header row
+FIRST_DATA_ROW = 2
+# Maximum number of offending row numbers reported per column
+MAX_INVALID_ROWS = 10
+# Values accepted for boolean columns (compared lower-cased)
+BOOLEAN_VALUES = {'true', 'false', '1', '0', 'yes', 'no', 'y', 'n'}
+# dtype kinds of text and mixed columns ('U' is reported by Arrow string dtypes)
+_TEXT_KINDS = ("O", "S", "U")
+# Large columns are checked in blocks so an early bad value exits without scanning the rest
+_BLOCK_SIZE = 65_536
+# Columns with more non-null values get a sampled distinct estimate in profile_columns
+DISTINCT_SAMPLE_SIZE = 20_000
+# Strict profiles check each distinct value of a text column once when the distinct values are at most
+# this share of the values sampled for the distinct estimate
+REPEATED_VALUES_SHARE = 0.25
 
 def validate_file_name(filename: str, customer: str, product_line: str) -> Tuple[bool, str]:
     """
@@ -19,27 +38,12 @@ def validate_file_name(filename: str, customer: str, product_line: str) -> Tuple
         Tuple of (is_valid, error_message)
     """
     # Case sensitive validation - do NOT convert to uppercase
+    plan = get_validation_plan(customer, product_line)
     
-    # For NVR and WW customers, no product line needed, just Net_ASP*
-    if customer in ["NVR", "WW"]:
-        if filename.startswith("Net_ASP"):
-            return True, ""
-        else:
-            return False, f"File name must start with 'Net_ASP' (case sensitive) for {customer} customer"
-    
-    # For other customers with product lines
-    if product_line == "MASTIC":
-        if filename.startswith("Net_ASP_MASTIC"):
-            return True, ""
-        else:
-            return False, "File name must start with 'Net_ASP_MASTIC' (case sensitive) for MASTIC product line"
-    elif product_line == "VARIFORM":
-        if filename.startswith("Net_ASP_VF"):
-            return True, ""
-        else:
-            return False, "File name must start with 'Net_ASP_VF' (case sensitive) for VARIFORM product line"
-    
-    return True, ""
+    # NVR and WW just need Net_ASP*, product lines have their own prefix (e.g. Net_ASP_MASTIC*)
+    if plan.file_prefix is None or filename.startswith(plan.file_prefix):
+        return True, ""
+    return False, f"File name must start with '{plan.file_prefix}' (case sensitive) for {plan.file_prefix_scope}"
 
 def validate_columns(file_columns: List[str], customer: str, product_line: str) -> Dict:
     """
@@ -53,23 +57,25 @@ def validate_columns(file_columns: List[str], customer: str, product_line: str)
     Returns:
         Dictionary containing validation results
     """
-    # Get column configuration
-    config = get_column_names(customer, product_line)
-    essential_cols = set(config["essential"])
-    other_cols = set(config["other"])
+    # Get precompiled column configuration
+    plan = get_validation_plan(customer, product_line)
+    essential_cols = plan.essential_set
+    other_cols = plan.other_set
     file_cols_set = set(file_columns)
     
     # Find missing essential columns (exact match required)
     missing_essential = essential_cols - file_cols_set
     
     # Find extra columns not in predetermined list
-    all_predetermined = essential_cols | other_cols
-    extra_columns = file_cols_set - all_predetermined
+    extra_columns = file_cols_set - plan.all_columns
     
     # Find matching columns
     matching_essential = essential_cols & file_cols_set
     matching_other = other_cols & file_cols_set
     
+    # Likely renamed/misspelled columns among the unmatched file columns (advisory only)
+    suggestions = get_column_matcher(customer, product_line).suggest(missing_essential, extra_columns)
+    
     return {
         "missing_essential": list(missing_essential),
         "extra_columns": list(extra_columns),
@@ -77,10 +83,12 @@ def validate_columns(file_columns: List[str], customer: str, product_line: str)
         "matching_other": list(matching_other),
         "total_file_columns": len(file_columns),
         "total_essential_required": len(essential_cols),
-        "total_other_available": len(other_cols)
+        "total_other_available": len(other_cols),
+        "suggestions": suggestions
     }
 
-def validate_data_types(df: pd.DataFrame, customer: str, product_line: str = None) -> Dict:
+def validate_data_types(df: pd.DataFrame, customer: str, product_line: str = None, strict: bool = False,
+                        profile: Dict[str, Dict] = None) -> Dict:
     """
     Validate data types of columns in the DataFrame
     
@@ -88,52 +96,323 @@ def validate_data_types(df: pd.DataFrame, customer: str, product_line: str = Non
         df: DataFrame to validate
         customer: Selected customer
         product_line: Selected product line (None for NVR/WW)
+        strict: Check every value instead of a sample and report violation counts
+        profile: Output of profile_columns for this frame and plan, to reuse its type checks
     
     Returns:
         Dictionary containing data type validation results
     """
-    expected_types = get_expected_data_types(customer, product_line)
-    file_columns = df.columns.tolist()
+    if profile is None:
+        return validate_data_types_chunked([df], customer, product_line, strict)
+    
+    expected_types = get_validation_plan(customer, product_line).column_types
+    column_states = {}
+    for col, column_profile in profile.items():
+        if col not in expected_types:
+            continue
+        state = column_profile.get("type_state")
+        if state is None or state["expected"] != expected_types[col] or column_profile["strict"] != strict:
+            raise ValueError(f"Profile of column '{col}' was computed for other validation options")
+        column_states[col] = state
     
+    return _summarize_column_states(column_states, len(df), strict)
+
+def validate_data_types_chunked(chunks: Iterable[pd.DataFrame], customer: str, product_line: str = None,
+                                strict: bool = False, format_store: DateFormatStore = None) -> Dict:
+    """
+    Validate data types chunk by chunk so memory stays bounded regardless of row count
+    
+    Per-column verdicts and sample values are folded across chunks: a column
+    is compatible only if every chunk is compatible.
+    
+    In strict mode every value is checked with vectorized coercion masks and each
+    column also reports `invalid_count` and `invalid_percentage`.
+    
+    Date columns are parsed with one format per column, learned from the first chunk
+    (or taken from earlier files of the customer) and stored for later files when a
+    format store is passed.
+    
+    Args:
+        chunks: DataFrame chunks of the same file (e.g. from file_readers.iter_chunks)
+        customer: Selected customer
+        product_line: Selected product line (None for NVR/WW)
+        strict: Check every value instead of a sample and report violation counts
+        format_store: Where learned date formats are kept and stored (if omitted, they are read
+            from data/date_formats.json and not stored)
+    
+    Returns:
+        Dictionary containing data type validation results (same shape as validate_data_types)
+    """
+    expected_types = get_validation_plan(customer, product_line).column_types
+    known_formats = (format_store or DateFormatStore()).formats(customer)
+    column_states = {}
+    total_rows = 0
+    
+    for chunk in chunks:
+        total_rows += len(chunk)
+        for col in chunk.columns:
+            if col not in expected_types:
+                continue
+            state = column_states.setdefault(col, _new_column_state(expected_types[col], known_formats.get(col)))
+            _fold_column_chunk(state, chunk[col], strict)
+    
+    if format_store is not None:
+        format_store.update(customer, _date_formats(column_states))
+    return _summarize_column_states(column_states, total_rows, strict)
+
+def validate_data_types_incremental(chunks: Iterable[pd.DataFrame], customer: str, product_line: str = None,
+                                    file_name: str = None, store: RowHashStore = None,
+                                    format_store: DateFormatStore = None) -> Dict:
+    """
+    Validate data types, re-checking only the rows that changed since the file was last submitted
+    
+    Every row is fingerprinted with a vectorized hash of its type-checked columns. Rows whose
+    hash was seen in the previous submission of the same file stem (for this customer and
+    product line) reuse their stored verdicts; only new or corrected rows are validated.
+    The verdicts of this submission then replace the stored ones.
+    
+    Every new row is checked value by value, so results match strict mode. A change in
+    the plan's checked columns or expected types discards the stored verdicts.
+    
+    Args:
+        chunks: DataFrame chunks of the same file (e.g. from file_readers.iter_chunks)
+        customer: Selected customer
+        product_line: Selected product line (None for NVR/WW)
+        file_name: Name of the submitted file (its stem identifies re-submissions)
+        store: Where row verdicts are kept (defaults to data/row_hashes)
+        format_store: Where learned date formats are kept and stored (if omitted, they are read
+            from data/date_formats.json and not stored)
+    
+    Returns:
+        Strict mode results (same shape as validate_data_types_chunked) plus an `incremental`
+        entry with the number of reused and validated rows
+    """
+    if not file_name:
+        raise ValueError("file_name is required to find the previous submission")
+    expected_types = get_validation_plan(customer, product_line).column_types
+    store = store or RowHashStore()
+    known_formats = (format_store or DateFormatStore()).formats(customer)
+    previous = store.load(customer, product_line, file_name)
+    column_states = {}
+    total_rows = 0
+    signature = None
+    reused_rows = 0
+    all_hashes = []
+    all_invalid = []
+    
+    for chunk in chunks:
+        if signature is None:
+            # "string" columns accept any value, so they are neither hashed nor re-checked
+            signature = tuple(
+                (col, expected_types[col]) for col in chunk.columns
+                if col in expected_types and expected_types[col] != "string"
+            )
+            if previous is not None and previous.signature != signature:
+                previous = None
+        columns = [col for col, _ in signature]
+        total_rows += len(chunk)
+        
+        hashes = hash_rows(chunk[columns])
+        invalid = np.zeros((len(chunk), len(columns)), dtype=bool)
+        known = np.zeros(len(chunk), dtype=bool)
+        if previous is not None:
+            known, known_invalid = previous.lookup(hashes)
+            invalid[known] = known_invalid
+            reused_rows += int(known.sum())
+        
+        for col in chunk.columns:
+            if col in expected_types:
+                column_states.setdefault(col, _new_column_state(expected_types[col], known_formats.get(col)))
+        
+        changed = chunk[columns][~known]
+        for position, (col, expected) in enumerate(signature):
+            if len(changed):
+                state = column_states[col]
+                _learn_date_format(state, changed[col])
+                invalid[~known, position] = _invalid_mask(changed[col], expected, state["date_format"])
+        
+        for col in chunk.columns:
+            if col not in expected_types:
+                continue
+            state = column_states[col]
+            if col in columns:
+                col_invalid = invalid[:, columns.index(col)]
+            else:
+                col_invalid = np.zeros(len(chunk), dtype=bool)
+            _record_column_verdicts(state, chunk[col], col_invalid)
+        
+        all_hashes.append(hashes)
+        all_invalid.append(invalid)
+    
+    signature = signature or ()
+    hashes = np.concatenate(all_hashes) if all_hashes else np.array([], dtype=np.uint64)
+    invalid = np.concatenate(all_invalid) if all_invalid else np.zeros((0, len(signature)), dtype=bool)
+    store.save(customer, product_line, file_name, RowVerdicts(signature, hashes, invalid))
+    if format_store is not None:
+        format_store.update(customer, _date_formats(column_states))
+    
+    results = _summarize_column_states(column_states, total_rows, strict=True)
+    results["incremental"] = {
+        "previous_rows": len(previous.hashes) if previous is not None else 0,
+        "reused_rows": reused_rows,
+        "validated_rows": total_rows - reused_rows
+    }
+    return results
+
+def _new_column_state(expected: str, date_format: str = None) -> Dict:
+    """Get the empty running validation state of a column (date columns start from a known format)"""
+    return {
+        "expected": expected,
+        "date_format": date_format if expected == "date" else None,
+        "dtypes": [],
+        "is_valid": True,
+        "sample_values": [],
+        "invalid_rows": [],
+        "invalid_count": 0,
+        "row_count": 0
+    }
+
+def _summarize_column_states(column_states: Dict, total_rows: int, strict: bool) -> Dict:
+    """Turn the folded column states into data type validation results"""
     type_issues = []
     type_matches = []
     
-    for col in file_columns:
-        if col in expected_types:
-            expected_type = expected_types[col]
-            actual_dtype = str(df[col].dtype)
-            
-            # Check if data type matches expectation
-            is_valid = _check_data_type_compatibility(df[col], expected_type)
-            
-            if is_valid:
-                type_matches.append({
-                    "column": col,
-                    "expected": expected_type,
-                    "actual": actual_dtype,
-                    "status": "✅ Match"
-                })
-            else:
-                type_issues.append({
-                    "column": col,
-                    "expected": expected_type,
-                    "actual": actual_dtype,
-                    "status": "❌ Mismatch",
-                    "sample_values": df[col].dropna().head(3).tolist()
-                })
+    for col, state in column_states.items():
+        actual_dtype = _combine_dtypes(state["dtypes"])
+        
+        if state["is_valid"]:
+            result = {
+                "column": col,
+                "expected": state["expected"],
+                "actual": actual_dtype,
+                "status": "✅ Match"
+            }
+        else:
+            result = {
+                "column": col,
+                "expected": state["expected"],
+                "actual": actual_dtype,
+                "status": "❌ Mismatch",
+                "sample_values": state["sample_values"],
+                "invalid_rows": state["invalid_rows"]
+            }
+        
+        if strict:
+            result["invalid_count"] = state["invalid_count"]
+            result["invalid_percentage"] = round(state["invalid_count"] / max(state["row_count"], 1) * 100, 2)
+        
+        (type_matches if state["is_valid"] else type_issues).append(result)
     
     return {
         "type_issues": type_issues,
         "type_matches": type_matches,
-        "total_checked": len(type_issues) + len(type_matches)
+        "total_checked": len(type_issues) + len(type_matches),
+        "total_rows": total_rows,
+        "strict": strict
     }
 
-def _check_data_type_compatibility(series: pd.Series, expected_type: str) -> bool:
+def _fold_column_chunk(state: Dict, series: pd.Series, strict: bool = False, not_null: np.ndarray = None,
+                       factorized: Tuple[np.ndarray, pd.Series] = None):
+    """
+    Merge one chunk of a column into its running validation state
+    
+    A precomputed null mask, or the codes and distinct values of a text column (see
+    _factorize_text), are reused by the strict check instead of being computed again.
+    """
+    dtype = str(series.dtype)
+    if dtype not in state["dtypes"]:
+        state["dtypes"].append(dtype)
+    state["row_count"] += len(series)
+    _learn_date_format(state, series)
+    date_format = state["date_format"]
+    
+    if strict:
+        if factorized is not None:
+            # Each distinct value is checked once and its verdict spread to its rows (code -1 takes the False)
+            codes, uniques = factorized
+            invalid = np.append(_invalid_mask(uniques, state["expected"], date_format), False)[codes]
+        else:
+            invalid = _invalid_mask(series, state["expected"], date_format, not_null)
+        _count_invalid(state, series.index, invalid)
+    else:
+        # Once a column is known to be incompatible, later chunks cannot change the verdict
+        if state["is_valid"]:
+            state["is_valid"] = bool(_check_data_type_compatibility(series, state["expected"], date_format))
+        
+        if not state["is_valid"] and len(state["invalid_rows"]) < MAX_INVALID_ROWS:
+            limit = MAX_INVALID_ROWS - len(state["invalid_rows"])
+            state["invalid_rows"].extend(_find_invalid_rows(series, state["expected"], limit, date_format))
+    
+    if len(state["sample_values"]) < 3:
+        missing = 3 - len(state["sample_values"])
+        state["sample_values"].extend(_head_non_null(series, missing).tolist())
+
+def _learn_date_format(state: Dict, series: pd.Series):
+    """Pick the date format of a chunk, keeping the one learned so far while it still fits"""
+    if state["expected"] == "date":
+        state["date_format"] = infer_date_format(series, preferred=state["date_format"])
+
+def _date_formats(column_states: Dict) -> Dict[str, str]:
+    """Get the learned formats of the date columns"""
+    return {col: state["date_format"] for col, state in column_states.items() if state["date_format"]}
+
+def _record_column_verdicts(state: Dict, series: pd.Series, invalid: np.ndarray):
+    """Merge one chunk of a column whose invalid values are already known into its running state"""
+    dtype = str(series.dtype)
+    if dtype not in state["dtypes"]:
+        state["dtypes"].append(dtype)
+    state["row_count"] += len(series)
+    _count_invalid(state, series.index, invalid)
+    
+    if len(state["sample_values"]) < 3:
+        missing = 3 - len(state["sample_values"])
+        state["sample_values"].extend(_head_non_null(series, missing).tolist())
+
+def _count_invalid(state: Dict, index: pd.Index, invalid: np.ndarray):
+    """Add a chunk's invalid values to the running counts and offending row numbers of a column"""
+    invalid_count = int(invalid.sum())
+    if invalid_count:
+        state["is_valid"] = False
+        state["invalid_count"] += invalid_count
+        limit = MAX_INVALID_ROWS - len(state["invalid_rows"])
+        state["invalid_rows"].extend(_to_row_numbers(index[invalid][:max(limit, 0)]))
+
+def _head_non_null(series: pd.Series, n: int) -> pd.Series:
+    """Get the first n non-null values without scanning the whole column"""
+    window = 1000
+    while True:
+        head = series.iloc[:window].dropna()
+        if len(head) >= n or window >= len(series):
+            return head.head(n)
+        window *= 10
+
+def _combine_dtypes(dtypes: List[str]) -> str:
+    """Get the dtype a full load would most likely infer from the dtypes seen per chunk"""
+    if len(dtypes) == 1:
+        return dtypes[0]
+    if all(any(name in dtype.lower() for name in ("int", "float", "double")) for dtype in dtypes):
+        return "float64"
+    return "object"
+
+def _dtype_kind(series: pd.Series) -> str:
+    """
+    Get the NumPy kind code of a column's dtype ('i'/'u' int, 'f' float, 'b' bool, 'M' datetime, 'O'/'U' text/mixed)
+    
+    Unlike the dtype name this is the same for NumPy, nullable ('Int64', 'string') and
+    Arrow ('double[pyarrow]') dtypes. Categoricals report the kind of their categories.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    return dtype.kind
+
+def _check_data_type_compatibility(series: pd.Series, expected_type: str, date_format: str = None) -> bool:
     """
     Check if a pandas Series is compatible with the expected data type
     More flexible to handle Excel "General" format and pandas auto-inference
+    Date text is parsed with `date_format` (see date_parsing.infer_date_format)
     """
-    actual_dtype = str(series.dtype)
+    kind = _dtype_kind(series)
     
     # Handle different type mappings with flexibility for Excel "General" format
     if expected_type == "string":
@@ -142,35 +421,102 @@ def _check_data_type_compatibility(series: pd.Series, expected_type: str) -> boo
         return True
     elif expected_type == "integer":
         # Accept int or numeric that could be int
-        if "int" in actual_dtype:
+        if kind in "iu":
             return True
-        if "float" in actual_dtype:
+        if kind == "f":
             # Check if all values are whole numbers (could be from Excel General)
-            return series.dropna().apply(lambda x: float(x).is_integer()).all()
-        if "object" in actual_dtype:
+            return _is_whole_number(series)
+        if kind in _TEXT_KINDS:
             # Try to convert to see if it's numeric
             return _can_convert_to_numeric(series, "int")
         return False
     elif expected_type == "float":
         # Accept float, int, or convertible numeric
-        if "float" in actual_dtype or "int" in actual_dtype:
+        if kind in "iuf":
             return True
-        if "object" in actual_dtype:
+        if kind in _TEXT_KINDS:
             return _can_convert_to_numeric(series, "float")
         return False
     elif expected_type == "date":
-        return "datetime" in actual_dtype or _can_convert_to_date(series)
+        return kind == "M" or _can_convert_to_date(series, date_format)
     elif expected_type == "boolean":
-        return "bool" in actual_dtype or _can_convert_to_boolean(series)
+        return kind == "b" or _can_convert_to_boolean(series)
     
     return False
 
+def _is_whole_number(series: pd.Series) -> bool:
+    """
+    Check if all non-null values of a float series are whole numbers
+    Vectorized equivalent of `float(x).is_integer()` for every value
+    """
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    for start in range(0, len(values), _BLOCK_SIZE):
+        block = values[start:start + _BLOCK_SIZE]
+        block = block[~np.isnan(block)]
+        # inf is not a whole number, same as float('inf').is_integer()
+        if not (np.isfinite(block) & (np.floor(block) == block)).all():
+            return False
+    return True
+
+def _find_invalid_rows(series: pd.Series, expected_type: str, limit: int = MAX_INVALID_ROWS,
+                       date_format: str = None) -> List[int]:
+    """Get the sheet row numbers of the first values that break the expected type"""
+    return _to_row_numbers(series.index[_invalid_mask(series, expected_type, date_format)][:limit])
+
+def _invalid_mask(series: pd.Series, expected_type: str, date_format: str = None,
+                  not_null: np.ndarray = None) -> np.ndarray:
+    """
+    Get a boolean mask of the non-null values that break the expected type
+    
+    Checks the whole column with vectorized coercion, accepting the same
+    dtypes as _check_data_type_compatibility. Pass `not_null` when the
+    column's null mask is already known.
+    """
+    if expected_type == "string":
+        return np.zeros(len(series), dtype=bool)
+    kind = _dtype_kind(series)
+    if not_null is None:
+        not_null = series.notna().to_numpy()
+    
+    if expected_type == "integer":
+        if kind in "iu":
+            return np.zeros(len(series), dtype=bool)
+        if kind == "f" or kind in _TEXT_KINDS:
+            values = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            return not_null & ~(np.isfinite(values) & (np.floor(values) == values))
+        return not_null
+    elif expected_type == "float":
+        if kind in "iuf":
+            return np.zeros(len(series), dtype=bool)
+        if kind in _TEXT_KINDS:
+            # Checked on the float array: Arrow-backed results mark failures as NaN rather than NA
+            values = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            return not_null & np.isnan(values)
+        return not_null
+    elif expected_type == "date":
+        if kind == "M":
+            return np.zeros(len(series), dtype=bool)
+        # Numbers count as Excel serial dates, text is parsed with the column's format
+        return not_null & parse_dates(series, date_format).isna().to_numpy()
+    elif expected_type == "boolean":
+        if kind == "b":
+            return np.zeros(len(series), dtype=bool)
+        # Look up each distinct value once instead of every row
+        bad_values = [v for v in series.dropna().unique() if str(v).lower() not in BOOLEAN_VALUES]
+        return series.isin(bad_values).to_numpy()
+    
+    return not_null
+
+def _to_row_numbers(index: pd.Index) -> List[int]:
+    """Convert DataFrame index labels to the row numbers shown in the spreadsheet"""
+    return [int(label) + FIRST_DATA_ROW for label in index]
+
 def _can_convert_to_numeric(series: pd.Series, numeric_type: str) -> bool:
     """
     Check if a series can be converted to numeric (int or float)
     """
     try:
-        sample = series.dropna().head(10)
+        sample = _head_non_null(series, 10)
         if len(sample) == 0:
             return True
         
@@ -187,51 +533,175 @@ def _can_convert_to_boolean(series: pd.Series) -> bool:
     Check if a series can be converted to boolean
     """
     try:
-        sample = series.dropna().head(10)
+        sample = _head_non_null(series, 10)
         if len(sample) == 0:
             return True
         
         # Check if values are boolean-like
         unique_vals = set(str(v).lower() for v in sample.unique())
-        boolean_vals = {'true', 'false', '1', '0', 'yes', 'no', 'y', 'n'}
-        return unique_vals.issubset(boolean_vals)
+        return unique_vals.issubset(BOOLEAN_VALUES)
     except:
         return False
 
-def _can_convert_to_date(series: pd.Series) -> bool:
+def _can_convert_to_date(series: pd.Series, date_format: str = None) -> bool:
     """
     Check if a series can be converted to datetime
+    Numbers are read as Excel serial dates, text with the column's date format
     """
     try:
         # Try to convert a sample to datetime
-        sample = series.dropna().head(5)
+        sample = _head_non_null(series, 5)
         if len(sample) == 0:
             return True  # Empty series, assume it's fine
         
-        pd.to_datetime(sample, errors='raise')
-        return True
+        return bool(parse_dates(sample, date_format).notna().all())
     except:
         return False
 
-def get_data_type_summary(df: pd.DataFrame) -> List[Dict]:
+def get_data_type_summary(df: pd.DataFrame, profile: Dict[str, Dict] = None) -> List[Dict]:
     """
     Get a summary of all data types in the DataFrame
+    
+    Args:
+        df: DataFrame to summarize
+        profile: Output of profile_columns for this frame, to avoid profiling it again
+    
+    Returns:
+        One dictionary per column with its dtype, null count and percentage, distinct
+        estimate, min/max and sample values
     """
-    summary = []
-    for col in df.columns:
-        dtype = str(df[col].dtype)
-        null_count = df[col].isnull().sum()
-        total_count = len(df[col])
-        
-        # Get sample values (non-null)
-        sample_values = df[col].dropna().head(3).tolist()
+    if profile is None:
+        profile = profile_columns(df)
+    summary_keys = (
+        "column", "dtype", "null_count", "null_percentage", "distinct_estimate", "distinct_exact",
+        "min", "max", "sample_values"
+    )
+    return [{key: column_profile[key] for key in summary_keys} for column_profile in profile.values()]
+
+def profile_columns(df: pd.DataFrame, expected_types: Mapping[str, str] = None, strict: bool = False,
+                    customer: str = None, format_store: DateFormatStore = None) -> Dict[str, Dict]:
+    """
+    Profile every column of a DataFrame in one pass
+    
+    Each column is visited once and its null mask is computed once, then reused for the
+    null count, the sample values, the distinct estimate and the type check. When
+    `expected_types` is given, the type check of each configured column runs on the same
+    Series, so the data type summary and validate_data_types can share one profile.
+    In strict mode text columns checked against a non-string type whose sampled values
+    repeat (at most REPEATED_VALUES_SHARE distinct) are factorized once: each distinct
+    value is parsed once instead of every row and the codes give an exact distinct count.
+    
+    Args:
+        df: DataFrame to profile
+        expected_types: Expected type per column (e.g. the plan's column_types)
+        strict: Check every value of the typed columns instead of a sample
+        customer: Customer whose learned date formats are used (none if omitted)
+        format_store: Where the customer's learned date formats are kept and stored (if omitted,
+            they are read from data/date_formats.json and not stored)
+    
+    Returns:
+        Dictionary of column name to its profile: dtype, row/null counts, null percentage,
+        distinct estimate (exact up to DISTINCT_SAMPLE_SIZE non-null values), min/max of
+        numeric and date columns, the first 3 non-null values and, for configured columns,
+        the type check state read by validate_data_types
+    """
+    known_formats = (format_store or DateFormatStore()).formats(customer) if customer is not None else {}
+    profile = {}
+    column_states = {}
+    for position, col in enumerate(df.columns):
+        series = df.iloc[:, position]
+        expected = expected_types.get(col) if expected_types is not None else None
+        not_null = series.notna().to_numpy()
+        non_null_count = int(not_null.sum())
+        distinct_estimate, distinct_exact, sample_share = _estimate_distinct(series, not_null, non_null_count)
+        factorized = None
+        if strict and expected not in (None, "string") and sample_share <= REPEATED_VALUES_SHARE:
+            factorized = _factorize_text(series)
+            if factorized is not None:
+                codes = factorized[0]
+                distinct_estimate, distinct_exact = int(np.count_nonzero(np.bincount(codes[not_null]))), True
+        row_count = len(series)
+        column_min, column_max = _min_max(series, non_null_count)
         
-        summary.append({
+        column_profile = {
             "column": col,
-            "dtype": dtype,
-            "null_count": null_count,
-            "null_percentage": round((null_count / total_count) * 100, 1),
-            "sample_values": sample_values
-        })
+            "dtype": str(series.dtype),
+            "row_count": row_count,
+            "null_count": row_count - non_null_count,
+            "null_percentage": round((row_count - non_null_count) / max(row_count, 1) * 100, 1),
+            "distinct_estimate": distinct_estimate,
+            "distinct_exact": distinct_exact,
+            "min": column_min,
+            "max": column_max,
+            "sample_values": _first_non_null(series, not_null, 3)
+        }
+        
+        if expected is not None:
+            state = _new_column_state(expected, known_formats.get(col))
+            # Pre-filled so the type check does not search for sample values again
+            state["sample_values"] = list(column_profile["sample_values"])
+            _fold_column_chunk(state, series, strict, not_null, factorized)
+            column_profile["type_state"] = state
+            column_profile["strict"] = strict
+            column_states[col] = state
+        
+        profile[col] = column_profile
+    
+    if customer is not None and format_store is not None:
+        format_store.update(customer, _date_formats(column_states))
+    return profile
+
+def _factorize_text(series: pd.Series) -> Optional[Tuple[np.ndarray, pd.Series]]:
+    """Get the codes (-1 for nulls) and distinct values of a text or mixed column (None for other dtypes)"""
+    if _dtype_kind(series) not in _TEXT_KINDS:
+        return None
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), pd.Series(series.cat.categories)
+    codes, uniques = pd.factorize(series)
+    return codes, pd.Series(uniques)
+
+def _first_non_null(series: pd.Series, not_null: np.ndarray, n: int) -> List:
+    """Get the first n non-null values from a precomputed null mask without scanning the whole column"""
+    window = 1000
+    while True:
+        positions = np.flatnonzero(not_null[:window])[:n]
+        if len(positions) >= n or window >= len(series):
+            return series.iloc[positions].tolist()
+        window *= 10
+
+def _estimate_distinct(series: pd.Series, not_null: np.ndarray, non_null_count: int) -> Tuple[int, bool, float]:
+    """
+    Estimate the number of distinct non-null values of a column
+    
+    Values are compared by their 64-bit hashes. Columns with up to DISTINCT_SAMPLE_SIZE
+    non-null values are counted exactly; larger ones are estimated from a fixed-seed sample
+    with the GEE estimator (sqrt(n/r) * values seen once + values seen more than once).
     
-    return summary
+    Returns:
+        Tuple of (distinct count or estimate, whether it is exact, share of distinct values
+        among the hashed values)
+    """
+    if non_null_count == 0:
+        return 0, True, 0.0
+    positions = np.flatnonzero(not_null)
+    exact = non_null_count <= DISTINCT_SAMPLE_SIZE
+    if not exact:
+        positions = np.random.default_rng(0).choice(positions, DISTINCT_SAMPLE_SIZE, replace=False)
+    
+    hashes = pd.util.hash_pandas_object(series.iloc[positions], index=False).to_numpy()
+    _, counts = np.unique(hashes, return_counts=True)
+    sample_share = len(counts) / len(hashes)
+    if exact:
+        return len(counts), True, sample_share
+    
+    seen_once = int((counts == 1).sum())
+    estimate = np.sqrt(non_null_count / DISTINCT_SAMPLE_SIZE) * seen_once + (len(counts) - seen_once)
+    return int(min(max(round(estimate), len(counts)), non_null_count)), False, sample_share
+
+def _min_max(series: pd.Series, non_null_count: int) -> Tuple:
+    """Get the min and max of a numeric, boolean or date column (None for text and mixed columns)"""
+    if non_null_count == 0 or _dtype_kind(series) not in "iufbmM":
+        return None, None
+    if isinstance(series.dtype, pd.CategoricalDtype) and not series.dtype.ordered:
+        return None, None
+    return series.min(), series.max()
@@ -0,0 +1,6 @@
+import os
+
+# Settings that src/__init__.py requires, so the API and database modules import without a .env file
+for _name in ("PINECONE_ENV", "PINECONE_INDEX", "PINECONE_INDEX_URL", "ALGOLIA_APP_ID", "ALGOLIA_INDEX",
+              "MAILGUN_DOMAIN"):
+    os.environ.setdefault(_name, "test")
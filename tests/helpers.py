@@ -0,0 +1,23 @@
+import pandas as pd
+
+from benchmarks.synthetic import make_frame
+from config import get_validation_plan
+
+WW_PLAN = get_validation_plan("WW")
+
+
+def isolate_data_dirs(tmp_path, monkeypatch) -> None:
+    """Point the on-disk stores (key index, master lists, date formats, row verdicts) at a temporary directory"""
+    monkeypatch.setenv("INVOICE_INDEX_DIR", str(tmp_path / "invoice_keys"))
+    monkeypatch.setenv("REFERENCE_DATA_DIR", str(tmp_path / "reference"))
+    monkeypatch.setenv("DATE_FORMAT_FILE", str(tmp_path / "date_formats.json"))
+    monkeypatch.setenv("ROW_HASH_DIR", str(tmp_path / "row_hashes"))
+
+
+def passing_frame(rows: int) -> pd.DataFrame:
+    """A synthetic WW frame that passes every check (distinct invoices, rule-abiding rows)"""
+    df = make_frame(WW_PLAN, rows)
+    df["Distributor Invoice Number"] = [f"INV{row}" for row in range(len(df))]
+    df["Date Rebate Processed"] = df["Distributor Invoice Date"].max()
+    df["Reported Qty"] += 1
+    return df
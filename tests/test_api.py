@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.synthetic import write_file
+from src.interface.wsgi.app import app
+from tests.helpers import WW_PLAN, isolate_data_dirs, passing_frame
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    isolate_data_dirs(tmp_path, monkeypatch)
+    # Validations run in threads instead of the lifespan's process pool, so they see the test settings
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        app.state.executor = executor
+        yield TestClient(app)
+
+
+@pytest.fixture
+def csv_upload(tmp_path):
+    path = write_file(passing_frame(100), WW_PLAN, tmp_path, ".csv")
+    return path.name, path.read_bytes()
+
+
+def test_health_and_configs(client):
+    assert client.get("/").json() == {"status": "ok"}
+    configs = {(config["customer"], config["product_line"]): config for config in client.get("/configs").json()}
+    assert configs[("WW", None)]["duplicate_key"] == list(WW_PLAN.duplicate_key)
+
+
+def test_validate_passes_and_records_keys(client, csv_upload):
+    name, content = csv_upload
+    entry = client.post("/validate", files={"file": (name, content)}, data={"customer": "WW"}).json()
+    assert entry["status"] == "passed", entry
+    assert entry["type_results"]["total_rows"] == 100
+
+    # The accepted file's keys are recorded by default, so the same lines under another name are flagged
+    again = client.post("/validate", files={"file": ("Net_ASP_ww_again.csv", content)}, data={"customer": "WW"})
+    assert again.json()["status"] == "failed"
+    assert again.json()["resubmission_results"]["resubmitted_rows"] == 100
+
+
+def test_validate_rejects_unknown_customers_and_file_types(client, csv_upload):
+    name, content = csv_upload
+    response = client.post("/validate", files={"file": (name, content)}, data={"customer": "NOPE"})
+    assert response.status_code == 400
+    response = client.post("/validate", files={"file": ("notes.txt", b"text")}, data={"customer": "WW"})
+    assert response.status_code == 400
+
+
+def test_batch_returns_one_entry_per_file_in_order(client, csv_upload):
+    name, content = csv_upload
+    files = [("files", (name, content)), ("files", ("Net_ASP_ww_other.csv", content))]
+    entries = client.post("/validate/batch", files=files, data={"customer": "WW", "record_keys": "false"}).json()
+    assert [entry["file_name"] for entry in entries] == [name, "Net_ASP_ww_other.csv"]
+    assert [entry["status"] for entry in entries] == ["passed", "passed"]
+
+
+def test_batch_reports_unsupported_files_without_failing_the_others(client, csv_upload):
+    name, content = csv_upload
+    files = [("files", ("notes.txt", b"text")), ("files", (name, content))]
+    entries = client.post("/validate/batch", files=files, data={"customer": "WW", "record_keys": "false"}).json()
+    assert [entry["status"] for entry in entries] == ["error", "passed"]
+    assert entries[0]["file_name"] == "notes.txt"
+    assert entries[0]["error"] == "Unsupported file type 'notes.txt'"
@@ -0,0 +1,38 @@
+import json
+
+from benchmarks.synthetic import write_file
+from interface.cli.cli import EXIT_FAILED, EXIT_OK, EXIT_USAGE, cli
+from tests.helpers import WW_PLAN, isolate_data_dirs, passing_frame
+
+
+def test_exit_codes(tmp_path, monkeypatch, capsys):
+    isolate_data_dirs(tmp_path, monkeypatch)
+    landing = tmp_path / "landing"
+    landing.mkdir()
+    df = passing_frame(100)
+    write_file(df, WW_PLAN, landing, ".csv")
+    report = tmp_path / "report.json"
+
+    assert cli([str(landing), "--customer", "WW", "--workers", "1", "--output", str(report)]) == EXIT_OK
+    assert [entry["status"] for entry in json.loads(report.read_text())] == ["passed"]
+
+    df["Reported Qty"] = df["Reported Qty"].astype(object)
+    df.loc[0, "Reported Qty"] = "not a number"
+    df.to_csv(landing / "Net_ASP_ww_bad.csv", index=False)
+    assert cli([str(landing), "--customer", "WW", "--workers", "1", "--strict", "--output", str(report)]) == EXIT_FAILED
+    assert sorted(entry["status"] for entry in json.loads(report.read_text())) == ["failed", "passed"]
+    assert "1/2 files passed validation." in capsys.readouterr().err
+
+    assert cli([str(tmp_path / "empty")]) == EXIT_USAGE
+
+
+def test_record_keys_flags_the_next_submission(tmp_path, monkeypatch):
+    isolate_data_dirs(tmp_path, monkeypatch)
+    path = write_file(passing_frame(100), WW_PLAN, tmp_path, ".csv")
+    copy = tmp_path / "Net_ASP_ww_copy.csv"
+    copy.write_bytes(path.read_bytes())
+
+    assert cli([str(path), "--customer", "WW", "--record-keys", "--output", str(tmp_path / "first.json")]) == EXIT_OK
+    assert cli([str(copy), "--customer", "WW", "--output", str(tmp_path / "second.json")]) == EXIT_FAILED
+    entry = json.loads((tmp_path / "second.json").read_text())[0]
+    assert entry["resubmission_results"]["resubmitted_rows"] == 100
@@ -0,0 +1,16 @@
+from compaction import compact_frame, summarize_conversions
+from tests.helpers import WW_PLAN, passing_frame
+from validation import validate_data_types
+
+
+def test_compact_frame_reports_its_conversions_and_keeps_validation_results():
+    df = passing_frame(2_000)
+    compact, report = compact_frame(df, "WW")
+
+    assert report["bytes_after"] < report["bytes_before"]
+    assert len(summarize_conversions(report)) == len(report["conversions"]) > 0
+    for conversion, line in zip(report["conversions"], summarize_conversions(report)):
+        assert line == f"{conversion['column']}: {conversion['from']} → {conversion['to']}"
+        assert str(compact[conversion["column"]].dtype) == conversion["to"]
+    compact_issues = validate_data_types(compact, WW_PLAN.customer)["type_issues"]
+    assert compact_issues == validate_data_types(df, WW_PLAN.customer)["type_issues"]
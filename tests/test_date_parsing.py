@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from date_parsing import DateFormatStore, excel_serial_to_datetime, infer_date_format, parse_dates
+
+
+def test_formats_are_inferred_from_the_text_values():
+    assert infer_date_format(pd.Series(["2024-01-05", "2024-02-29"])) == "%Y-%m-%d"
+    assert infer_date_format(pd.Series(["01/05/2024", "02/29/2024"])) == "%m/%d/%Y"
+    # A day above 12 rules out month first
+    assert infer_date_format(pd.Series(["05/01/2024", "29/02/2024"])) == "%d/%m/%Y"
+    assert infer_date_format(pd.Series(["not a date", "neither"])) is None
+
+
+def test_preferred_format_is_kept_while_it_fits():
+    ambiguous = pd.Series(["05/01/2024", "06/01/2024"])
+    assert infer_date_format(ambiguous) == "%m/%d/%Y"
+    assert infer_date_format(ambiguous, preferred="%d/%m/%Y") == "%d/%m/%Y"
+    assert infer_date_format(pd.Series(["2024-01-05"]), preferred="%d/%m/%Y") == "%Y-%m-%d"
+    # Nothing to judge by
+    assert infer_date_format(pd.Series([45000, None]), preferred="%d/%m/%Y") == "%d/%m/%Y"
+
+
+def test_numbers_are_excel_serial_dates_within_range():
+    parsed = excel_serial_to_datetime(pd.Series([45292, 45292.5, 12, 100000, np.nan]))
+    assert parsed.tolist()[:2] == [pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-01 12:00")]
+    assert parsed.iloc[2:].isna().all()
+
+
+def test_mixed_columns_parse_text_serials_and_dates():
+    values = pd.Series(["01/05/2024", 45292, pd.Timestamp("2024-03-01"), "n/a", None], dtype=object)
+    parsed = parse_dates(values, "%m/%d/%Y")
+    assert parsed.tolist()[:3] == [pd.Timestamp("2024-01-05"), pd.Timestamp("2024-01-01"), pd.Timestamp("2024-03-01")]
+    assert parsed.iloc[3:].isna().all()
+    assert parsed.dtype == "datetime64[ns]"
+
+
+def test_repeated_and_categorical_dates_parse_like_distinct_ones():
+    values = pd.Series(["01/05/2024", "02/29/2024", "bad", None] * 50)
+    expected = pd.Series([parse_dates(pd.Series([value]), "%m/%d/%Y").iloc[0] for value in values])
+    pd.testing.assert_series_equal(parse_dates(values, "%m/%d/%Y"), expected)
+    pd.testing.assert_series_equal(parse_dates(values.astype("category"), "%m/%d/%Y"), expected)
+
+
+def test_format_store_round_trip(tmp_path):
+    store = DateFormatStore(tmp_path / "formats.json")
+    assert store.formats("WW") == {}
+    store.update("WW", {"Distributor Invoice Date": "%m/%d/%Y", "Date Rebate Processed": None})
+    assert DateFormatStore(tmp_path / "formats.json").formats("WW") == {"Distributor Invoice Date": "%m/%d/%Y"}
@@ -0,0 +1,58 @@
+import gc
+import weakref
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.db.db import (
+    AsyncFastAPISessionMaker,
+    context_session,
+    get_async_sessionmaker_for_engine,
+    get_engine,
+    get_session,
+    get_sessionmaker_for_engine,
+)
+
+
+def test_sessions_of_a_uri_share_one_engine():
+    first, second = get_session("sqlite://"), get_session("sqlite://")
+    try:
+        assert first.get_bind() is second.get_bind()
+    finally:
+        first.close()
+        second.close()
+
+
+def test_sessionmakers_are_cached_per_engine():
+    engine = get_engine("sqlite://")
+    assert get_sessionmaker_for_engine(engine) is get_sessionmaker_for_engine(engine)
+    assert get_sessionmaker_for_engine(engine) is not get_sessionmaker_for_engine(get_engine("sqlite://"))
+    with context_session(engine) as first, context_session(engine) as second:
+        assert first.get_bind() is second.get_bind() is engine
+
+    async_engine = create_async_engine("sqlite+aiosqlite://")
+    assert get_async_sessionmaker_for_engine(async_engine) is get_async_sessionmaker_for_engine(async_engine)
+    assert get_async_sessionmaker_for_engine(async_engine).kw["bind"] is async_engine
+
+
+def test_engines_passed_to_context_session_are_not_kept_alive():
+    engine = get_engine("sqlite://")
+    engine_ref = weakref.ref(engine)
+    with context_session(engine) as session:
+        assert session.execute(sa.text("select 1")).scalar() == 1
+    del engine, session
+    gc.collect()
+    assert engine_ref() is None
+
+    async_engine = create_async_engine("sqlite+aiosqlite://")
+    get_async_sessionmaker_for_engine(async_engine)
+    async_engine_ref = weakref.ref(async_engine)
+    del async_engine
+    gc.collect()
+    assert async_engine_ref() is None
+
+
+def test_async_sessionmaker_is_cached_per_instance():
+    session_maker = AsyncFastAPISessionMaker("sqlite+aiosqlite://")
+    assert session_maker.cached_sessionmaker is session_maker.cached_sessionmaker
+    assert session_maker.cached_sessionmaker.kw["bind"] is session_maker.cached_engine
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from duplicates import DuplicateChecker, find_duplicates, hash_keys
+
+KEY = ["Distributor Invoice Number", "Distributor Item Number", "Distributor Invoice Date"]
+
+
+def key_frame(invoices, items, dates) -> pd.DataFrame:
+    return pd.DataFrame({KEY[0]: invoices, KEY[1]: items, KEY[2]: dates})
+
+
+def test_datetime_units_hash_the_same():
+    dates = pd.to_datetime(["2024-01-05", "2024-02-29"])
+    ns = key_frame(["1", "2"], ["A", "B"], dates.astype("datetime64[ns]"))
+    ms = key_frame(["1", "2"], ["A", "B"], dates.astype("datetime64[ms]"))
+    assert (hash_keys(ns, KEY) == hash_keys(ms, KEY)).all()
+
+
+def test_text_dates_hash_like_typed_dates():
+    typed = key_frame([1001, 1002], ["A", "B"], pd.to_datetime(["2024-01-05", "2024-02-29"]).astype("datetime64[s]"))
+    iso = key_frame(["1001", "1002"], ["A", "B"], ["2024-01-05", "2024-02-29"])
+    us = key_frame([1001.0, "1002"], ["A", "B"], ["01/05/2024", "02/29/2024"])
+    mixed_dates = pd.Series([pd.Timestamp("2024-01-05"), "2024-02-29"], dtype=object)
+    objects = key_frame(["1001", "1002"], ["A", "B"], mixed_dates)
+
+    expected = hash_keys(typed, KEY, {KEY[2]: None})
+    assert (hash_keys(iso, KEY, {KEY[2]: "%Y-%m-%d"}) == expected).all()
+    assert (hash_keys(us, KEY, {KEY[2]: "%m/%d/%Y"}) == expected).all()
+    assert (hash_keys(objects, KEY, {KEY[2]: None}) == expected).all()
+
+
+def test_duplicates_found_across_chunks_read_differently():
+    dates = pd.to_datetime(["2024-01-05", "2024-01-06"]).astype("datetime64[ms]")
+    first = key_frame(["1001", "1002"], ["A", "B"], dates)
+    second = key_frame([1001.0, 1003.0], ["A", "C"], ["01/05/2024", "01/07/2024"])
+    second.index = pd.RangeIndex(2, 4)
+
+    results = find_duplicates([first, second], "WW")
+    assert results["duplicate_groups"] == 1
+    assert results["duplicate_rows"] == 1
+    assert results["groups"][0]["rows"] == [2, 4]
+
+
+def test_empty_and_unparseable_keys_are_not_counted():
+    df = key_frame(["1", "1", None], ["A", "A", "A"], ["2024-01-05", "not a date", "2024-01-05"])
+    checker = DuplicateChecker("WW")
+    checker.fold(df)
+    results = checker.results()
+    assert results["checked_rows"] == 1
+    assert results["duplicate_rows"] == 0
+    hashes, rows = checker.key_hashes()
+    assert hashes.dtype == np.uint64 and rows.tolist() == [2]
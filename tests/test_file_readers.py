@@ -0,0 +1,111 @@
+import gc
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import csv
+import pytest
+
+from batch import validate_path
+from benchmarks.synthetic import inject_type_errors, write_file
+from file_readers import iter_chunks, read_file
+from reader_engines import resolve_engines
+from tests.helpers import WW_PLAN, isolate_data_dirs, passing_frame
+
+PYARROW = resolve_engines(csv="pyarrow")
+C_PARSER = resolve_engines(csv="c")
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rows = 30_000
+    df = pd.DataFrame({
+        "Invoice": [f"INV{row}" for row in range(rows)],
+        "Qty": range(rows),
+        "Price": [row / 4 for row in range(rows)],
+        "Note": ["line\nbreak" if row % 1000 == 0 else "plain" for row in range(rows)],
+    })
+    path = tmp_path / "Net_ASP_test.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_pyarrow_chunks_match_the_c_parser(csv_path):
+    arrow_chunks = list(iter_chunks(str(csv_path), csv_path.name, None, chunksize=7_000, engines=PYARROW))
+    c_chunks = list(iter_chunks(str(csv_path), csv_path.name, None, chunksize=7_000, engines=C_PARSER))
+    assert [len(chunk) for chunk in arrow_chunks] == [7_000] * 4 + [2_000]
+    pd.testing.assert_frame_equal(pd.concat(arrow_chunks), pd.concat(c_chunks), check_dtype=False)
+    pd.testing.assert_frame_equal(read_file(str(csv_path), csv_path.name, None, PYARROW), pd.concat(c_chunks),
+                                  check_dtype=False)
+
+
+def test_pyarrow_streams_in_bounded_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr("reader_engines.CSV_BLOCK_SIZE", 64 * 1024)
+    path = tmp_path / "Net_ASP_large.csv"
+    pd.DataFrame({"Invoice": [f"INV{row}" for row in range(600_000)], "Qty": range(600_000)}).to_csv(path, index=False)
+    whole = csv.read_csv(str(path)).nbytes
+
+    gc.collect()
+    start = pa.total_allocated_bytes()
+    peak = 0
+    for _ in iter_chunks(str(path), path.name, None, chunksize=1_000, engines=PYARROW):
+        peak = max(peak, pa.total_allocated_bytes() - start)
+    # Read-ahead keeps a few blocks in flight, far less than the whole file
+    assert peak < whole / 2, (peak, whole)
+
+
+def test_type_change_after_first_block_falls_back_for_the_rest(tmp_path, monkeypatch):
+    monkeypatch.setattr("reader_engines.CSV_BLOCK_SIZE", 16 * 1024)
+    qty = [str(row) for row in range(20_000)]
+    qty[15_000] = "BOX"
+    path = tmp_path / "Net_ASP_types.csv"
+    pd.DataFrame({"Qty": qty, "Invoice": [f"INV{row}" for row in range(20_000)]}).to_csv(path, index=False)
+
+    chunks = list(iter_chunks(str(path), path.name, None, chunksize=3_000, engines=PYARROW))
+    df = pd.concat(chunks)
+    assert df.index.tolist() == list(range(20_000))
+    assert df["Invoice"].tolist() == [f"INV{row}" for row in range(20_000)]
+    assert df["Qty"].astype(str).tolist() == qty
+
+
+def test_fallback_keeps_rows_aligned_after_quoted_line_breaks(tmp_path, monkeypatch):
+    monkeypatch.setattr("reader_engines.CSV_BLOCK_SIZE", 16 * 1024)
+    qty = [str(row) for row in range(20_000)]
+    qty[15_000] = "BOX"
+    notes = ["line\nbreak" if row % 7 == 0 else "plain" for row in range(20_000)]
+    path = tmp_path / "Net_ASP_quoted.csv"
+    pd.DataFrame({"Qty": qty, "Note": notes, "Invoice": [f"INV{row}" for row in range(20_000)]}).to_csv(
+        path, index=False
+    )
+
+    chunks = list(iter_chunks(str(path), path.name, None, chunksize=3_000, engines=PYARROW))
+    df = pd.concat(chunks)
+    assert df.index.tolist() == list(range(20_000))
+    assert df["Invoice"].tolist() == [f"INV{row}" for row in range(20_000)]
+    assert df["Note"].tolist() == notes
+    assert df["Qty"].astype(str).tolist() == qty
+
+
+def test_header_only_file_gives_one_empty_chunk(tmp_path):
+    path = tmp_path / "Net_ASP_empty.csv"
+    path.write_text("Invoice,Qty\n")
+    chunks = list(iter_chunks(str(path), path.name, None, chunksize=1_000, engines=PYARROW))
+    assert len(chunks) == 1 and chunks[0].empty
+    assert chunks[0].columns.tolist() == ["Invoice", "Qty"]
+
+
+def test_csv_and_xlsx_of_the_same_frame_validate_alike(tmp_path, monkeypatch):
+    isolate_data_dirs(tmp_path, monkeypatch)
+    df, invalid_counts = inject_type_errors(passing_frame(500), WW_PLAN, 0.02)
+    csv_entry, xlsx_entry = (validate_path(str(write_file(df, WW_PLAN, tmp_path, extension)), strict=True)
+                             for extension in (".csv", ".xlsx"))
+
+    def issues(entry):
+        # Sample values keep the reader's types (text from CSV, timestamps from XLSX)
+        return {issue["column"]: (issue["status"], issue["invalid_count"], issue["invalid_rows"])
+                for issue in entry["type_results"]["type_issues"]}
+
+    assert issues(csv_entry) == issues(xlsx_entry)
+    assert {column: issue[1] for column, issue in issues(csv_entry).items()} == invalid_counts
+    assert csv_entry["type_results"]["total_rows"] == xlsx_entry["type_results"]["total_rows"] == 500
+    for key in ("status", "results", "rule_results", "duplicate_results", "reference_results"):
+        assert csv_entry[key] == xlsx_entry[key], key
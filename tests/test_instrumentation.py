@@ -0,0 +1,42 @@
+import io
+import json
+import logging
+import logging.config
+
+import pytest
+
+from utils.instrumentation import PipelineProfiler
+from utils.logging_config import get_logging_config
+
+
+@pytest.fixture
+def datadog_stream():
+    """Route the instrumentation records through the json_datadog handler of a non-local environment"""
+    config = get_logging_config("PROD", "INFO", disable_existing_loggers=False)
+    config["handlers"]["datadog"]["stream"] = stream = io.StringIO()
+    root = logging.getLogger()
+    saved = root.level, root.handlers[:]
+    logging.config.dictConfig(config)
+    yield stream
+    root.setLevel(saved[0])
+    root.handlers[:] = saved[1]
+
+
+def test_stage_records_reach_the_datadog_handler_as_json_fields(datadog_stream):
+    profiler = PipelineProfiler("single_file", customer="WW")
+    with profiler.stage("type_check", chunks=3) as stage:
+        stage.rows = 1_000
+
+    record = json.loads(datadog_stream.getvalue().splitlines()[-1])
+    assert record["levelname"] == "INFO"
+    assert record["pipeline"] == "single_file" and record["customer"] == "WW"
+    assert record["stage"] == "type_check" and record["chunks"] == 3
+    assert record["rows"] == 1_000
+    assert record["duration_seconds"] == profiler.stages[0].duration_seconds
+    assert profiler.summary() == [profiler.stages[0].to_dict()]
+
+
+def test_console_environments_log_at_the_configured_level():
+    config = get_logging_config("local", "WARNING")
+    assert config["loggers"][""] == {"handlers": ["console"], "level": "WARNING", "propagate": True}
+    assert get_logging_config("STAGING", "INFO")["loggers"][""]["handlers"] == ["datadog"]
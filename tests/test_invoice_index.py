@@ -0,0 +1,133 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from batch import read_key_hashes, validate_path
+from benchmarks.synthetic import make_frame, write_file
+from config import get_validation_plan
+from duplicates import DuplicateChecker
+from file_readers import WorkbookInspector
+from invoice_index import MAX_SEGMENTS, InvoiceKeyIndex, check_resubmitted
+from tests.helpers import isolate_data_dirs, passing_frame
+
+PLAN = get_validation_plan("WW")
+
+
+@pytest.fixture
+def index(tmp_path) -> InvoiceKeyIndex:
+    return InvoiceKeyIndex(tmp_path / "invoice_keys")
+
+
+def fold_file(path) -> DuplicateChecker:
+    checker = DuplicateChecker(PLAN.customer)
+    with WorkbookInspector(str(path), path.name) as workbook:
+        for chunk in workbook.iter_chunks(workbook.select_sheet(PLAN.sheet_candidates, PLAN.essential)):
+            checker.fold(chunk)
+    return checker
+
+
+def add_file(directory: str, number: int):
+    InvoiceKeyIndex(directory).add(PLAN, f"{number}.csv", np.arange(number * 100, number * 100 + 50, dtype=np.uint64))
+
+
+def test_empty_index_finds_nothing(index):
+    assert index.probe(PLAN, np.array([1, 2], dtype=np.uint64)).tolist() == [-1, -1]
+    assert index.files(PLAN) == []
+
+
+def test_probe_reports_the_file_of_each_key(index):
+    index.add(PLAN, "a.csv", np.array([5, 1, 1], dtype=np.uint64))
+    index.add(PLAN, "b.csv", np.array([9], dtype=np.uint64))
+    names = index.source_names(PLAN)
+    found = index.probe(PLAN, np.array([9, 1, 7, 1], dtype=np.uint64))
+    assert [names[int(source)]["file_name"] if source >= 0 else None for source in found] == [
+        "b.csv", "a.csv", None, "a.csv"
+    ]
+    assert [(source["file_name"], source["keys"]) for source in index.files(PLAN)] == [("a.csv", 2), ("b.csv", 1)]
+
+
+def test_compact_merges_segments_into_one(index):
+    for number in range(3):
+        index.add(PLAN, f"{number}.csv", np.array([number], dtype=np.uint64))
+    assert len(list(index.path(PLAN).glob("*.keys.npy"))) == 3
+    index.compact(PLAN)
+    assert len(list(index.path(PLAN).glob("*.keys.npy"))) == 1
+    assert (index.probe(PLAN, np.arange(3, dtype=np.uint64)) >= 0).all()
+
+
+def test_concurrent_writers_do_not_lose_files(index):
+    # Enough writers to compact while others append
+    processes = [
+        multiprocessing.get_context("fork").Process(target=add_file, args=(str(index.directory), number))
+        for number in range(MAX_SEGMENTS * 2)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert all(process.exitcode == 0 for process in processes)
+    assert len(index.files(PLAN)) == MAX_SEGMENTS * 2
+    hashes = np.concatenate([np.arange(number * 100, number * 100 + 50) for number in range(MAX_SEGMENTS * 2)])
+    assert (index.probe(PLAN, hashes.astype(np.uint64)) >= 0).all()
+
+
+def test_csv_lines_resubmitted_as_xlsx_are_flagged(tmp_path, index):
+    df = make_frame(PLAN, 3000)
+    csv_dir, xlsx_dir = tmp_path / "csv", tmp_path / "xlsx"
+    csv_dir.mkdir()
+    xlsx_dir.mkdir()
+    csv_path = write_file(df, PLAN, csv_dir, ".csv")
+    xlsx_path = write_file(df, PLAN, xlsx_dir, ".xlsx")
+
+    _, file_name, hashes = read_key_hashes(str(csv_path), PLAN.customer)
+    index.add(PLAN, "Net_ASP_ww_2024-01.csv", hashes)
+
+    for path in (xlsx_path, csv_path):
+        results = check_resubmitted(fold_file(path), PLAN, "Net_ASP_ww_2024-02" + path.suffix, index)
+        assert results["checked_rows"] == 3000
+        assert results["resubmitted_rows"] == 3000
+        assert results["sources"][0]["file_name"] == "Net_ASP_ww_2024-01.csv"
+
+
+def test_same_file_name_is_not_flagged_and_replaces_its_keys(index):
+    index.add(PLAN, "a.csv", np.array([1, 2, 3], dtype=np.uint64))
+    probe = np.array([1, 2, 3], dtype=np.uint64)
+    assert (index.probe(PLAN, probe, exclude_file="a.csv") == -1).all()
+
+    index.add(PLAN, "a.csv", np.array([3, 4], dtype=np.uint64))
+    assert [source["file_name"] for source in index.files(PLAN)] == ["a.csv"]
+    assert index.probe(PLAN, probe).tolist()[:2] == [-1, -1]
+    assert index.probe(PLAN, probe)[2] >= 0
+
+
+def test_earliest_file_is_reported_after_compaction(index):
+    for number in range(MAX_SEGMENTS + 2):
+        index.add(PLAN, f"{number}.csv", np.array([100, number + 1], dtype=np.uint64))
+    names = index.source_names(PLAN)
+    found = index.probe(PLAN, np.array([100, 5, 999], dtype=np.uint64))
+    assert names[int(found[0])]["file_name"] == "0.csv"
+    assert names[int(found[1])]["file_name"] == "4.csv"
+    assert found[2] == -1
+    assert len(list(index.path(PLAN).glob("*.keys.npy"))) <= MAX_SEGMENTS
+
+
+def test_rebuild_replaces_the_index(index):
+    index.add(PLAN, "old.csv", np.array([7], dtype=np.uint64))
+    assert index.rebuild(PLAN, [("a.csv", np.array([1, 2], dtype=np.uint64)),
+                                ("b.csv", np.array([2, 3], dtype=np.uint64))]) == 2
+    names = index.source_names(PLAN)
+    found = index.probe(PLAN, np.array([2, 3, 7], dtype=np.uint64))
+    assert [names[int(source)]["file_name"] for source in found[:2]] == ["a.csv", "b.csv"]
+    assert found[2] == -1
+
+
+def test_validate_path_records_passed_files(tmp_path, monkeypatch):
+    isolate_data_dirs(tmp_path, monkeypatch)
+    path = write_file(passing_frame(200), PLAN, tmp_path, ".csv")
+
+    first = validate_path(str(path), PLAN.customer, filename="Net_ASP_ww_2024-01.csv", record_keys=True)
+    assert first["status"] == "passed", first
+    second = validate_path(str(path), PLAN.customer, filename="Net_ASP_ww_2024-02.csv")
+    assert second["status"] == "failed"
+    assert second["resubmission_results"]["resubmitted_rows"] == 200
@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import REFERENCE_TABLES
+from reference_data import ReferenceStore, hash_codes, validate_references
+
+SHIP_TO = "Ply Gem Ship To Number"
+TABLE = REFERENCE_TABLES["ply_gem_ship_tos"]
+
+
+@pytest.fixture
+def store(tmp_path) -> ReferenceStore:
+    write_master_list(tmp_path, ["1042", "2001", " 3003 "])
+    return ReferenceStore(tmp_path)
+
+
+def write_master_list(directory, codes):
+    pd.DataFrame({TABLE["column"]: codes}).to_csv(directory / TABLE["file"], index=False)
+
+
+def test_codes_compare_as_trimmed_text():
+    texts, hashes = hash_codes(pd.Series([1042, 1042.0, " 1042", "1042"], dtype=object))
+    assert texts.tolist() == ["1042"] * 4
+    assert len(np.unique(hashes)) == 1
+
+
+def test_unknown_codes_are_counted_with_their_rows(store):
+    df = pd.DataFrame({SHIP_TO: [1042, "9999", None, 3003.0, "9999", "8888"]})
+    results = validate_references([df.iloc[:3], df.iloc[3:]], "WW", store=store)
+    check = results["checks"][0]
+    assert check["checked_rows"] == 5
+    assert check["unknown_rows"] == 3 and check["unknown_codes"] == 2
+    # Most frequent first, with sheet row numbers
+    assert check["codes"][0] == {"code": "9999", "count": 2, "rows": [3, 6]}
+    assert check["codes"][1]["code"] == "8888"
+    assert results["unknown_rows"] == 3 and results["total_rows"] == 6
+
+
+def test_updated_master_list_is_read_again(store, tmp_path):
+    df = pd.DataFrame({SHIP_TO: ["9999"]})
+    assert validate_references([df], "WW", store=store)["unknown_rows"] == 1
+    write_master_list(tmp_path, ["9999"])
+    # The version is the modification time and size, so make sure the former changes
+    stat = os.stat(tmp_path / TABLE["file"])
+    os.utime(tmp_path / TABLE["file"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert validate_references([df], "WW", store=store)["unknown_rows"] == 0
+
+
+def test_missing_master_lists_and_columns_do_not_fail_the_file(tmp_path):
+    df = pd.DataFrame({SHIP_TO: ["1042"]})
+    results = validate_references([df], "WW", store=ReferenceStore(tmp_path / "missing"))
+    assert results["checks"] == [] and results["unknown_rows"] == 0
+    assert results["unavailable"][0]["column"] == SHIP_TO
+
+    results = validate_references([pd.DataFrame({"Other": [1]})], "WW", store=ReferenceStore(tmp_path))
+    assert results["skipped"] == [{"column": SHIP_TO, "table": "ply_gem_ship_tos"}]
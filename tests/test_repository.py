@@ -0,0 +1,139 @@
+import uuid
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from src.db.models import Base, ValidationFinding, ValidationRun
+from src.repository.validation_run import (
+    RULE_VIOLATION,
+    TYPE_MISMATCH,
+    ValidationFindingRepository,
+    ValidationRunRepository,
+)
+
+
+@pytest.fixture
+def session():
+    engine = sa.create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def run_row(status: str = "passed", **values) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "created_at": datetime(2026, 1, 1),
+        "source": "test",
+        "file_name": "Net_ASP_ww.csv",
+        "customer": "WW",
+        "status": status,
+        **values,
+    }
+
+
+def failed_entry(file_name: str) -> dict:
+    return {
+        "file_name": file_name,
+        "customer": "WW",
+        "product_line": None,
+        "status": "failed",
+        "results": {"total_file_columns": 10, "missing_essential": []},
+        "type_results": {
+            "total_rows": 5,
+            "type_issues": [
+                {
+                    "column": "Reported Qty",
+                    "expected": "int64",
+                    "actual": "object",
+                    "invalid_count": 1,
+                    "invalid_percentage": 20.0,
+                    "sample_values": ["BOX"],
+                    "invalid_rows": [3],
+                }
+            ],
+        },
+        "rule_results": {
+            "rule_violations": [
+                {
+                    "rule": "positive_qty",
+                    "columns": ["Reported Qty"],
+                    "expression": "`Reported Qty` > 0",
+                    "violation_count": 2,
+                    "violation_percentage": 40.0,
+                }
+            ]
+        },
+    }
+
+
+def test_create_many_and_read_many_in_batches(session):
+    repository = ValidationRunRepository(session)
+    rows = [run_row() for _ in range(25)]
+    assert repository.create_many(iter(rows), batch_size=10) == 25
+
+    ids = [row["id"] for row in rows[::2]] + ["missing"]
+    assert sorted(record.id for record in repository.read_many(ids, batch_size=4)) == sorted(ids[:-1])
+
+
+def test_create_many_rolls_back_the_whole_insert(session):
+    repository = ValidationRunRepository(session)
+    rows = [run_row() for _ in range(5)]
+    assert repository.create_many(rows + [rows[0]], batch_size=2) == 0
+    assert session.scalar(sa.select(sa.func.count()).select_from(ValidationRun)) == 0
+
+
+def test_upsert_many_updates_conflicting_records(session):
+    repository = ValidationRunRepository(session)
+    rows = [run_row() for _ in range(3)]
+    repository.create_many(rows)
+
+    changed = [{**rows[0], "status": "failed"}, run_row()]
+    assert repository.upsert_many(changed) == 2
+    assert repository.read(rows[0]["id"]).status == "failed"
+
+    # With no fields to update, conflicting records are left untouched
+    assert repository.upsert_many([{**rows[1], "status": "error"}], fields=[]) == 1
+    assert repository.read(rows[1]["id"]).status == "passed"
+    assert session.scalar(sa.select(sa.func.count()).select_from(ValidationRun)) == 4
+
+
+def test_iter_all_pages_through_filtered_records_in_id_order(session):
+    repository = ValidationRunRepository(session)
+    rows = [run_row("failed" if i % 3 else "passed") for i in range(20)]
+    repository.create_many(rows)
+
+    records = list(repository.iter_all(ValidationRun.status == "failed", batch_size=4))
+    assert [record.id for record in records] == sorted(row["id"] for row in rows if row["status"] == "failed")
+
+
+def test_save_entries_stores_runs_and_findings(session):
+    entries = [failed_entry("a.csv"), failed_entry("b.csv"), {"file_name": "c.xlsx", "status": "error", "error": "x"}]
+    assert ValidationRunRepository(session).save_entries(entries, "test", batch_size=2) == 3
+
+    failures = ValidationRunRepository(session).recent_failures("WW", days=36500)
+    assert sorted(run.file_name for run in failures) == ["a.csv", "b.csv"]
+    assert session.scalar(sa.select(sa.func.count()).select_from(ValidationFinding)) == 4
+
+    trend = ValidationFindingRepository(session).column_trend("WW", days=36500)
+    assert sorted((row["column_name"], row["kind"], row["count"]) for row in trend) == [
+        ("Reported Qty", RULE_VIOLATION, 2),
+        ("Reported Qty", TYPE_MISMATCH, 2),
+    ]
+
+
+def test_save_entries_rolls_back_runs_when_findings_fail(session):
+    entry = failed_entry("a.csv")
+    entry["type_results"]["type_issues"][0]["column"] = None
+    assert ValidationRunRepository(session).save_entries([failed_entry("b.csv"), entry], "test") == 0
+    assert session.scalar(sa.select(sa.func.count()).select_from(ValidationRun)) == 0
+    assert session.scalar(sa.select(sa.func.count()).select_from(ValidationFinding)) == 0
+
+
+def test_upsert_many_rejects_other_dialects():
+    engine = sa.create_mock_engine("mysql+pymysql://", executor=None)
+    with Session(engine) as session, pytest.raises(ValueError, match="mysql"):
+        ValidationRunRepository(session).upsert_many([run_row()])
@@ -0,0 +1,45 @@
+import pandas as pd
+
+from row_rules import validate_row_rules
+
+INVOICE_DATE = "Distributor Invoice Date"
+PROCESSED_DATE = "Date Rebate Processed"
+
+
+def rule_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        INVOICE_DATE: ["01/05/2024", "01/10/2024", "01/15/2024", None, "bad"],
+        PROCESSED_DATE: ["01/06/2024", "01/09/2024", "01/15/2024", "01/01/2024", "01/01/2024"],
+        "Reported Qty": [1, 0, "3", -2, 5],
+    })
+
+
+def by_rule(results) -> dict:
+    return {result["rule"]: result for result in results["rule_violations"] + results["rule_passes"]}
+
+
+def test_violations_are_counted_with_their_rows():
+    results = validate_row_rules([rule_frame()], "WW")
+    rules = by_rule(results)
+    dates = rules["Invoice dated on or before rebate processing"]
+    # Empty and unparsable dates are left to the data type check
+    assert dates["checked_rows"] == 3
+    assert dates["violation_count"] == 1
+    assert dates["invalid_rows"] == [3]
+    quantity = rules["Reported Qty is positive"]
+    assert quantity["violation_count"] == 2
+    assert quantity["invalid_rows"] == [3, 5]
+    assert results["total_rows"] == 5 and results["skipped_rules"] == []
+
+
+def test_chunks_give_the_same_results_as_the_whole_file():
+    df = rule_frame()
+    first, second = df.iloc[:2], df.iloc[2:]
+    assert validate_row_rules([first, second], "WW") == validate_row_rules([df], "WW")
+
+
+def test_rules_missing_a_column_are_skipped():
+    results = validate_row_rules([rule_frame().drop(columns=[PROCESSED_DATE])], "WW")
+    assert [rule["rule"] for rule in results["skipped_rules"]] == ["Invoice dated on or before rebate processing"]
+    assert results["skipped_rules"][0]["missing_columns"] == [PROCESSED_DATE]
+    assert results["total_checked"] == 1
@@ -0,0 +1,44 @@
+from upload_cache import UploadCache
+
+
+class Handle:
+    def __init__(self, size: int):
+        self.size = size
+        self.closed = False
+
+    def __sizeof__(self) -> int:
+        return self.size
+
+    def close(self):
+        self.closed = True
+
+
+def test_evicted_replaced_and_cleared_values_are_closed():
+    cache = UploadCache(max_bytes=300)
+    first, second, third = Handle(100), Handle(100), Handle(100)
+    cache.put("first", first)
+    cache.put("second", second)
+    cache.put("third", third)
+    assert first.closed and not second.closed and not third.closed
+
+    replacement = Handle(100)
+    cache.put("second", replacement)
+    assert second.closed and not replacement.closed
+
+    cache.clear()
+    assert third.closed and replacement.closed
+    assert len(cache) == 0 and cache.total_bytes == 0
+
+
+def test_values_returned_uncached_are_left_open():
+    cache = UploadCache(max_bytes=50)
+    handle = cache.get_or_compute("large", lambda: Handle(100))
+    assert not handle.closed and "large" not in cache
+
+
+def test_cached_values_are_computed_once():
+    cache = UploadCache()
+    calls = []
+    for _ in range(3):
+        cache.get_or_compute("key", lambda: calls.append(1) or len(calls))
+    assert calls == [1]
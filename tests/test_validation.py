@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import inject_type_errors, make_frame
+from config import get_validation_plan
+from date_parsing import DateFormatStore
+from validation import (
+    FIRST_DATA_ROW,
+    MAX_INVALID_ROWS,
+    profile_columns,
+    validate_columns,
+    validate_data_types,
+    validate_data_types_chunked,
+)
+
+DATE_COLUMN = "Distributor Invoice Date"
+PLAN = get_validation_plan("WW")
+
+
+def chunks_of(df: pd.DataFrame, size: int):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def test_missing_and_extra_columns():
+    columns = [col for col in PLAN.essential if col != DATE_COLUMN] + ["Unexpected"]
+    results = validate_columns(columns, "WW", None)
+    assert results["missing_essential"] == [DATE_COLUMN]
+    assert results["extra_columns"] == ["Unexpected"]
+    assert results["total_file_columns"] == len(columns)
+
+
+def test_strict_counts_every_injected_error_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATE_FORMAT_FILE", str(tmp_path / "date_formats.json"))
+    df, injected = inject_type_errors(make_frame(PLAN, 5_000), PLAN, 0.01)
+
+    whole = validate_data_types_chunked([df], "WW", strict=True)
+    chunked = validate_data_types_chunked(chunks_of(df, 1_200), "WW", strict=True)
+    found = {issue["column"]: issue["invalid_count"] for issue in chunked["type_issues"]}
+    assert found == {col: count for col, count in injected.items() if count}
+    assert chunked["total_rows"] == whole["total_rows"] == 5_000
+    assert [issue["invalid_count"] for issue in chunked["type_issues"]] == [
+        issue["invalid_count"] for issue in whole["type_issues"]
+    ]
+    for issue in chunked["type_issues"]:
+        assert len(issue["invalid_rows"]) == min(MAX_INVALID_ROWS, issue["invalid_count"])
+
+
+def test_sample_check_flags_columns_and_reports_sheet_rows():
+    df = pd.DataFrame({"Reported Qty": ["1", "2", "x"], "Year": [2024, 2025, 2026], DATE_COLUMN: ["bad"] * 3})
+    results = validate_data_types_chunked(chunks_of(df, 2), "WW")
+    issues = {issue["column"]: issue for issue in results["type_issues"]}
+    assert set(issues) == {"Reported Qty", DATE_COLUMN}
+    assert issues["Reported Qty"]["invalid_rows"] == [2 + FIRST_DATA_ROW]
+    assert issues[DATE_COLUMN]["invalid_rows"] == [FIRST_DATA_ROW, 1 + FIRST_DATA_ROW, 2 + FIRST_DATA_ROW]
+    assert [match["column"] for match in results["type_matches"]] == ["Year"]
+    assert "invalid_count" not in issues["Reported Qty"]
+
+
+def test_nullable_and_arrow_dtypes_are_accepted():
+    df = pd.DataFrame({
+        "Year": pd.array([2024, None, 2026], dtype="Int64"),
+        "Reported Qty": pd.array([1.5, None, np.nan], dtype="Float64"),
+        "Total Distributor Payout": pd.Series([1.0, 2.0, None], dtype="double[pyarrow]"),
+    })
+    results = validate_data_types_chunked([df], "WW", strict=True)
+    assert results["type_issues"] == []
+    assert results["total_checked"] == 3
+
+
+def test_learned_date_formats_are_stored_only_in_a_passed_store(tmp_path, monkeypatch):
+    default_path = tmp_path / "default_formats.json"
+    monkeypatch.setenv("DATE_FORMAT_FILE", str(default_path))
+    df = pd.DataFrame({DATE_COLUMN: ["01/05/2024", "02/29/2024"]})
+
+    validate_data_types_chunked([df], "WW")
+    profile_columns(df, {DATE_COLUMN: "date"}, customer="WW")
+    assert not default_path.exists()
+
+    store = DateFormatStore(tmp_path / "formats.json")
+    validate_data_types_chunked([df], "WW", format_store=store)
+    assert store.formats("WW") == {DATE_COLUMN: "%m/%d/%Y"}
+
+
+def test_stored_formats_are_read_without_a_passed_store(tmp_path, monkeypatch):
+    path = tmp_path / "formats.json"
+    monkeypatch.setenv("DATE_FORMAT_FILE", str(path))
+    # Day first, which inference alone cannot tell from month first on these values
+    DateFormatStore().update("WW", {DATE_COLUMN: "%d/%m/%Y"})
+    df = pd.DataFrame({DATE_COLUMN: ["05/01/2024", "06/01/2024"]})
+
+    profile = profile_columns(df, {DATE_COLUMN: "date"}, customer="WW")
+    assert profile[DATE_COLUMN]["type_state"]["date_format"] == "%d/%m/%Y"
+
+
+def test_strict_profile_matches_the_strict_check():
+    rows = 5_000
+    df = pd.DataFrame({
+        # Repeated text values are checked once per distinct value
+        "Reported Qty": pd.Series(["1", "2.5", "x", None] * (rows // 4), dtype=object),
+        "Year": pd.Series(["2024", "2025", "20x5", None] * (rows // 4), dtype="category"),
+        DATE_COLUMN: ["01/05/2024", "02/30/2024", None, 45000] * (rows // 4),
+        # Distinct text values are checked row by row
+        "Total Distributor Payout": [f"{row}.5" if row % 7 else "n/a" for row in range(rows)],
+    })
+    plan_types = {"Reported Qty": "float", "Year": "integer", DATE_COLUMN: "date", "Total Distributor Payout": "float"}
+
+    profile = profile_columns(df, plan_types, strict=True)
+    expected = validate_data_types(df, "WW", strict=True)
+    assert validate_data_types(df, "WW", strict=True, profile=profile) == expected
+    assert {issue["column"]: issue["invalid_count"] for issue in expected["type_issues"]} == {
+        "Reported Qty": rows // 4,
+        "Year": rows // 4,
+        DATE_COLUMN: rows // 4,
+        "Total Distributor Payout": len(range(0, rows, 7)),
+    }
+    assert profile["Reported Qty"]["distinct_estimate"] == 3 and profile["Reported Qty"]["distinct_exact"]
+    assert profile["Year"]["distinct_estimate"] == 3